@@ -1,14 +1,18 @@
 import logging
 import os
+import re
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal, Union
 from contextlib import asynccontextmanager
 
+import orjson
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import uvicorn
 
 from src.medchat import MedChat
+from src.monitoring.health_prober import HealthProber
 from config_template import (
     GOOGLE_API_KEY,
     QDRANT_URL,
@@ -17,6 +21,30 @@ from config_template import (
     MEDICAL_COLLECTION_NAME,
     EMBEDDING_DIMENSION,
     LOG_LEVEL,
+    MEMORY_BACKEND,
+    SQLITE_MEMORY_PATH,
+    COMPACTION_INTERVAL_TURNS,
+    COMPACTION_KEEP_RECENT,
+    MAX_CONTEXT_TOKENS,
+    BATCH_MAX_ITEMS,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_DEFAULT_CONCURRENCY,
+    HEALTH_PROBE_INTERVAL,
+    HEALTH_PROBE_TIMEOUT,
+    READINESS_COMPONENTS,
+    IMAGE_STORE_DIR,
+    REPORT_MODE,
+    REPORT_MAX_CONCURRENCY,
+    REPORT_MAX_SECTIONS,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_STALE_TTL,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SUFFICIENCY_MIN_TOP_SCORE,
+    SUFFICIENCY_GOOD_TOP_SCORE,
+    SUFFICIENT_CONFIDENCE,
+    INSUFFICIENT_CONFIDENCE,
+    SEARCH_HEDGE_DEADLINE,
+    SEARCH_FALLBACK_TIMEOUT,
 )
 
 # Configure logging
@@ -28,13 +56,14 @@ logger = logging.getLogger(__name__)
 
 # Global MedChat instance
 medchat_instance: Optional[MedChat] = None
+health_prober: Optional[HealthProber] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for FastAPI to handle startup and shutdown events.
     """
-    global medchat_instance
+    global medchat_instance, health_prober
     try:
         logger.info("Initializing MedChat API...")
         medchat_instance = MedChat(
@@ -44,36 +73,83 @@ async def lifespan(app: FastAPI):
             gemini_model=GEMINI_MODEL,
             collection_name=MEDICAL_COLLECTION_NAME,
             embedding_dimension=EMBEDDING_DIMENSION,
+            memory_backend=MEMORY_BACKEND,
+            sqlite_memory_path=SQLITE_MEMORY_PATH,
+            compaction_interval=COMPACTION_INTERVAL_TURNS,
+            compaction_keep_recent=COMPACTION_KEEP_RECENT,
+            max_context_tokens=MAX_CONTEXT_TOKENS,
+            report_mode=REPORT_MODE,
+            report_max_concurrency=REPORT_MAX_CONCURRENCY,
+            report_max_sections=REPORT_MAX_SECTIONS,
+            search_cache_ttl=SEARCH_CACHE_TTL,
+            search_cache_stale_ttl=SEARCH_CACHE_STALE_TTL,
+            search_cache_max_entries=SEARCH_CACHE_MAX_ENTRIES,
+            sufficiency_min_top_score=SUFFICIENCY_MIN_TOP_SCORE,
+            sufficiency_good_top_score=SUFFICIENCY_GOOD_TOP_SCORE,
+            sufficient_confidence=SUFFICIENT_CONFIDENCE,
+            insufficient_confidence=INSUFFICIENT_CONFIDENCE,
+            search_hedge_deadline=SEARCH_HEDGE_DEADLINE,
+            search_fallback_timeout=SEARCH_FALLBACK_TIMEOUT,
         )
-        # Perform health check on startup
-        health = medchat_instance.health_check()
-        logger.info(f"Startup Health Check: {health}")
+        # Refresh component health in the background; probes only read the cache
+        health_prober = HealthProber(
+            medchat_instance.health_probes(),
+            interval=HEALTH_PROBE_INTERVAL,
+            timeout=HEALTH_PROBE_TIMEOUT,
+        )
+        health_prober.start()
         yield
     except Exception as e:
         logger.error(f"Failed to initialize MedChat: {e}")
         raise
     finally:
         logger.info("Shutting down MedChat API...")
-        # Cleanup if necessary
+        if health_prober:
+            health_prober.stop()
+        if medchat_instance and medchat_instance.compactor:
+            medchat_instance.compactor.shutdown()
+        if medchat_instance:
+            medchat_instance.search_agent.shutdown()
 
 app = FastAPI(
     title="MedChat API",
     description="API for the Multi-Agent Medical Chatbot",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # --- Pydantic Models ---
 
+DetailLevel = Literal["full", "citations", "none"]
+
 class ChatRequest(BaseModel):
     query: str = Field(..., description="The user's question")
     session_id: Optional[str] = Field(None, description="Session ID for conversation history")
+    detail: DetailLevel = Field(
+        "full",
+        description="Source document detail: full content, citation fields only, or none",
+    )
 
 class SourceDocument(BaseModel):
+    point_id: Optional[str] = None
     content: str
     metadata: Dict[str, Any]
     score: float
 
+class SourceCitation(BaseModel):
+    point_id: Optional[str] = None
+    book_name: Optional[str] = None
+    author: Optional[str] = None
+    publish_year: Optional[Union[int, str]] = None
+    page_number: Optional[Union[int, str]] = None
+    score: float
+
+class DocumentResponse(BaseModel):
+    point_id: str
+    content: str
+    metadata: Dict[str, Any]
+
 class SearchResult(BaseModel):
     title: str
     link: str
@@ -83,13 +159,83 @@ class ChatResponse(BaseModel):
     answer: str
     session_id: str
     agent_type: str
-    retrieved_documents: List[SourceDocument] = []
+    retrieved_documents: List[Union[SourceDocument, SourceCitation]] = []
     search_results: List[SearchResult] = []
     thinking_time: Optional[float] = None
 
+class BatchChatRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS, description="Independent questions to answer")
+    max_concurrency: int = Field(
+        BATCH_DEFAULT_CONCURRENCY,
+        ge=1,
+        le=BATCH_MAX_CONCURRENCY,
+        description="Maximum number of items processed concurrently",
+    )
+    detail: DetailLevel = Field("full", description="Source document detail for every item")
+
 class HealthResponse(BaseModel):
     status: str
     components: Dict[str, bool]
+    errors: Dict[str, str] = {}
+    checked_at: Optional[float] = None
+    age_seconds: Optional[float] = None
+
+# --- Helpers ---
+
+IMAGE_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+def _sniff_image_type(path: str) -> str:
+    """Media type of a stored image from its magic bytes."""
+    with open(path, "rb") as f:
+        header = f.read(12)
+    if header.startswith(b"\x89PNG"):
+        return "image/png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+def _build_chat_response(result: Dict[str, Any], session_id: str, detail: str = "full") -> ChatResponse:
+    """Transform an internal MedChat result into the API response model."""
+    retrieved_docs = []
+    if "retrieved_documents" in result and detail != "none":
+        for doc in result["retrieved_documents"]:
+            metadata = doc.get("metadata", {})
+            if detail == "citations":
+                retrieved_docs.append(SourceCitation(
+                    point_id=metadata.get("point_id"),
+                    book_name=metadata.get("book_name"),
+                    author=metadata.get("author"),
+                    publish_year=metadata.get("publish_year"),
+                    page_number=metadata.get("page_number"),
+                    score=doc.get("score", 0.0)
+                ))
+            else:
+                retrieved_docs.append(SourceDocument(
+                    point_id=metadata.get("point_id"),
+                    content=doc.get("content", ""),
+                    metadata=metadata,
+                    score=doc.get("score", 0.0)
+                ))
+
+    search_results = []
+    if "search_results" in result:
+        for res in result["search_results"]:
+            search_results.append(SearchResult(
+                title=res.get("title", ""),
+                link=res.get("link", ""),
+                snippet=res.get("snippet", "")
+            ))
+
+    return ChatResponse(
+        answer=result.get("answer", ""),
+        session_id=session_id,
+        agent_type=result.get("agent_type", "unknown"),
+        retrieved_documents=retrieved_docs,
+        search_results=search_results,
+        thinking_time=result.get("thinking_time")
+    )
 
 # --- Endpoints ---
 
@@ -104,13 +250,47 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Check the health of the system components."""
-    if not medchat_instance:
+    """Return the cached health of the system components and the snapshot age."""
+    if not medchat_instance or not health_prober:
         raise HTTPException(status_code=503, detail="MedChat system not initialized")
-    
-    health = medchat_instance.health_check()
-    status = "healthy" if all(health.values()) else "degraded"
-    return HealthResponse(status=status, components=health)
+
+    snapshot = health_prober.snapshot()
+    if snapshot is None:
+        return HealthResponse(status="starting", components={})
+
+    components = snapshot["components"]
+    if health_prober.is_stale(snapshot):
+        status = "stale"
+    else:
+        status = "healthy" if all(components.values()) else "degraded"
+    return HealthResponse(
+        status=status,
+        components=components,
+        errors=snapshot["errors"],
+        checked_at=snapshot["checked_at"],
+        age_seconds=snapshot["age_seconds"],
+    )
+
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe based on the cached health snapshot; never calls dependencies."""
+    if not medchat_instance or not health_prober:
+        return ORJSONResponse(status_code=503, content={"status": "not_ready", "reason": "not initialized"})
+
+    snapshot = health_prober.snapshot()
+    if health_prober.is_stale(snapshot):
+        return ORJSONResponse(status_code=503, content={"status": "not_ready", "reason": "health snapshot missing or stale"})
+
+    failing = [name for name in READINESS_COMPONENTS if not snapshot["components"].get(name, False)]
+    if failing:
+        return ORJSONResponse(status_code=503, content={"status": "not_ready", "failing": failing})
+
+    return {"status": "ready", "age_seconds": snapshot["age_seconds"]}
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
@@ -122,39 +302,117 @@ async def chat(request: ChatRequest):
     
     try:
         result = medchat_instance.process_query(request.query, session_id=session_id)
-        
-        # Transform internal result to API response
-        retrieved_docs = []
-        if "retrieved_documents" in result:
-            for doc in result["retrieved_documents"]:
-                retrieved_docs.append(SourceDocument(
-                    content=doc.get("content", ""),
-                    metadata=doc.get("metadata", {}),
-                    score=doc.get("score", 0.0)
-                ))
-        
-        search_results = []
-        if "search_results" in result:
-            for res in result["search_results"]:
-                search_results.append(SearchResult(
-                    title=res.get("title", ""),
-                    link=res.get("link", ""),
-                    snippet=res.get("snippet", "")
-                ))
-
-        return ChatResponse(
-            answer=result.get("answer", ""),
-            session_id=session_id,
-            agent_type=result.get("agent_type", "unknown"),
-            retrieved_documents=retrieved_docs,
-            search_results=search_results,
-            thinking_time=result.get("thinking_time")
-        )
+        return _build_chat_response(result, session_id, detail=request.detail)
 
     except Exception as e:
         logger.error(f"Error processing chat request: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    Process a batch of independent questions.
+
+    Results are streamed as NDJSON, one line per item in completion order.
+    Each line carries the item's `index` and `status`; failed items report
+    `error` without failing the rest of the batch.
+    """
+    if not medchat_instance:
+        raise HTTPException(status_code=503, detail="MedChat system not initialized")
+
+    def ndjson_lines():
+        for item in medchat_instance.process_batch(request.queries, max_concurrency=request.max_concurrency):
+            if item["status"] == "ok":
+                line = _build_chat_response(item, session_id="", detail=request.detail).model_dump(exclude={"session_id"})
+                line.update({"index": item["index"], "status": "ok", "query": item["question"]})
+            else:
+                line = {"index": item["index"], "status": "error", "query": item["question"], "error": item["error"]}
+            yield orjson.dumps(line, default=str) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Process a chat request, streaming the answer as Server-Sent Events.
+
+    Events, in order: `sources` (the numbered sources the answer may cite),
+    `header` (reports only), `token` text chunks interleaved with `citation`
+    events when a source is first cited, `footer` (reports only), and `done`
+    with the full ChatResponse. A failure mid-stream is sent as an `error`
+    event.
+
+    Document sources are sent right after retrieval. Before the first token,
+    RAG and report answers still wait for the non-streamed RAG answer and,
+    when retrieval is not sufficient, for web search (up to
+    SEARCH_FALLBACK_TIMEOUT); merged web sources arrive in a second `sources`
+    event with the document ids unchanged.
+    """
+    if not medchat_instance:
+        raise HTTPException(status_code=503, detail="MedChat system not initialized")
+
+    session_id = request.session_id or str(uuid.uuid4())
+
+    def sse_events():
+        try:
+            for event in medchat_instance.stream_chat(request.query, session_id=session_id):
+                event_type = event.pop("type")
+                if event_type == "done":
+                    event = _build_chat_response(event, session_id, detail=request.detail).model_dump()
+                yield b"event: " + event_type.encode() + b"\ndata: " + orjson.dumps(event, default=str) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming chat request: {e}")
+            yield b"event: error\ndata: " + orjson.dumps({"detail": str(e)}) + b"\n\n"
+
+    return StreamingResponse(
+        sse_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/documents/{point_id}", response_model=DocumentResponse)
+async def get_document(point_id: str):
+    """Fetch a retrieved chunk by its point ID (for clients using detail=citations)."""
+    if not medchat_instance:
+        raise HTTPException(status_code=503, detail="MedChat system not initialized")
+
+    if not point_id.isdigit():
+        try:
+            uuid.UUID(point_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="point_id must be an unsigned integer or a UUID")
+
+    try:
+        doc = medchat_instance.get_document(point_id)
+    except Exception as e:
+        logger.error(f"Error fetching document {point_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return DocumentResponse(point_id=point_id, content=doc.page_content, metadata=doc.metadata)
+
+@app.get("/images/{digest}")
+async def get_image(digest: str):
+    """
+    Serve an OCR image referenced in chunk text as image://<digest>.
+
+    Images are content-addressed, so responses are cached as immutable.
+    """
+    if not IMAGE_DIGEST_PATTERN.match(digest):
+        raise HTTPException(status_code=400, detail="digest must be a lowercase SHA-256 hex string")
+
+    path = os.path.join(IMAGE_STORE_DIR, digest[:2], digest[2:4], digest)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return FileResponse(
+        path,
+        media_type=_sniff_image_type(path),
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{digest}"'},
+    )
+
 @app.delete("/history/{session_id}")
 async def clear_history(session_id: str):
     """Clear conversation history for a session."""
@@ -31,14 +31,63 @@ MEDICAL_COLLECTION_NAME = "MedChat-RAG"
 CHUNK_SIZE = 512
 CHUNK_OVERLAP = 50
 
+# Bulk Ingestion Configuration
+INGEST_BATCH_SIZE = 128       # Chunks per embedding call and upload batch
+INGEST_WORKERS = 4            # Batches embedded and uploaded concurrently
+HNSW_M = 16                   # HNSW graph degree built after a bulk load
+# Embeddings of ingested chunks, reused when a collection is rebuilt or migrated
+EMBEDDING_CACHE_DIR = os.getenv("MEDCHAT_EMBEDDING_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "embedding_cache"))
+
+# Image Store Configuration
+# Directory of the content-addressed image store written during OCR ingestion (<dir>/ab/cd/<sha256>).
+# backend/data/images is also the ingestion side's default (image_store.py); mount it as a volume in Docker
+IMAGE_STORE_DIR = os.getenv("MEDCHAT_IMAGE_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "images"))
+
 # Agent Configuration
 MAX_AGENT_ITERATIONS = 10
 AGENT_TIMEOUT = 300  # seconds
 
+# Memory Configuration
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "supabase")  # "supabase" or "sqlite"
+SQLITE_MEMORY_PATH = os.getenv("SQLITE_MEMORY_PATH", "data/medchat_memory.db")
+
+# Conversation Compaction Configuration
+COMPACTION_INTERVAL_TURNS = 6   # Fold older turns into the session summary every N turns
+COMPACTION_KEEP_RECENT = 4      # Most recent messages kept verbatim in the context
+MAX_CONTEXT_TOKENS = 1000       # Token cap for the assembled conversation context
+
 # RAG Configuration
 TOP_K_RETRIEVAL = 5
 SIMILARITY_THRESHOLD = 0.5
 
+# Sufficiency Gate Configuration (retrieval scores decide whether web search is needed)
+SUFFICIENCY_MIN_TOP_SCORE = 0.55    # top cosine similarity below which web search is always used
+SUFFICIENCY_GOOD_TOP_SCORE = 0.80   # top cosine similarity treated as a confident match
+SUFFICIENT_CONFIDENCE = 0.70        # gate confidence at or above which answers use the knowledge base only
+INSUFFICIENT_CONFIDENCE = 0.40      # gate confidence below which answers wait for web search
+SEARCH_HEDGE_DEADLINE = 4.0         # seconds a borderline query waits for its parallel web search
+SEARCH_FALLBACK_TIMEOUT = 15.0      # seconds an insufficient query waits for web search
+
+# Search Cache Configuration
+SEARCH_CACHE_TTL = 3600          # seconds a grounded web answer is served from cache (0 disables)
+SEARCH_CACHE_STALE_TTL = 1800    # seconds after the TTL a stale answer is served while refreshed in the background
+SEARCH_CACHE_MAX_ENTRIES = 1024  # least recently used answers are evicted beyond this
+
+# Report Configuration
+REPORT_MODE = os.getenv("REPORT_MODE", "single")  # "single" or "parallel" (outline + concurrent sections)
+REPORT_MAX_CONCURRENCY = 4    # Sections generated at once in parallel mode
+REPORT_MAX_SECTIONS = 6       # Upper bound on sections planned by the outline
+
+# Batch Configuration
+BATCH_MAX_ITEMS = 500         # Maximum queries accepted by /chat/batch
+BATCH_MAX_CONCURRENCY = 8     # Upper bound on concurrently generated batch items
+BATCH_DEFAULT_CONCURRENCY = 4
+
+# Health Probe Configuration
+HEALTH_PROBE_INTERVAL = 30    # seconds between background health refreshes
+HEALTH_PROBE_TIMEOUT = 5      # seconds before a probe is marked unhealthy
+READINESS_COMPONENTS = ["qdrant"]  # components that must be healthy for /readyz
+
 # Validation
 def validate_config():
     """Validate that all required configuration values are set."""
@@ -0,0 +1,107 @@
+"""
+Bulk ingestion CLI for the MedChat-RAG Qdrant collection.
+
+Reads chunks from a JSONL file (one object per line with "file_id", "text" and an
+optional 1-based "page" within the split file), joins them with the splitting_books
+metadata.json and uploads them with QdrantPipeline.ingest. Chunk embeddings are
+cached in EMBEDDING_CACHE_DIR, so rebuilding or migrating a collection only embeds
+new chunks.
+
+Example:
+    python ingest.py chunks.jsonl --metadata ../Output_VN_Book_splitting/metadata.json
+"""
+
+import argparse
+import json
+import logging
+from typing import Dict, Iterator
+
+from langchain_core.documents import Document
+
+from src.data.embedding_cache import CachedEmbeddings
+from src.data.qdrant_pipeline import (
+    DEFAULT_EMBEDDING_MODEL,
+    CustomGeminiEmbeddings,
+    QdrantPipeline,
+    build_payload,
+)
+from config_template import (
+    QDRANT_URL,
+    QDRANT_API_KEY,
+    MEDICAL_COLLECTION_NAME,
+    EMBEDDING_DIMENSION,
+    LOG_LEVEL,
+    INGEST_BATCH_SIZE,
+    INGEST_WORKERS,
+    HNSW_M,
+    EMBEDDING_CACHE_DIR,
+)
+
+logging.basicConfig(
+    level=getattr(logging, LOG_LEVEL),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def load_metadata(path: str) -> Dict[str, Dict]:
+    """Load splitting_books metadata.json keyed by file_id."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return {entry["file_id"]: entry for entry in entries}
+
+
+def iter_chunks(path: str, metadata: Dict[str, Dict]) -> Iterator[Document]:
+    """Stream chunks from a JSONL file as Documents carrying the MedChat-RAG payload."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get("text", "")
+            if not text.strip():
+                continue
+            file_metadata = metadata.get(record.get("file_id"))
+            if file_metadata is None:
+                logger.warning(f"Line {line_number}: unknown file_id {record.get('file_id')!r}, skipped")
+                continue
+            payload = build_payload(text, file_metadata, record.get("page"))
+            yield Document(page_content=payload.pop("text"), metadata=payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-upload chunks into the MedChat-RAG Qdrant collection.")
+    parser.add_argument("chunks", help="JSONL file with file_id, text and optional page per line")
+    parser.add_argument("--metadata", required=True, help="splitting_books metadata.json")
+    parser.add_argument("--collection", default=MEDICAL_COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--cache-dir", default=EMBEDDING_CACHE_DIR, help="Embedding cache directory")
+    args = parser.parse_args()
+
+    embeddings = CachedEmbeddings(
+        CustomGeminiEmbeddings(model=DEFAULT_EMBEDDING_MODEL),
+        args.cache_dir,
+        dimension=EMBEDDING_DIMENSION,
+    )
+    pipeline = QdrantPipeline(
+        qdrant_url=QDRANT_URL,
+        qdrant_api_key=QDRANT_API_KEY,
+        collection_name=args.collection,
+        embedding_model=embeddings,
+        embedding_dimension=EMBEDDING_DIMENSION,
+    )
+    report = pipeline.ingest(
+        iter_chunks(args.chunks, load_metadata(args.metadata)),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        hnsw_m=HNSW_M,
+    )
+    report["embedding_cache_hits"] = embeddings.hits
+    report["embedding_cache_misses"] = embeddings.misses
+    embeddings.close()
+    logger.info(f"Ingestion report: {json.dumps(report)}")
+
+
+if __name__ == "__main__":
+    main()
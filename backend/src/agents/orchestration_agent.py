@@ -7,7 +7,8 @@ different specialized agents (RAG, Search, Report) based on user queries.
 
 import logging
 import json
-from typing import Dict, Optional, List
+import re
+from typing import Dict, Optional, List, Tuple, Union
 from enum import Enum
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
@@ -63,6 +64,132 @@ class SufficiencyCheck(BaseModel):
     )
 
 
+class SufficiencyDecision(str, Enum):
+    """Outcome of the score-based sufficiency gate."""
+
+    SUFFICIENT = "sufficient"      # Answer from the knowledge base only
+    BORDERLINE = "borderline"      # Search in parallel, merge only if it arrives in time
+    INSUFFICIENT = "insufficient"  # Wait for web search
+
+
+class RetrievalSufficiency(BaseModel):
+    """Model for the score-based sufficiency gate output."""
+
+    decision: SufficiencyDecision
+    is_sufficient: bool
+    confidence_score: float = Field(description="Combined confidence (0.0-1.0)")
+    top_score: float
+    score_gap: float = Field(description="Top score minus the mean of the other scores")
+    term_coverage: float = Field(description="Fraction of query terms found in the retrieved documents")
+    reasoning: str
+
+
+# Words ignored when measuring query term coverage (English and Vietnamese)
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from how in is it of on or should the to what when where
+which who why with about tell me explain describe give list
+là của và có các những gì nào không được cho trong với như thế nào bị khi
+""".split())
+
+
+class RetrievalSufficiencyGate:
+    """
+    Decides from retrieval scores alone whether the knowledge base can answer a query.
+
+    Three cheap signals are combined into a confidence score: the top
+    similarity (scaled between `min_top_score` and `good_top_score`), the gap
+    between the top score and the rest (a clear best match), and the fraction
+    of query terms that appear in the retrieved documents. No LLM call is made.
+    """
+
+    def __init__(
+        self,
+        min_top_score: float = 0.55,
+        good_top_score: float = 0.80,
+        sufficient_confidence: float = 0.70,
+        insufficient_confidence: float = 0.40,
+        reference_gap: float = 0.10,
+    ):
+        """
+        Initialize the Retrieval Sufficiency Gate.
+
+        Args:
+            min_top_score: Top similarity below which retrieval is always insufficient
+            good_top_score: Top similarity that counts as a full-confidence match
+            sufficient_confidence: Confidence at or above which retrieval is sufficient
+            insufficient_confidence: Confidence below which retrieval is insufficient
+            reference_gap: Score gap that counts as a clear best match
+        """
+        self.min_top_score = min_top_score
+        self.good_top_score = good_top_score
+        self.sufficient_confidence = sufficient_confidence
+        self.insufficient_confidence = insufficient_confidence
+        self.reference_gap = reference_gap
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        return {t for t in re.findall(r"\w+", text.casefold()) if len(t) > 1 and t not in STOPWORDS}
+
+    def assess(self, query: str, retrieved_docs: List[Tuple[object, float]]) -> RetrievalSufficiency:
+        """
+        Assess retrieved documents for a query.
+
+        Args:
+            query: Refined user query
+            retrieved_docs: (Document, similarity_score) tuples
+
+        Returns:
+            RetrievalSufficiency with the decision and the signals behind it
+        """
+        if not retrieved_docs:
+            return RetrievalSufficiency(
+                decision=SufficiencyDecision.INSUFFICIENT, is_sufficient=False, confidence_score=0.0,
+                top_score=0.0, score_gap=0.0, term_coverage=0.0, reasoning="No documents retrieved",
+            )
+
+        scores = sorted((score for _, score in retrieved_docs), reverse=True)
+        top_score = scores[0]
+        rest = scores[1:]
+        score_gap = top_score - sum(rest) / len(rest) if rest else 0.0
+
+        query_terms = self._terms(query)
+        doc_terms = set()
+        for doc, _ in retrieved_docs:
+            doc_terms |= self._terms(doc.page_content)
+        term_coverage = len(query_terms & doc_terms) / len(query_terms) if query_terms else 1.0
+
+        def scaled(value: float) -> float:
+            return min(max(value, 0.0), 1.0)
+
+        confidence = (
+            0.5 * scaled((top_score - self.min_top_score) / (self.good_top_score - self.min_top_score))
+            + 0.2 * scaled(score_gap / self.reference_gap)
+            + 0.3 * term_coverage
+        )
+
+        if top_score < self.min_top_score or confidence < self.insufficient_confidence:
+            decision = SufficiencyDecision.INSUFFICIENT
+        elif confidence >= self.sufficient_confidence:
+            decision = SufficiencyDecision.SUFFICIENT
+        else:
+            decision = SufficiencyDecision.BORDERLINE
+
+        result = RetrievalSufficiency(
+            decision=decision,
+            is_sufficient=decision == SufficiencyDecision.SUFFICIENT,
+            confidence_score=round(confidence, 3),
+            top_score=round(top_score, 4),
+            score_gap=round(score_gap, 4),
+            term_coverage=round(term_coverage, 3),
+            reasoning=(
+                f"top score {top_score:.3f}, gap {score_gap:.3f}, "
+                f"query term coverage {term_coverage:.0%} -> confidence {confidence:.2f}"
+            ),
+        )
+        logger.info(f"Sufficiency gate: {decision.value} ({result.reasoning})")
+        return result
+
+
 class OrchestrationAgent:
     """
     Orchestration Agent that routes queries to appropriate specialized agents.
@@ -71,21 +198,24 @@ class OrchestrationAgent:
     def __init__(
         self,
         google_api_key: str,
-        supabase_memory = None,
+        memory = None,
         model_name: str = "gemini-2.0-flash",
         temperature: float = 0.5,
+        compactor = None,
     ):
         """
         Initialize the Orchestration Agent.
 
         Args:
             google_api_key: Google API key for Gemini
-            supabase_memory: SupabaseMemory instance
+            memory: MemoryBackend instance (Supabase or SQLite)
             model_name: Name of the Gemini model to use
             temperature: Temperature for model generation
+            compactor: Optional ConversationCompactor for bounded history context
         """
         self.google_api_key = google_api_key
-        self.supabase_memory = supabase_memory
+        self.memory = memory
+        self.compactor = compactor
         self.model_name = model_name
         self.temperature = temperature
 
@@ -181,7 +311,7 @@ Respond with a JSON object containing:
             | self.sufficiency_parser
         )
 
-        # Conversation history fallback (if supabase not available)
+        # Conversation history fallback (if no memory backend is available)
         self.conversation_history: List[Dict] = []
 
         logger.info(f"Orchestration Agent initialized with model: {model_name}")
@@ -220,6 +350,63 @@ Respond with a JSON object containing:
                 direct_response=None,
             )
 
+    def route_batch(
+        self,
+        queries: List[str],
+        max_concurrency: int = 4,
+    ) -> List[Union[Dict, Exception]]:
+        """
+        Route several independent queries with one batched chain call.
+
+        Batch routing does not touch conversation history.
+
+        Args:
+            queries: User queries
+            max_concurrency: Maximum concurrent routing requests
+
+        Returns:
+            Routing information per query, or the exception raised for that query
+        """
+        logger.info(f"Routing batch of {len(queries)} queries")
+
+        outputs = self.chain.batch(
+            [{"query": query} for query in queries],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+
+        routing = []
+        for query, output in zip(queries, outputs):
+            if isinstance(output, Exception):
+                logger.error(f"Error in batch routing: {output}")
+                # Default to RAG agent on error, as in decide_agent
+                output = {
+                    "agent_type": AgentType.RAG,
+                    "reasoning": "Error in routing, defaulting to RAG agent",
+                    "requires_report": False,
+                    "query_refinement": query,
+                    "is_medical": True,
+                    "direct_response": None,
+                }
+            try:
+                routing.append(self._decision_to_dict(AgentDecision(**output)))
+            except Exception as e:
+                routing.append(e)
+
+        return routing
+
+    @staticmethod
+    def _decision_to_dict(decision: AgentDecision) -> Dict:
+        """Convert an AgentDecision into the routing information dictionary."""
+        return {
+            "agent_type": decision.agent_type.value,
+            "reasoning": decision.reasoning,
+            "requires_report": decision.requires_report,
+            "query_refinement": decision.query_refinement,
+            "is_medical": decision.is_medical,
+            "direct_response": decision.direct_response,
+        }
+
     def check_sufficiency(
         self, 
         query: str, 
@@ -278,14 +465,14 @@ Respond with a JSON object containing:
             role: "user" or "assistant"
             content: Message content
             agent_type: Which agent handled this (if assistant)
-            session_id: Session ID for Supabase
+            session_id: Session ID for the memory backend
             thinking_time: Time taken to process the query
         """
-        # Save to Supabase if available and session_id provided
-        if self.supabase_memory and session_id:
+        # Save to the memory backend if available and session_id provided
+        if self.memory and session_id:
             try:
                 metadata = {"agent_type": agent_type} if agent_type else {}
-                self.supabase_memory.add_message(
+                self.memory.add_message(
                     session_id=session_id,
                     role=role,
                     content=content,
@@ -293,7 +480,11 @@ Respond with a JSON object containing:
                     thinking_time=thinking_time
                 )
             except Exception as e:
-                logger.error(f"Failed to save to Supabase: {e}")
+                logger.error(f"Failed to save to memory backend: {e}")
+
+            # A turn ends with the assistant reply; compaction runs in the background
+            if self.compactor and role == "assistant":
+                self.compactor.record_turn(session_id)
                 
         # Fallback to in-memory
         self.conversation_history.append({
@@ -307,22 +498,26 @@ Respond with a JSON object containing:
         Get recent conversation history as context.
 
         Args:
-            session_id: Session ID for Supabase
-            last_n: Number of recent messages to include
+            session_id: Session ID for the memory backend
+            last_n: Number of recent messages to include when history is not compacted
 
         Returns:
             Formatted conversation context
         """
         recent = []
-        
-        if self.supabase_memory and session_id:
+
+        if self.compactor and self.memory and session_id:
+            try:
+                return self.compactor.build_context(session_id)
+            except Exception as e:
+                logger.error(f"Failed to build compacted context: {e}")
+                recent = self.conversation_history[-last_n:]
+        elif self.memory and session_id:
             try:
-                history = self.supabase_memory.get_history(session_id, limit=last_n)
-                # Convert Supabase format to local format if needed, or just use it
-                # Supabase returns list of dicts with 'role', 'content'
-                recent = history
+                # Memory backends return list of dicts with 'role', 'content'
+                recent = self.memory.get_history(session_id, limit=last_n)
             except Exception as e:
-                logger.error(f"Failed to fetch from Supabase: {e}")
+                logger.error(f"Failed to fetch from memory backend: {e}")
                 recent = self.conversation_history[-last_n:]
         else:
             recent = self.conversation_history[-last_n:]
@@ -338,11 +533,11 @@ Respond with a JSON object containing:
 
     def clear_history(self, session_id: Optional[str] = None) -> None:
         """Clear conversation history."""
-        if self.supabase_memory and session_id:
+        if self.memory and session_id:
             try:
-                self.supabase_memory.clear_history(session_id)
+                self.memory.clear_history(session_id)
             except Exception as e:
-                logger.error(f"Failed to clear Supabase history: {e}")
+                logger.error(f"Failed to clear memory backend history: {e}")
                 
         self.conversation_history = []
         logger.info("Conversation history cleared")
@@ -365,15 +560,9 @@ Respond with a JSON object containing:
             # Add to history
             self.add_to_history("user", query, session_id=session_id)
 
-            return {
-                "agent_type": decision.agent_type.value,
-                "reasoning": decision.reasoning,
-                "requires_report": decision.requires_report,
-                "query_refinement": decision.query_refinement,
-                "is_medical": decision.is_medical,
-                "direct_response": decision.direct_response,
-                "conversation_context": self.get_conversation_context(session_id=session_id),
-            }
+            routing_info = self._decision_to_dict(decision)
+            routing_info["conversation_context"] = self.get_conversation_context(session_id=session_id)
+            return routing_info
 
         except Exception as e:
             logger.error(f"Error processing query: {e}")
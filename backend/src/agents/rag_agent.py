@@ -104,6 +104,33 @@ indicate that and provide general medical knowledge if appropriate. Always cite
             logger.error(f"Error retrieving documents: {e}")
             raise
 
+    def retrieve_documents_batch(
+        self,
+        queries: List[str],
+        k: Optional[int] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Retrieve documents for several queries with one embedding call and one batch search.
+
+        Args:
+            queries: User queries
+            k: Number of documents to retrieve per query (uses default if not specified)
+
+        Returns:
+            One list of (Document, similarity_score) tuples per query
+        """
+        k = k or self.top_k
+
+        try:
+            logger.info(f"Retrieving {k} documents for {len(queries)} queries")
+            results = self.qdrant_pipeline.search_batch(queries=queries, k=k)
+            logger.info(f"Retrieved documents for {len(results)} queries")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error retrieving documents in batch: {e}")
+            raise
+
     def format_context(
         self,
         retrieved_docs: List[Tuple[Document, float]],
@@ -144,6 +171,7 @@ indicate that and provide general medical knowledge if appropriate. Always cite
         self,
         question: str,
         k: Optional[int] = None,
+        retrieved_docs: Optional[List[Tuple[Document, float]]] = None,
     ) -> dict:
         """
         Answer a question using RAG.
@@ -151,6 +179,7 @@ indicate that and provide general medical knowledge if appropriate. Always cite
         Args:
             question: User question
             k: Number of documents to retrieve
+            retrieved_docs: Pre-fetched (Document, score) tuples; retrieval is skipped if given
 
         Returns:
             Dictionary with answer and retrieved documents
@@ -159,7 +188,8 @@ indicate that and provide general medical knowledge if appropriate. Always cite
             logger.info(f"Processing question: {question}")
 
             # Retrieve relevant documents
-            retrieved_docs = self.retrieve_documents(question, k)
+            if retrieved_docs is None:
+                retrieved_docs = self.retrieve_documents(question, k)
 
             # Format context
             context = self.format_context(retrieved_docs)
@@ -194,6 +224,7 @@ indicate that and provide general medical knowledge if appropriate. Always cite
         self,
         question: str,
         k: Optional[int] = None,
+        retrieved_docs: Optional[List[Tuple[Document, float]]] = None,
     ):
         """
         Stream answer for a question (for real-time UI updates).
@@ -201,6 +232,7 @@ indicate that and provide general medical knowledge if appropriate. Always cite
         Args:
             question: User question
             k: Number of documents to retrieve
+            retrieved_docs: Pre-fetched (Document, score) tuples; retrieval is skipped if given
 
         Yields:
             Chunks of the answer
@@ -209,7 +241,8 @@ indicate that and provide general medical knowledge if appropriate. Always cite
             logger.info(f"Streaming answer for: {question}")
 
             # Retrieve relevant documents
-            retrieved_docs = self.retrieve_documents(question, k)
+            if retrieved_docs is None:
+                retrieved_docs = self.retrieve_documents(question, k)
 
             # Format context
             context = self.format_context(retrieved_docs)
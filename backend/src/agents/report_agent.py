@@ -6,14 +6,30 @@ well-formatted medical reports based on information from other agents.
 """
 
 import logging
-from typing import Dict, List, Optional
+import re
+from typing import Dict, Generator, List, Optional
 from datetime import datetime
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 
 logger = logging.getLogger(__name__)
 
+REPORT_MODES = ("single", "parallel")
+
+REPORT_FOOTER = """
+================================================================================
+This report was generated by MedChat, an AI-powered medical information system.
+It is intended for educational purposes for medical students.
+Always consult with qualified medical professionals for clinical decisions.
+================================================================================
+"""
+
+# Citation markers as requested by the prompts: [[n]](#refn)
+CITATION_PATTERN = re.compile(r"\[\[(\d+)\]\]\(#ref\d+\)")
+# A References heading the model may add despite instructions (sections get one shared list)
+REFERENCES_HEADING_PATTERN = re.compile(r"^\s*(#+\s*|\*\*)?references\b.*$", re.IGNORECASE | re.MULTILINE)
+
 
 class ReportAgent:
     """
@@ -25,6 +41,9 @@ class ReportAgent:
         google_api_key: str,
         model_name: str = "gemini-2.0-flash",
         temperature: float = 0.5,
+        report_mode: str = "single",
+        max_concurrency: int = 4,
+        max_sections: int = 6,
     ):
         """
         Initialize the Report Agent.
@@ -32,11 +51,20 @@ class ReportAgent:
         Args:
             google_api_key: Google API key for Gemini
             model_name: Name of the Gemini model to use
+            report_mode: "single" (one long generation) or "parallel" (outline, then sections concurrently)
+            max_concurrency: Maximum sections generated at once in parallel mode
+            max_sections: Maximum sections the outline may plan
 
         """
+        if report_mode not in REPORT_MODES:
+            raise ValueError(f"report_mode must be one of {', '.join(REPORT_MODES)}")
+
         self.google_api_key = google_api_key
         self.model_name = model_name
         self.temperature = temperature
+        self.report_mode = report_mode
+        self.max_concurrency = max_concurrency
+        self.max_sections = max_sections
 
         # Initialize the LLM
         self.llm = ChatGoogleGenerativeAI(
@@ -115,6 +143,47 @@ Sources and References:
 Please generate the short answer following these guidelines."""
         )
 
+        # Define the outline prompt (parallel mode)
+        self.outline_prompt_template = ChatPromptTemplate.from_template(
+            """You are planning a medical report for medical students.
+
+Topic: {topic}
+
+Available sources (numbered, with excerpts):
+{sources}
+
+Plan between 2 and {max_sections} sections that together answer the topic. The last section must be a summary or conclusion.
+For each section, list the numbers of the sources relevant to it (use only the numbers above).
+
+Respond with a JSON object containing:
+- sections: list of objects with
+  - title (string, in the same language as the topic)
+  - focus (string, one sentence on what the section covers)
+  - sources (list of integers)"""
+        )
+
+        # Define the section prompt (parallel mode)
+        self.section_prompt_template = ChatPromptTemplate.from_template(
+            """You are a medical report writer. Write ONE section of a larger report.
+
+Report topic: {topic}
+Section: {title}
+Section focus: {focus}
+
+Information for this section:
+{information}
+
+Sources for this section:
+{sources}
+
+**Instructions:**
+* Write only the body of this section: no section heading, no introduction to the whole report, no References list.
+* Use bullet points (*) for lists and **bold** for key terms. Write clearly and professionally.
+* **DO NOT diagnose the patient.** Describe general procedures and information instead.
+* Cite every key claim with the source numbers above in this format: sentence <sup>[[1]](#ref1)</sup>
+* Write in the same language as the report topic."""
+        )
+
         # Create the report chain
         self.chain = (
             self.prompt_template
@@ -129,7 +198,19 @@ Please generate the short answer following these guidelines."""
             | StrOutputParser()
         )
 
-        logger.info(f"Report Agent initialized with model: {model_name}")
+        # Create the parallel report chains
+        self.outline_chain = (
+            self.outline_prompt_template
+            | self.llm
+            | JsonOutputParser()
+        )
+        self.section_chain = (
+            self.section_prompt_template
+            | self.llm
+            | StrOutputParser()
+        )
+
+        logger.info(f"Report Agent initialized with model: {model_name} (report mode: {report_mode})")
 
     def generate_report(
         self,
@@ -152,7 +233,7 @@ Please generate the short answer following these guidelines."""
             logger.info(f"Generating report for topic: {topic}")
 
             # Format sources
-            sources_text = "\n".join(sources) if sources else "No sources provided"
+            sources_text = self._format_sources(sources)
 
             # Generate report
             report = self.chain.invoke({
@@ -189,7 +270,7 @@ Please generate the short answer following these guidelines."""
             logger.info(f"Streaming report for topic: {topic}")
 
             # Format sources
-            sources_text = "\n".join(sources) if sources else "No sources provided"
+            sources_text = self._format_sources(sources)
 
             # Stream the report
             for chunk in self.chain.stream({
@@ -203,6 +284,95 @@ Please generate the short answer following these guidelines."""
             logger.error(f"Error streaming report: {e}")
             raise
 
+    @staticmethod
+    def _compile_information(
+        rag_results: Optional[Dict] = None,
+        search_results: Optional[Dict] = None,
+    ) -> str:
+        """Combine the knowledge base answer and the search answer into one information block."""
+        information_parts = []
+
+        if rag_results:
+            information_parts.append(
+                f"Knowledge Base Information:\n{rag_results.get('answer', '')}"
+            )
+
+        if search_results:
+            information_parts.append(
+                f"Recent Research and News:\n{search_results.get('answer', '')}"
+            )
+
+        return "\n\n".join(information_parts)
+
+    @staticmethod
+    def compile_sources(
+        rag_results: Optional[Dict] = None,
+        search_results: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """
+        Compile unique sources with rich citations.
+
+        Args:
+            rag_results: Results from RAG agent
+            search_results: Results from Search agent
+
+        Returns:
+            Sources in citation order, each with "citation", "content" (retrieved
+            text, if any) and "kind" ("document" or "web")
+        """
+        sources: List[Dict] = []
+        by_citation: Dict[str, Dict] = {}
+
+        def add(citation: str, content: str, kind: str):
+            if citation in by_citation:
+                # Several chunks can share one citation (same book and page)
+                if content:
+                    entry = by_citation[citation]
+                    entry["content"] = f"{entry['content']}\n{content}".strip()
+                return
+            entry = {"citation": citation, "content": content, "kind": kind}
+            by_citation[citation] = entry
+            sources.append(entry)
+
+        if rag_results:
+            for doc in rag_results.get("retrieved_documents", []):
+                meta = doc.get("metadata", {})
+
+                # Try to construct a rich citation
+                book = meta.get("book_name")
+                author = meta.get("author")
+                year = meta.get("publish_year")
+                page = meta.get("page_number")
+
+                if book:
+                    citation = f"{book}"
+                    if year:
+                        citation += f" ({year})"
+                    if author:
+                        citation += f", by {author}"
+                    if page:
+                        citation += f", p. {page}"
+                else:
+                    # Fallback to source field or unknown
+                    citation = meta.get("source", "Unknown Source")
+
+                add(citation, doc.get("content", ""), "document")
+
+        if search_results:
+            for result in search_results.get("search_results", []):
+                title = result.get("title", "Unknown Title")
+                link = result.get("link", "Unknown Link")
+                add(f"{title} - {link}", result.get("snippet", ""), "web")
+
+        return sources
+
+    @staticmethod
+    def _format_sources(sources: Optional[List[str]]) -> str:
+        """Numbered source list for the prompts; numbers match the streamed source ids."""
+        if not sources:
+            return "No sources provided"
+        return "\n".join(f"[{i}] {source}" for i, source in enumerate(sources, 1))
+
     def generate_short_answer(
         self,
         query: str,
@@ -223,57 +393,9 @@ Please generate the short answer following these guidelines."""
         try:
             logger.info(f"Generating short answer for query: {query}")
 
-            # Compile information from different sources
-            information_parts = []
-
-            if rag_results:
-                information_parts.append(
-                    f"Knowledge Base Information:\n{rag_results.get('answer', '')}"
-                )
-
-            if search_results:
-                information_parts.append(
-                    f"Recent Research and News:\n{search_results.get('answer', '')}"
-                )
-
-            information = "\n\n".join(information_parts)
-
-            # Compile sources with rich metadata
-            sources = []
-            if rag_results:
-                for doc in rag_results.get("retrieved_documents", []):
-                    meta = doc.get("metadata", {})
-                    
-                    # Try to construct a rich citation
-                    book = meta.get("book_name")
-                    author = meta.get("author")
-                    year = meta.get("publish_year")
-                    page = meta.get("page_number")
-                    
-                    if book:
-                        citation = f"{book}"
-                        if year:
-                            citation += f" ({year})"
-                        if author:
-                            citation += f", by {author}"
-                        if page:
-                            citation += f", p. {page}"
-                    else:
-                        # Fallback to source field or unknown
-                        citation = meta.get("source", "Unknown Source")
-                        
-                    if citation not in sources:
-                        sources.append(citation)
-
-            if search_results:
-                for result in search_results.get("search_results", []):
-                    title = result.get("title", "Unknown Title")
-                    link = result.get("link", "Unknown Link")
-                    citation = f"{title} - {link}"
-                    if citation not in sources:
-                        sources.append(citation)
-
-            sources_text = "\n".join(sources) if sources else "No sources provided"
+            information = self._compile_information(rag_results, search_results)
+            sources = [s["citation"] for s in self.compile_sources(rag_results, search_results)]
+            sources_text = self._format_sources(sources)
 
             # Generate short answer
             answer = self.short_answer_chain.invoke({
@@ -293,6 +415,7 @@ Please generate the short answer following these guidelines."""
         query: str,
         rag_results: Optional[Dict] = None,
         search_results: Optional[Dict] = None,
+        mode: Optional[str] = None,
     ) -> str:
         """
         Generate a summary report combining RAG and search results.
@@ -301,68 +424,23 @@ Please generate the short answer following these guidelines."""
             query: Original user query
             rag_results: Results from RAG agent
             search_results: Results from Search agent
+            mode: "single" or "parallel"; defaults to the agent's report mode
 
         Returns:
             Generated summary report
         """
         try:
-            logger.info(f"Generating summary report for query: {query}")
-
-            # Compile information from different sources
-            information_parts = []
-
-            if rag_results:
-                information_parts.append(
-                    f"Knowledge Base Information:\n{rag_results.get('answer', '')}"
-                )
-
-            if search_results:
-                information_parts.append(
-                    f"Recent Research and News:\n{search_results.get('answer', '')}"
-                )
-
-            information = "\n\n".join(information_parts)
-
-            # Compile sources with rich metadata
-            sources = []
-            if rag_results:
-                for doc in rag_results.get("retrieved_documents", []):
-                    meta = doc.get("metadata", {})
-                    
-                    # Try to construct a rich citation
-                    book = meta.get("book_name")
-                    author = meta.get("author")
-                    year = meta.get("publish_year")
-                    page = meta.get("page_number")
-                    
-                    if book:
-                        citation = f"{book}"
-                        if year:
-                            citation += f" ({year})"
-                        if author:
-                            citation += f", by {author}"
-                        if page:
-                            citation += f", p. {page}"
-                    else:
-                        # Fallback to source field or unknown
-                        citation = meta.get("source", "Unknown Source")
-                        
-                    if citation not in sources:
-                        sources.append(citation)
-
-            if search_results:
-                for result in search_results.get("search_results", []):
-                    title = result.get("title", "Unknown Title")
-                    link = result.get("link", "Unknown Link")
-                    citation = f"{title} - {link}"
-                    if citation not in sources:
-                        sources.append(citation)
+            mode = mode or self.report_mode
+            logger.info(f"Generating summary report for query: {query} (mode: {mode})")
+
+            if mode == "parallel":
+                return self.generate_parallel_report(query, rag_results, search_results)
 
             # Generate report
             report = self.generate_report(
                 topic=query,
-                information=information,
-                sources=sources,
+                information=self._compile_information(rag_results, search_results),
+                sources=[s["citation"] for s in self.compile_sources(rag_results, search_results)],
             )
 
             return report
@@ -371,6 +449,348 @@ Please generate the short answer following these guidelines."""
             logger.error(f"Error generating summary report: {e}")
             raise
 
+    def plan_sections(self, topic: str, sources: List[Dict]) -> List[Dict]:
+        """
+        Plan report sections with one fast outline call.
+
+        Args:
+            topic: Report topic
+            sources: Compiled sources (see compile_sources)
+
+        Returns:
+            Sections with "title", "focus" and "sources" (1-based source numbers)
+        """
+        listing = "\n".join(
+            f"[{i}] {s['citation']}: {s['content'][:300].strip() or '(web result)'}"
+            for i, s in enumerate(sources, 1)
+        )
+        outline = self.outline_chain.invoke({
+            "topic": topic,
+            "sources": listing or "No sources provided",
+            "max_sections": self.max_sections,
+        })
+
+        sections = []
+        for item in (outline or {}).get("sections", [])[:self.max_sections]:
+            title = str(item.get("title", "")).strip()
+            if not title:
+                continue
+            numbers = []
+            for n in item.get("sources") or []:
+                try:
+                    n = int(n)
+                except (TypeError, ValueError):
+                    continue
+                if 1 <= n <= len(sources) and n not in numbers:
+                    numbers.append(n)
+            sections.append({
+                "title": title,
+                "focus": str(item.get("focus", "")).strip(),
+                # A section the outline left without sources may use all of them
+                "sources": numbers or list(range(1, len(sources) + 1)),
+            })
+        return sections
+
+    def _section_input(
+        self,
+        topic: str,
+        section: Dict,
+        sources: List[Dict],
+        search_answer: str,
+    ) -> Dict:
+        """Prompt input for one section, with its sources renumbered 1..n."""
+        local = [sources[n - 1] for n in section["sources"]]
+        excerpts = [
+            f"[{i}] {s['content']}" for i, s in enumerate(local, 1)
+            if s["kind"] == "document" and s["content"]
+        ]
+        if search_answer and any(s["kind"] == "web" for s in local):
+            excerpts.append(f"Recent Research and News:\n{search_answer}")
+        return {
+            "topic": topic,
+            "title": section["title"],
+            "focus": section["focus"],
+            "information": "\n\n".join(excerpts) or "No information provided",
+            "sources": "\n".join(f"[{i}] {s['citation']}" for i, s in enumerate(local, 1)),
+        }
+
+    @staticmethod
+    def _merge_section(section: Dict, body: str, global_numbers: Dict[int, int]) -> str:
+        """
+        Format one section body for the merged report.
+
+        Section-local citations are mapped back to the compiled sources and
+        renumbered globally in order of first citation; global_numbers
+        (compiled source number -> reference number) is updated in place.
+        """
+        # Drop any References list the model wrote for this section
+        heading = REFERENCES_HEADING_PATTERN.search(body)
+        if heading:
+            body = body[:heading.start()]
+
+        def renumber(match):
+            local = int(match.group(1))
+            if not 1 <= local <= len(section["sources"]):
+                return ""  # Citation to a source the section was not given
+            source = section["sources"][local - 1]
+            number = global_numbers.setdefault(source, len(global_numbers) + 1)
+            return f"[[{number}]](#ref{number})"
+
+        body = CITATION_PATTERN.sub(renumber, body)
+        body = re.sub(r"<sup>\s*</sup>", "", body)
+        return f"## {section['title']}\n\n{body.strip()}"
+
+    @staticmethod
+    def _references_section(global_numbers: Dict[int, int], sources: List[Dict]) -> str:
+        """References list for the cited sources, in reference-number order."""
+        references = [
+            f'<a id="ref{number}">{number}.</a> {sources[source - 1]["citation"]}'
+            for source, number in sorted(global_numbers.items(), key=lambda item: item[1])
+        ]
+        return "## References\n\n" + "\n\n".join(references) if references else ""
+
+    @classmethod
+    def merge_sections(cls, sections: List[Dict], bodies: List[str], sources: List[Dict]) -> str:
+        """
+        Deterministically merge section bodies into one report.
+
+        Each section cites its own 1..n source numbers; these are renumbered
+        globally in order of first citation and a single References list is
+        appended.
+
+        Args:
+            sections: Planned sections (with their 1-based global source numbers)
+            bodies: Generated body per section (None for a failed section)
+            sources: Compiled sources
+
+        Returns:
+            Merged report in Markdown
+        """
+        global_numbers: Dict[int, int] = {}  # compiled source number -> reference number
+        parts = [
+            cls._merge_section(section, body, global_numbers)
+            for section, body in zip(sections, bodies) if body
+        ]
+        references = cls._references_section(global_numbers, sources)
+        if references:
+            parts.append(references)
+        return "\n\n".join(parts)
+
+    def generate_parallel_report(
+        self,
+        query: str,
+        rag_results: Optional[Dict] = None,
+        search_results: Optional[Dict] = None,
+    ) -> str:
+        """
+        Generate a report as an outline plus concurrently written sections.
+
+        Falls back to the single-shot report when there is too little to split,
+        the outline fails, or every section fails.
+
+        Args:
+            query: Original user query
+            rag_results: Results from RAG agent
+            search_results: Results from Search agent
+
+        Returns:
+            Generated report
+        """
+        sources = self.compile_sources(rag_results, search_results)
+        if len(sources) < 2:
+            return self.generate_summary_report(query, rag_results, search_results, mode="single")
+
+        try:
+            sections = self.plan_sections(query, sources)
+        except Exception as e:
+            logger.warning(f"Report outline failed, using single-shot report: {e}")
+            sections = []
+        if not sections:
+            return self.generate_summary_report(query, rag_results, search_results, mode="single")
+
+        logger.info(f"Generating {len(sections)} report sections (max concurrency {self.max_concurrency})")
+        search_answer = (search_results or {}).get("answer", "")
+        bodies = self.section_chain.batch(
+            [self._section_input(query, section, sources, search_answer) for section in sections],
+            config={"max_concurrency": self.max_concurrency},
+            return_exceptions=True,
+        )
+
+        failed = [s["title"] for s, b in zip(sections, bodies) if isinstance(b, Exception)]
+        if failed:
+            logger.warning(f"Report sections failed and were left out: {failed}")
+        bodies = [None if isinstance(b, Exception) else b for b in bodies]
+        if not any(bodies):
+            return self.generate_summary_report(query, rag_results, search_results, mode="single")
+
+        return self.merge_sections(sections, bodies, sources)
+
+    @staticmethod
+    def sources_event(sources: List[Dict]) -> Dict:
+        """Leading stream event listing every source the answer may cite."""
+        return {
+            "type": "sources",
+            "sources": [
+                {"id": i, "citation": s["citation"], "kind": s["kind"]}
+                for i, s in enumerate(sources, 1)
+            ],
+        }
+
+    @staticmethod
+    def _stream_with_citations(chunks, sources: List[Dict]) -> Generator[Dict, None, None]:
+        """
+        Relay text chunks as token events, adding a citation event the first
+        time each source number appears in the text.
+        """
+        cited = set()
+        text = ""
+        for chunk in chunks:
+            yield {"type": "token", "text": chunk}
+            # Markers can be split across chunks, so scan the tail of the full text
+            scan_from = max(0, len(text) - 32)
+            text += chunk
+            for match in CITATION_PATTERN.finditer(text, scan_from):
+                number = int(match.group(1))
+                if number not in cited and 1 <= number <= len(sources):
+                    cited.add(number)
+                    yield {"type": "citation", "number": number, "source_id": number,
+                           "citation": sources[number - 1]["citation"]}
+
+    def stream_short_answer(
+        self,
+        query: str,
+        rag_results: Optional[Dict] = None,
+        search_results: Optional[Dict] = None,
+    ) -> Generator[Dict, None, None]:
+        """
+        Stream a short answer combining RAG and search results.
+
+        Args:
+            query: Original user query
+            rag_results: Results from RAG agent
+            search_results: Results from Search agent
+
+        Yields:
+            Events: "sources" first, then "token" chunks with a "citation"
+            event when a source is first cited
+        """
+        try:
+            logger.info(f"Streaming short answer for query: {query}")
+
+            sources = self.compile_sources(rag_results, search_results)
+            yield self.sources_event(sources)
+
+            chunks = self.short_answer_chain.stream({
+                "topic": query,
+                "information": self._compile_information(rag_results, search_results),
+                "sources": self._format_sources([s["citation"] for s in sources]),
+            })
+            yield from self._stream_with_citations(chunks, sources)
+
+        except Exception as e:
+            logger.error(f"Error streaming short answer: {e}")
+            raise
+
+    def stream_summary_report(
+        self,
+        query: str,
+        rag_results: Optional[Dict] = None,
+        search_results: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        include_metadata: bool = True,
+    ) -> Generator[Dict, None, None]:
+        """
+        Stream a summary report combining RAG and search results.
+
+        In parallel mode sections are still generated concurrently; each is
+        emitted, with globally renumbered citations, as soon as it and every
+        section before it are done.
+
+        Args:
+            query: Original user query
+            rag_results: Results from RAG agent
+            search_results: Results from Search agent
+            mode: "single" or "parallel"; defaults to the agent's report mode
+            include_metadata: Emit the report header and footer around the text
+
+        Yields:
+            Events: "sources", "header", "token" chunks interleaved with
+            "citation" events, and "footer"
+        """
+        try:
+            mode = mode or self.report_mode
+            logger.info(f"Streaming summary report for query: {query} (mode: {mode})")
+
+            sources = self.compile_sources(rag_results, search_results)
+            yield self.sources_event(sources)
+            if include_metadata:
+                yield {"type": "header", "text": self.report_header(query)}
+
+            sections = []
+            if mode == "parallel" and len(sources) >= 2:
+                try:
+                    sections = self.plan_sections(query, sources)
+                except Exception as e:
+                    logger.warning(f"Report outline failed, streaming single-shot report: {e}")
+
+            # Every section failing falls back to the single-shot report
+            if not sections or not (yield from self._stream_sections(query, sections, sources, search_results)):
+                chunks = self.chain.stream({
+                    "topic": query,
+                    "information": self._compile_information(rag_results, search_results),
+                    "sources": self._format_sources([s["citation"] for s in sources]),
+                })
+                yield from self._stream_with_citations(chunks, sources)
+
+            if include_metadata:
+                yield {"type": "footer", "text": REPORT_FOOTER}
+
+        except Exception as e:
+            logger.error(f"Error streaming summary report: {e}")
+            raise
+
+    def _stream_sections(
+        self,
+        query: str,
+        sections: List[Dict],
+        sources: List[Dict],
+        search_results: Optional[Dict] = None,
+    ) -> Generator[Dict, None, bool]:
+        """Generate sections concurrently and emit them in outline order. Returns whether any section was emitted."""
+        search_answer = (search_results or {}).get("answer", "")
+        inputs = [self._section_input(query, section, sources, search_answer) for section in sections]
+        global_numbers: Dict[int, int] = {}
+        done: Dict[int, object] = {}
+        next_index = 0
+        emitted = False
+
+        for index, body in self.section_chain.batch_as_completed(
+            inputs,
+            config={"max_concurrency": self.max_concurrency},
+            return_exceptions=True,
+        ):
+            done[index] = body
+            while next_index in done:
+                body = done.pop(next_index)
+                section = sections[next_index]
+                next_index += 1
+                if isinstance(body, Exception) or not body:
+                    logger.warning(f"Report section failed and was left out: {section['title']}")
+                    continue
+
+                known = set(global_numbers)
+                text = self._merge_section(section, body, global_numbers)
+                yield {"type": "token", "text": ("\n\n" if emitted else "") + text}
+                emitted = True
+                for source, number in sorted(global_numbers.items(), key=lambda item: item[1]):
+                    if source not in known:
+                        yield {"type": "citation", "number": number, "source_id": source,
+                               "citation": sources[source - 1]["citation"]}
+
+        references = self._references_section(global_numbers, sources)
+        if references:
+            yield {"type": "token", "text": "\n\n" + references}
+        return emitted
 
     def format_report_with_metadata(
         self,
@@ -389,10 +809,15 @@ Please generate the short answer following these guidelines."""
         Returns:
             Formatted report with metadata
         """
+        return self.report_header(query, timestamp) + report_content + REPORT_FOOTER
+
+    @staticmethod
+    def report_header(query: str, timestamp: Optional[str] = None) -> str:
+        """Metadata header placed before a report."""
         if timestamp is None:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        header = f"""
+        return f"""
 ================================================================================
 MEDCHAT MEDICAL REPORT
 ================================================================================
@@ -402,16 +827,6 @@ Generated: {timestamp}
 
 """
 
-        footer = """
-================================================================================
-This report was generated by MedChat, an AI-powered medical information system.
-It is intended for educational purposes for medical students.
-Always consult with qualified medical professionals for clinical decisions.
-================================================================================
-"""
-
-        return header + report_content + footer
-
     def export_report_to_file(
         self,
         report_content: str,
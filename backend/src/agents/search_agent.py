@@ -5,14 +5,87 @@ This module implements the Search Agent that performs web searches
 to retrieve current medical information and research using Gemini's native Google Search tool.
 """
 
+import copy
 import logging
-from typing import List, Dict, Optional, Generator
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Generator, Tuple
 from google import genai
 from google.genai import types
 
 logger = logging.getLogger(__name__)
 
 
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (Unicode form, case, whitespace, trailing punctuation)."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip(" ?!.")
+
+
+class SearchCache:
+    """
+    Thread-safe LRU cache of search answers with a time-to-live.
+
+    Entries younger than `ttl` are fresh. For a further `stale_ttl` seconds
+    they are stale: still served, but the caller should refresh them.
+    Older entries are treated as missing.
+    """
+
+    def __init__(self, ttl: float = 3600, stale_ttl: float = 1800, max_entries: int = 1024):
+        """
+        Initialize the Search Cache.
+
+        Args:
+            ttl: Seconds an entry is served as fresh
+            stale_ttl: Seconds after expiry an entry is still served while it is refreshed
+            max_entries: Maximum entries kept; the least recently used are evicted first
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Tuple[Optional[Dict], bool]:
+        """
+        Look up an entry.
+
+        Returns:
+            (value, is_stale); value is None on a miss or after the stale window
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stored_at, value = entry
+            age = time.time() - stored_at
+            if age >= self.ttl + self.stale_ttl:
+                del self._entries[key]
+                return None, False
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value), age >= self.ttl
+
+    def put(self, key: Tuple[str, str], value: Dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
 class SearchAgent:
     """
     Search Agent that performs web searches for current medical information
@@ -24,12 +97,35 @@ class SearchAgent:
         google_api_key: str,
         model_name: str = "gemini-2.0-flash",
         temperature: float = 0.7,
+        cache_ttl: float = 3600,
+        cache_stale_ttl: float = 1800,
+        cache_max_entries: int = 1024,
     ):
+        """
+        Initialize the Search Agent.
 
+        Args:
+            google_api_key: Google API key for Gemini
+            model_name: Name of the Gemini model to use
+            temperature: Temperature for model generation
+            cache_ttl: Seconds a cached answer is served without refreshing (0 disables the cache)
+            cache_stale_ttl: Seconds after cache_ttl a cached answer is still served while
+                it is refreshed in the background
+            cache_max_entries: Maximum cached answers
+        """
         self.google_api_key = google_api_key
         self.model_name = model_name
         self.temperature = temperature
 
+        # Grounded answers cached per (model, normalized query); stale entries refresh in the background
+        self.cache = SearchCache(cache_ttl, cache_stale_ttl, cache_max_entries) if cache_ttl > 0 else None
+        # Searches started alongside generation get their own pool, so a burst of stale cache
+        # refreshes cannot queue them past the caller's deadline
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+        self._refresh_lock = threading.Lock()
+        self._refreshing: set = set()
+
         # Initialize the Client
         self.client = genai.Client(api_key=google_api_key)
         
@@ -42,12 +138,75 @@ class SearchAgent:
         """
         Answer a question using web search.
 
+        Answers are served from the cache when available; a stale cached answer
+        is returned immediately and refreshed in the background.
+
         Args:
             question: User question
 
         Returns:
             Dictionary with answer and search results
         """
+        if self.cache is None:
+            return self._search(question)
+
+        key = (self.model_name, normalize_query(question))
+        cached, is_stale = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"Search cache hit{' (stale, refreshing)' if is_stale else ''}: {question}")
+            if is_stale:
+                self._schedule_refresh(key, question)
+            cached["question"] = question
+            return cached
+
+        result = self._search(question)
+        self._store(key, result)
+        return result
+
+    def _store(self, key: Tuple[str, str], result: Dict) -> None:
+        # Empty answers are not cached so the next request retries the search
+        if result.get("answer"):
+            self.cache.put(key, result)
+
+    def _schedule_refresh(self, key: Tuple[str, str], question: str) -> None:
+        """Refresh a stale entry in the background, at most once at a time per key."""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            self._refresh_executor.submit(self._refresh, key, question)
+        except RuntimeError:
+            # Executor already shut down
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: Tuple[str, str], question: str) -> None:
+        try:
+            self._store(key, self._search(question))
+        except Exception as e:
+            # Keep serving the stale entry until it leaves the stale window
+            logger.warning(f"Background search refresh failed: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def submit_question(self, question: str) -> Future:
+        """
+        Start answering a question in the background.
+
+        Returns:
+            Future resolving to the answer_question result
+        """
+        return self._executor.submit(self.answer_question, question)
+
+    def shutdown(self) -> None:
+        """Stop background searches and refreshes without waiting for them."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _search(self, question: str) -> dict:
+        """Run a Google Search grounded Gemini call."""
         try:
             logger.info(f"Processing question: {question}")
 
@@ -90,6 +249,13 @@ class SearchAgent:
             logger.error(f"Error answering question: {e}")
             raise
 
+    def ping(self) -> bool:
+        """
+        Check that the Gemini API is reachable without generating content.
+        """
+        self.client.models.get(model=self.model_name)
+        return True
+
     def _format_search_results(self, results: List[Dict]) -> str:
         """Format search results for display."""
         if not results:
@@ -0,0 +1,218 @@
+"""
+Embedding Cache Module
+
+Disk-backed cache of document embeddings, shared by the backend's bulk ingestion
+(CustomGeminiEmbeddings) and the Streamlit app (HuggingFace model), so rebuilding
+a collection or store only embeds chunks it has not seen before.
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+CACHE_BATCH_SIZE = 64             # Texts per call to the wrapped model when computing misses
+LOOKUP_CHUNK = 500                # Hashes per SQLite IN (...) lookup
+
+
+def text_sha256(text: str) -> str:
+    """SHA-256 of a chunk's text (same key as the ingestion manifest)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Disk-backed cache in front of any LangChain Embeddings.
+
+    Vectors are keyed by (model name, dimension, SHA-256 of the chunk text).
+    Each (model, dimension, dtype) has one memory-mapped array file; a SQLite
+    index maps chunk hashes to rows. Only cache misses reach the wrapped model.
+    Queries are not cached and go straight to the model.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS namespaces (
+            id INTEGER PRIMARY KEY,
+            model TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            dtype TEXT NOT NULL,
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (model, dim, dtype)
+        );
+        CREATE TABLE IF NOT EXISTS vectors (
+            namespace_id INTEGER NOT NULL,
+            chunk_hash TEXT NOT NULL,
+            row INTEGER NOT NULL,
+            PRIMARY KEY (namespace_id, chunk_hash)
+        );
+    """
+
+    def __init__(self, embeddings: Embeddings, cache_dir: str, model_name: Optional[str] = None,
+                 dimension: Optional[int] = None, dtype: str = "float32", batch_size: int = CACHE_BATCH_SIZE):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16'")
+        self.embeddings = embeddings
+        self.cache_dir = cache_dir
+        self.model_name = model_name or self._model_name(embeddings)
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self._SCHEMA)
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+        self.namespace: Optional[Dict] = None
+        self._mmap = None
+        self._mapped_rows = 0
+        dimension = dimension or self._known_dimension()
+        if dimension:
+            self._open_namespace(dimension)
+
+    @staticmethod
+    def _model_name(embeddings: Embeddings) -> str:
+        for attr in ("model_name", "model"):
+            value = getattr(embeddings, attr, None)
+            if isinstance(value, str) and value:
+                return value
+        return type(embeddings).__name__
+
+    def _known_dimension(self) -> Optional[int]:
+        """Reuse the dimension already cached for this model, if there is exactly one."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT dim FROM namespaces WHERE model = ? AND dtype = ?",
+            (self.model_name, self.dtype.name),
+        ).fetchall()
+        return rows[0][0] if len(rows) == 1 else None
+
+    def _open_namespace(self, dimension: int):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name).strip("_")
+        path = os.path.join(self.cache_dir, f"{slug}-{dimension}-{self.dtype.name}.bin")
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO namespaces (model, dim, dtype, path) VALUES (?, ?, ?, ?)",
+                (self.model_name, dimension, self.dtype.name, os.path.basename(path)),
+            )
+        ns_id, rows = self.conn.execute(
+            "SELECT id, rows FROM namespaces WHERE model = ? AND dim = ? AND dtype = ?",
+            (self.model_name, dimension, self.dtype.name),
+        ).fetchone()
+        self.namespace = {"id": ns_id, "dim": dimension, "path": path, "rows": rows}
+
+    # ----- storage -----
+
+    def _committed_rows(self) -> int:
+        """Row count as committed by any process sharing the cache directory."""
+        return self.conn.execute("SELECT rows FROM namespaces WHERE id = ?", (self.namespace["id"],)).fetchone()[0]
+
+    def _vectors(self) -> np.ndarray:
+        """Memory map of the committed rows, remapped when the file has grown."""
+        rows = self.namespace["rows"]
+        if self._mmap is None or self._mapped_rows != rows:
+            self._mmap = np.memmap(self.namespace["path"], dtype=self.dtype, mode="r",
+                                   shape=(rows, self.namespace["dim"]))
+            self._mapped_rows = rows
+        return self._mmap
+
+    def _lookup(self, hashes: List[str]) -> Dict[str, int]:
+        found = {}
+        for i in range(0, len(hashes), LOOKUP_CHUNK):
+            part = hashes[i:i + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(part))
+            found.update(self.conn.execute(
+                f"SELECT chunk_hash, row FROM vectors WHERE namespace_id = ? AND chunk_hash IN ({placeholders})",
+                (self.namespace["id"], *part),
+            ).fetchall())
+        return found
+
+    def _store(self, hashes: List[str], vectors: List[List[float]]):
+        """
+        Append new vectors, then index them; rows beyond the committed count are overwritten.
+
+        The append runs under SQLite's write lock (BEGIN IMMEDIATE), so other
+        processes sharing the cache directory cannot claim the same rows.
+        """
+        if self.namespace is None:
+            self._open_namespace(len(vectors[0]))
+        data = np.asarray(vectors, dtype=self.dtype)
+        if data.shape[1] != self.namespace["dim"]:
+            raise ValueError(f"Embedding dimension {data.shape[1]} does not match cache dimension {self.namespace['dim']}")
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the lock: another process may have stored some of these or appended rows
+            existing = self._lookup(hashes)
+            fresh = [i for i, h in enumerate(hashes) if h not in existing]
+            start = self._committed_rows()
+            if fresh:
+                mode = "r+b" if os.path.exists(self.namespace["path"]) else "wb"
+                with open(self.namespace["path"], mode) as f:
+                    f.seek(start * self.namespace["dim"] * self.dtype.itemsize)
+                    f.write(data[fresh].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self.conn.executemany(
+                    "INSERT INTO vectors (namespace_id, chunk_hash, row) VALUES (?, ?, ?)",
+                    [(self.namespace["id"], hashes[i], start + n) for n, i in enumerate(fresh)],
+                )
+                self.conn.execute(
+                    "UPDATE namespaces SET rows = ? WHERE id = ?",
+                    (start + len(fresh), self.namespace["id"]),
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.namespace["rows"] = start + len(fresh)
+
+    # ----- Embeddings interface -----
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_sha256(t) for t in texts]
+        unique = dict(zip(hashes, texts))
+        result: Dict[str, List[float]] = {}
+
+        with self.lock:
+            if self.namespace is not None:
+                rows = self._lookup(list(unique))
+                if rows:
+                    if max(rows.values()) >= self.namespace["rows"]:
+                        # Rows appended by another process since we last looked
+                        self.namespace["rows"] = self._committed_rows()
+                    vectors = self._vectors()
+                    for h, row in rows.items():
+                        result[h] = vectors[row].astype(np.float32).tolist()
+
+            missing = [h for h in unique if h not in result]
+            self.hits += sum(1 for h in hashes if h in result)
+            self.misses += len(missing)
+
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i:i + self.batch_size]
+            vectors = self.embeddings.embed_documents([unique[h] for h in batch])
+            with self.lock:
+                self._store(batch, vectors)
+            if self.dtype == np.float16:
+                # Return what later cache hits will return
+                vectors = np.asarray(vectors, dtype=np.float16).astype(np.float32).tolist()
+            result.update(zip(batch, (list(v) for v in vectors)))
+
+        return [result[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def close(self):
+        self._mmap = None
+        self.conn.close()
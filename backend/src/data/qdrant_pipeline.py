@@ -2,12 +2,18 @@
 Qdrant Data Pipeline Module
 
 This module handles the retrieval pipeline for medical documents using an existing Qdrant collection.
-It integrates with an embedding model and Qdrant vector database.
+It integrates with an embedding model and Qdrant vector database, and provides a bulk
+ingestion path that writes chunks with the MedChat-RAG payload schema.
 """
 
 import os
+import time
+import uuid
+import hashlib
 import logging
-from typing import List, Tuple, Optional, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Optional, Any
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from qdrant_client import QdrantClient, models
@@ -15,6 +21,9 @@ from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 logger = logging.getLogger(__name__)
 
+# Embedding model of the MedChat-RAG collection; ingestion and retrieval must use the same one
+DEFAULT_EMBEDDING_MODEL = "models/embedding-001"
+
 class CustomGeminiEmbeddings(GoogleGenerativeAIEmbeddings):
     """
     Custom wrapper for Gemini embeddings to support 1536 dimensions
@@ -32,6 +41,51 @@ class CustomGeminiEmbeddings(GoogleGenerativeAIEmbeddings):
             return list(embedding) + list(embedding)
         return embedding
 
+def build_payload(text: str, file_metadata: Dict[str, Any], page_in_file: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build a MedChat-RAG point payload from a chunk and its splitting_books metadata entry.
+
+    Args:
+        text: Chunk text
+        file_metadata: Entry from splitting_books metadata.json (file_id, book_title,
+                       authors, publish_year, page_start, specialty, language, ...)
+        page_in_file: 1-based page of the chunk within the split file, if known
+
+    Returns:
+        Payload with text, book_name, author, publish_year, page_number, pdf_id,
+        keywords and language
+    """
+    authors = file_metadata.get("authors") or []
+    if isinstance(authors, str):
+        authors = [authors]
+
+    publish_year = file_metadata.get("publish_year")
+    if isinstance(publish_year, str):
+        publish_year = int(publish_year) if publish_year.strip().isdigit() else None
+
+    # Split files restart page numbering at 1; map back to the page in the original book
+    page_start = int(file_metadata.get("page_start") or 1)
+    page_number = page_start + (page_in_file - 1) if page_in_file else page_start
+
+    specialty = file_metadata.get("specialty") or []
+    keywords = specialty if isinstance(specialty, list) else [k.strip() for k in specialty.split(",") if k.strip()]
+
+    return {
+        "text": text,
+        "book_name": file_metadata.get("book_title") or file_metadata.get("source_file"),
+        "author": ", ".join(authors) or None,
+        "publish_year": publish_year,
+        "page_number": page_number,
+        "pdf_id": file_metadata.get("file_id"),
+        "keywords": keywords,
+        "language": file_metadata.get("language"),
+    }
+
+def point_id_for(pdf_id: Optional[str], text: str) -> str:
+    """Deterministic point ID so re-ingesting a chunk overwrites it instead of duplicating it."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{pdf_id or ''}:{digest}"))
+
 class QdrantPipeline:
     """
     Manages the Qdrant vector database pipeline for medical document retrieval.
@@ -73,7 +127,7 @@ class QdrantPipeline:
             # Fallback to Gemini with custom padding to 1536
             logger.info("Initializing CustomGeminiEmbeddings (768 -> 1536 padding)")
             self.embeddings = CustomGeminiEmbeddings(
-                model="models/embedding-001", 
+                model=DEFAULT_EMBEDDING_MODEL,
                 # google_api_key=os.getenv("GOOGLE_API_KEY"), # Rely on env var
             )
 
@@ -144,33 +198,8 @@ class QdrantPipeline:
             )
             
             # 3. Format Results
-            formatted_results = []
-            for point in results:
-                # Map specific payload fields to Document
-                payload = point.payload or {}
-                
-                # Extract main content
-                page_content = payload.get("text", "")
-                
-                # Extract metadata
-                metadata = {
-                    "book_name": payload.get("book_name"),
-                    "author": payload.get("author"),
-                    "publish_year": payload.get("publish_year"),
-                    "page_number": payload.get("page_number"),
-                    "pdf_id": payload.get("pdf_id"),
-                    "keywords": payload.get("keywords"),
-                    "language": payload.get("language"),
-                    # Keep original payload just in case
-                    "_original_payload": payload 
-                }
-                
-                doc = Document(
-                    page_content=page_content,
-                    metadata=metadata
-                )
-                formatted_results.append((doc, point.score))
-                
+            formatted_results = [self._point_to_result(point) for point in results]
+
             logger.info(f"Found {len(formatted_results)} results")
             return formatted_results
 
@@ -178,6 +207,284 @@ class QdrantPipeline:
             logger.error(f"Error during search: {e}")
             raise
 
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries with a single embedding call.
+
+        Args:
+            queries: Query strings
+
+        Returns:
+            One vector per query
+        """
+        if isinstance(self.embeddings, GoogleGenerativeAIEmbeddings):
+            # embed_documents defaults to the document task type; queries need the query one
+            return self.embeddings.embed_documents(queries, task_type="retrieval_query")
+        return self.embeddings.embed_documents(queries)
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filter: Optional[models.Filter] = None,
+        score_threshold: Optional[float] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Perform semantic search for several queries in one Qdrant request.
+
+        Args:
+            queries: The search query strings
+            k: Number of results to return per query
+            filter: Optional Qdrant filter applied to every query
+            score_threshold: Optional minimum score threshold
+
+        Returns:
+            One list of (Document, score) tuples per query
+        """
+        if not queries:
+            return []
+
+        try:
+            logger.info(f"Performing batch search for {len(queries)} queries")
+
+            # 1. Generate all embeddings in one call
+            query_vectors = self.embed_queries(queries)
+
+            # 2. Execute a single batch search
+            requests = [
+                models.SearchRequest(
+                    vector=models.NamedVector(name=self.vector_name, vector=vector),
+                    filter=filter,
+                    limit=k,
+                    score_threshold=score_threshold,
+                    with_payload=True,
+                )
+                for vector in query_vectors
+            ]
+            batch_results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=requests,
+            )
+
+            # 3. Format Results
+            formatted = [
+                [self._point_to_result(point) for point in points]
+                for points in batch_results
+            ]
+            logger.info(f"Batch search returned {sum(len(r) for r in formatted)} results")
+            return formatted
+
+        except Exception as e:
+            logger.error(f"Error during batch search: {e}")
+            raise
+
+    @staticmethod
+    def _payload_to_document(point_id: Any, payload: Optional[dict]) -> Document:
+        """Map a Qdrant point payload to a Document."""
+        payload = payload or {}
+
+        # Extract main content
+        page_content = payload.get("text", "")
+
+        # Extract metadata; point_id lets clients fetch the full chunk on demand
+        metadata = {
+            "point_id": str(point_id),
+            "book_name": payload.get("book_name"),
+            "author": payload.get("author"),
+            "publish_year": payload.get("publish_year"),
+            "page_number": payload.get("page_number"),
+            "pdf_id": payload.get("pdf_id"),
+            "keywords": payload.get("keywords"),
+            "language": payload.get("language"),
+        }
+
+        return Document(
+            page_content=page_content,
+            metadata=metadata
+        )
+
+    def _point_to_result(self, point) -> Tuple[Document, float]:
+        """Map a scored Qdrant point to a (Document, score) tuple."""
+        return self._payload_to_document(point.id, point.payload), point.score
+
+    def get_document(self, point_id: str) -> Optional[Document]:
+        """
+        Fetch a single chunk by its Qdrant point ID.
+
+        Args:
+            point_id: Point ID (unsigned integer or UUID string)
+
+        Returns:
+            The Document, or None if the point does not exist
+        """
+        try:
+            qdrant_id = int(point_id) if point_id.isdigit() else point_id
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[qdrant_id],
+                with_payload=True,
+                with_vectors=False,
+            )
+            if not points:
+                return None
+            return self._payload_to_document(points[0].id, points[0].payload)
+
+        except Exception as e:
+            logger.error(f"Error retrieving document {point_id}: {e}")
+            raise
+
+    def ensure_collection(self, bulk: bool = True) -> bool:
+        """
+        Create the collection if it does not exist, and its pdf_id payload index.
+
+        Args:
+            bulk: Create it with HNSW graph building disabled (m=0) for a bulk load
+
+        Returns:
+            True if the collection was created
+        """
+        if self.client.collection_exists(self.collection_name):
+            # Collections created before the index existed get it too (metadata updates filter on pdf_id)
+            payload_schema = self.client.get_collection(self.collection_name).payload_schema or {}
+            if "pdf_id" not in payload_schema:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name="pdf_id",
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+                logger.info(f"Created pdf_id payload index on {self.collection_name}")
+            return False
+
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config={
+                self.vector_name: models.VectorParams(
+                    size=self.embedding_dimension,
+                    distance=models.Distance.COSINE,
+                )
+            },
+            hnsw_config=models.HnswConfigDiff(m=0) if bulk else None,
+        )
+        self.client.create_payload_index(
+            collection_name=self.collection_name,
+            field_name="pdf_id",
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+        logger.info(f"Created collection {self.collection_name}")
+        return True
+
+    def ingest(
+        self,
+        chunks: Iterable[Document],
+        batch_size: int = 128,
+        workers: int = 4,
+        hnsw_m: int = 16,
+        indexing_threshold: int = 20000,
+    ) -> Dict[str, Any]:
+        """
+        Bulk-load chunks into the collection.
+
+        Batches are embedded by parallel workers and sent with upload_points
+        without waiting for the server to apply them. Index building is deferred
+        during the load and re-enabled afterwards, so the HNSW graph is built
+        once over the loaded data.
+
+        Args:
+            chunks: Documents whose page_content is the chunk text and whose metadata
+                    is the rest of the payload (see build_payload)
+            batch_size: Chunks per embedding call and upload batch
+            workers: Batches embedded and uploaded concurrently
+            hnsw_m: HNSW graph degree set after loading into a newly created collection,
+                    or into one left at m=0 by an interrupted bulk load
+            indexing_threshold: Optimizer indexing threshold set after loading into a newly
+                                created collection; an existing collection gets its own
+                                threshold back unless it is unset or 0
+
+        Returns:
+            Report with point count, batch count and throughput
+        """
+        started = time.time()
+        created = self.ensure_collection(bulk=True)
+        restore_m = hnsw_m if created else None
+        if not created:
+            # Restore the collection's configured settings rather than imposing ours, read before lowering them
+            config = self.client.get_collection(self.collection_name).config
+            # Unset means the server default, which a config diff cannot restore, and 0 / m=0 are what
+            # a bulk load killed before restoring leaves behind; use ours in both cases
+            if config.optimizer_config.indexing_threshold:
+                indexing_threshold = config.optimizer_config.indexing_threshold
+            if config.hnsw_config.m == 0:
+                restore_m = hnsw_m
+
+        # Defer segment indexing until all points are uploaded
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0),
+        )
+
+        def upload(batch: List[Document]) -> int:
+            vectors = self.embeddings.embed_documents([doc.page_content for doc in batch])
+            points = [
+                models.PointStruct(
+                    id=point_id_for(doc.metadata.get("pdf_id"), doc.page_content),
+                    vector={self.vector_name: vector},
+                    payload={**doc.metadata, "text": doc.page_content},
+                )
+                for doc, vector in zip(batch, vectors)
+            ]
+            self.client.upload_points(
+                collection_name=self.collection_name,
+                points=points,
+                batch_size=len(points),
+                wait=False,
+            )
+            return len(points)
+
+        uploaded = 0
+        batches = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                in_flight = deque()
+                batch: List[Document] = []
+
+                def submit():
+                    in_flight.append(executor.submit(upload, list(batch)))
+                    batch.clear()
+
+                for chunk in chunks:
+                    batch.append(chunk)
+                    if len(batch) >= batch_size:
+                        submit()
+                    # Bound memory: at most two batches queued per worker
+                    while len(in_flight) >= 2 * max(1, workers):
+                        uploaded += in_flight.popleft().result()
+                        batches += 1
+                        logger.info(f"Uploaded {uploaded} points")
+                if batch:
+                    submit()
+                while in_flight:
+                    uploaded += in_flight.popleft().result()
+                    batches += 1
+        except Exception as e:
+            logger.error(f"Error during bulk ingestion after {uploaded} points: {e}")
+            raise
+        finally:
+            # Build the HNSW index once over everything that was loaded
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                hnsw_config=models.HnswConfigDiff(m=restore_m) if restore_m else None,
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=indexing_threshold),
+            )
+
+        total_seconds = time.time() - started
+        logger.info(f"Ingested {uploaded} points in {total_seconds:.1f}s")
+        return {
+            "points": uploaded,
+            "batches": batches,
+            "total_seconds": round(total_seconds, 3),
+            "points_per_sec": round(uploaded / total_seconds, 2) if total_seconds else 0.0,
+        }
+
     def get_collection_info(self) -> dict:
         """Get information about the current collection."""
         try:
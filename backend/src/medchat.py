@@ -8,16 +8,24 @@ for the multi-agent chatbot system.
 import logging
 import os
 import time
-from typing import Dict, Optional, Generator
-from src.agents.orchestration_agent import OrchestrationAgent, AgentType
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Callable, Dict, List, Optional, Generator, Tuple
+from src.agents.orchestration_agent import (
+    OrchestrationAgent,
+    AgentType,
+    RetrievalSufficiencyGate,
+    SufficiencyDecision,
+)
 from src.agents.rag_agent import RAGAgent
 from src.agents.search_agent import SearchAgent
 from src.agents.report_agent import ReportAgent
 from src.data.qdrant_pipeline import QdrantPipeline
-from src.memory.supabase_memory import SupabaseMemory
+from src.memory import create_memory_backend, ConversationCompactor
 
 logger = logging.getLogger(__name__)
 
+NON_MEDICAL_MESSAGE = "I am a medical assistant and cannot answer non-medical questions. Please ask about health topics."
+
 
 class MedChat:
     """
@@ -32,6 +40,23 @@ class MedChat:
         gemini_model: str = "gemini-2.0-flash",
         collection_name: str = "MedChat-RAG",
         embedding_dimension: int = 1536,
+        memory_backend: str = "supabase",
+        sqlite_memory_path: str = "data/medchat_memory.db",
+        compaction_interval: int = 6,
+        compaction_keep_recent: int = 4,
+        max_context_tokens: int = 1000,
+        report_mode: str = "single",
+        report_max_concurrency: int = 4,
+        report_max_sections: int = 6,
+        search_cache_ttl: float = 3600,
+        search_cache_stale_ttl: float = 1800,
+        search_cache_max_entries: int = 1024,
+        sufficiency_min_top_score: float = 0.55,
+        sufficiency_good_top_score: float = 0.80,
+        sufficient_confidence: float = 0.70,
+        insufficient_confidence: float = 0.40,
+        search_hedge_deadline: float = 4.0,
+        search_fallback_timeout: float = 15.0,
     ):
         """
         Initialize MedChat application.
@@ -43,6 +68,23 @@ class MedChat:
             gemini_model: Gemini model to use
             collection_name: Name of Qdrant collection
             embedding_dimension: Dimension of embeddings
+            memory_backend: Conversation memory backend ("supabase" or "sqlite")
+            sqlite_memory_path: Database file used by the SQLite memory backend
+            compaction_interval: Turns between background history compactions
+            compaction_keep_recent: Recent messages kept verbatim in the context
+            max_context_tokens: Token cap for the conversation context
+            report_mode: Report generation mode ("single" or "parallel")
+            report_max_concurrency: Sections generated at once in parallel report mode
+            report_max_sections: Maximum sections planned for a parallel report
+            search_cache_ttl: Seconds a web search answer is cached (0 disables the cache)
+            search_cache_stale_ttl: Seconds a stale search answer is served while refreshed
+            search_cache_max_entries: Maximum cached search answers
+            sufficiency_min_top_score: Top retrieval score below which web search is required
+            sufficiency_good_top_score: Top retrieval score treated as a confident match
+            sufficient_confidence: Gate confidence at or above which no web search runs
+            insufficient_confidence: Gate confidence below which the answer waits for web search
+            search_hedge_deadline: Seconds a borderline query waits for its parallel web search
+            search_fallback_timeout: Seconds an insufficient query waits for web search
         """
         self.google_api_key = google_api_key
         self.qdrant_url = qdrant_url or os.getenv("SERVICE_URL_QDRANT")
@@ -50,6 +92,16 @@ class MedChat:
         self.gemini_model = gemini_model
         self.collection_name = collection_name
         self.embedding_dimension = embedding_dimension
+        self.search_hedge_deadline = search_hedge_deadline
+        self.search_fallback_timeout = search_fallback_timeout
+
+        # Score-based sufficiency gate (no LLM call) deciding when web search is needed
+        self.sufficiency_gate = RetrievalSufficiencyGate(
+            min_top_score=sufficiency_min_top_score,
+            good_top_score=sufficiency_good_top_score,
+            sufficient_confidence=sufficient_confidence,
+            insufficient_confidence=insufficient_confidence,
+        )
 
         logger.info("Initializing MedChat application...")
 
@@ -66,20 +118,36 @@ class MedChat:
             logger.error(f"Failed to initialize Qdrant pipeline: {e}")
             raise
 
-        # Initialize Supabase Memory
+        # Initialize conversation memory
         try:
-            self.supabase_memory = SupabaseMemory()
-            logger.info("Supabase memory initialized")
+            memory_kwargs = {"db_path": sqlite_memory_path} if memory_backend == "sqlite" else {}
+            self.memory = create_memory_backend(memory_backend, **memory_kwargs)
+            logger.info(f"Conversation memory initialized ({memory_backend})")
         except Exception as e:
-            logger.warning(f"Failed to initialize Supabase memory: {e}")
-            self.supabase_memory = None
+            logger.warning(f"Failed to initialize {memory_backend} memory: {e}")
+            self.memory = None
+
+        # Initialize rolling conversation compaction (requires a memory backend)
+        self.compactor = None
+        if self.memory:
+            try:
+                self.compactor = ConversationCompactor(
+                    memory=self.memory,
+                    model_name=gemini_model,
+                    compact_every=compaction_interval,
+                    keep_recent=compaction_keep_recent,
+                    max_context_tokens=max_context_tokens,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to initialize conversation compaction: {e}")
 
         # Initialize agents
         try:
             self.orchestration_agent = OrchestrationAgent(
                 google_api_key=google_api_key,
-                supabase_memory=self.supabase_memory,
+                memory=self.memory,
                 model_name=gemini_model,
+                compactor=self.compactor,
             )
             logger.info("Orchestration agent initialized")
 
@@ -93,12 +161,18 @@ class MedChat:
             self.search_agent = SearchAgent(
                 google_api_key=google_api_key,
                 model_name=gemini_model,
+                cache_ttl=search_cache_ttl,
+                cache_stale_ttl=search_cache_stale_ttl,
+                cache_max_entries=search_cache_max_entries,
             )
             logger.info("Search agent initialized")
 
             self.report_agent = ReportAgent(
                 google_api_key=google_api_key,
                 model_name=gemini_model,
+                report_mode=report_mode,
+                max_concurrency=report_max_concurrency,
+                max_sections=report_max_sections,
             )
             logger.info("Report agent initialized")
 
@@ -126,7 +200,6 @@ class MedChat:
             # Step 1: Route query using orchestration agent
             routing_info = self.orchestration_agent.process_query(query, session_id=session_id)
             agent_type = AgentType(routing_info["agent_type"])
-            refined_query = routing_info["query_refinement"]
             is_medical = routing_info.get("is_medical", True)
             direct_response = routing_info.get("direct_response")
 
@@ -153,7 +226,7 @@ class MedChat:
 
             if not is_medical:
                 # Fallback if no direct response provided but marked as non-medical
-                msg = "I am a medical assistant and cannot answer non-medical questions. Please ask about health topics."
+                msg = NON_MEDICAL_MESSAGE
                 end_time = time.time()
                 thinking_time = end_time - start_time
                 self.orchestration_agent.add_to_history(
@@ -171,81 +244,345 @@ class MedChat:
                 }
 
             # Step 2: Execute appropriate workflow
-            if agent_type == AgentType.GENERAL:
-                # For general queries, use simple RAG or direct answer
-                result = self.rag_agent.answer_question(question=refined_query)
-                
+            result = self._execute_workflow(query, routing_info)
+
+            # Add to conversation history
+            end_time = time.time()
+            thinking_time = end_time - start_time
+            
+            self.orchestration_agent.add_to_history(
+                role="assistant",
+                content=result.get("answer", ""),
+                agent_type=agent_type.value,
+                session_id=session_id,
+                thinking_time=thinking_time,
+            )
+            
+            result["thinking_time"] = thinking_time
+
+            logger.info("Query processed successfully")
+            return result
+
+        except Exception as e:
+            logger.error(f"Error processing query: {e}")
+            raise
+
+    def _execute_workflow(
+        self,
+        query: str,
+        routing_info: Dict,
+        retrieved_docs: Optional[List] = None,
+    ) -> Dict:
+        """
+        Run the agent workflow for an already routed medical query.
+
+        Args:
+            query: Original user query
+            routing_info: Routing information from the orchestration agent
+            retrieved_docs: Pre-fetched (Document, score) tuples, if already retrieved
+
+        Returns:
+            Dictionary with answer and metadata
+        """
+        agent_type = AgentType(routing_info["agent_type"])
+        refined_query = routing_info["query_refinement"]
+
+        if agent_type == AgentType.GENERAL:
+            # For general queries, use simple RAG or direct answer
+            result = self.rag_agent.answer_question(
+                question=refined_query,
+                retrieved_docs=retrieved_docs,
+            )
+            
+        else:
+            # Smart Workflow for Medical Queries (RAG -> Sufficiency -> Search -> Report)
+            logger.info("Executing Smart Medical Workflow")
+            
+            # 1-3. Retrieval, sufficiency gate and (if needed) web search alongside generation
+            rag_result, search_result, sufficiency = self._gather_evidence(refined_query, retrieved_docs)
+
+            # 4. Final Answer Generation (Report or Short Answer)
+            if routing_info.get("requires_report", False):
+                logger.info("Generating comprehensive report")
+                report = self.report_agent.generate_summary_report(
+                    query=query,
+                    rag_results=rag_result,
+                    search_results=search_result,
+                )
             else:
-                # Smart Workflow for Medical Queries (RAG -> Sufficiency -> Search -> Report)
-                logger.info("Executing Smart Medical Workflow")
-                
-                # 1. RAG Retrieval
-                rag_result = self.rag_agent.answer_question(question=refined_query)
-                
-                # 2. Sufficiency Check
-                sufficiency = None
-                # sufficiency = self.orchestration_agent.check_sufficiency(
-                #     query=refined_query,
-                #     context=rag_result.get("context_used", "")
-                # )
-                
-                search_result = None
-                # if not sufficiency.is_sufficient:
-                #     logger.info(f"RAG insufficient: {sufficiency.reasoning}. Performing search.")
-                #     # 3. Search Fallback
-                #     search_result = self.search_agent.answer_question(question=refined_query)
-                # else:
-                #     logger.info("RAG sufficient. Skipping search.")
-
-
-
-                # 4. Final Answer Generation (Report or Short Answer)
+                logger.info("Generating short answer with citations")
+                report = self.report_agent.generate_short_answer(
+                    query=query,
+                    rag_results=rag_result,
+                    search_results=search_result,
+                )
+            
+            result = {
+                "question": query,
+                "answer": report,
+                "retrieved_documents": rag_result.get("retrieved_documents", []),
+                "search_results": search_result.get("search_results", []) if search_result else [],
+                "sufficiency_check": sufficiency,
+            }
+
+        # Step 3: Add metadata
+        result["routing_info"] = routing_info
+        result["agent_type"] = agent_type.value
+        return result
+
+    def _gather_evidence(
+        self,
+        refined_query: str,
+        retrieved_docs: Optional[List] = None,
+    ) -> Tuple[Dict, Optional[Dict], Dict]:
+        """
+        Retrieve documents, gate them on retrieval scores and run web search when needed.
+
+        Sufficient retrieval never touches web search. Otherwise the search
+        starts before the RAG answer is generated and runs alongside it: an
+        insufficient query waits for it (up to search_fallback_timeout), a
+        borderline query only merges it if it finishes within
+        search_hedge_deadline of starting.
+
+        Args:
+            refined_query: Refined user query
+            retrieved_docs: Pre-fetched (Document, score) tuples, if already retrieved
+
+        Returns:
+            (rag_result, search_result or None, sufficiency check as a dict)
+        """
+        if retrieved_docs is None:
+            retrieved_docs = self.rag_agent.retrieve_documents(refined_query)
+
+        sufficiency = self.sufficiency_gate.assess(refined_query, retrieved_docs)
+
+        search_future = None
+        search_started = time.time()
+        if sufficiency.decision != SufficiencyDecision.SUFFICIENT:
+            logger.info(f"RAG {sufficiency.decision.value}: starting web search in parallel")
+            search_future = self.search_agent.submit_question(refined_query)
+
+        rag_result = self.rag_agent.answer_question(
+            question=refined_query,
+            retrieved_docs=retrieved_docs,
+        )
+
+        search_result = None
+        if search_future is not None:
+            if sufficiency.decision == SufficiencyDecision.INSUFFICIENT:
+                timeout = self.search_fallback_timeout
+            else:
+                timeout = self.search_hedge_deadline
+            try:
+                search_result = search_future.result(timeout=max(search_started + timeout - time.time(), 0))
+            except FutureTimeoutError:
+                # A late result still lands in the search cache for the next asker
+                logger.info(f"Web search missed its {timeout}s deadline; answering from the knowledge base")
+            except Exception as e:
+                logger.warning(f"Web search failed; answering from the knowledge base: {e}")
+
+        sufficiency_check = sufficiency.model_dump(mode="json")
+        sufficiency_check["search_merged"] = search_result is not None
+        return rag_result, search_result, sufficiency_check
+
+    def process_batch(
+        self,
+        queries: List[str],
+        max_concurrency: int = 4,
+    ) -> Generator[Dict, None, None]:
+        """
+        Process a batch of independent queries (e.g. a question bank).
+
+        Routing runs as one batched LLM call, retrieval embeds all queries in a
+        single call and issues one Qdrant batch search, and answer generation
+        runs with bounded concurrency. Batch items are not written to
+        conversation history.
+
+        Args:
+            queries: User queries
+            max_concurrency: Maximum number of items generated concurrently
+
+        Yields:
+            One dictionary per item, in completion order, with "index",
+            "question", "status" ("ok" or "error") and either the result
+            fields or "error"
+        """
+        logger.info(f"Processing batch of {len(queries)} queries")
+
+        # Step 1: Route all queries in one batched call
+        routing = self.orchestration_agent.route_batch(queries, max_concurrency=max_concurrency)
+
+        # Step 2: Retrieve documents for all medical queries at once
+        retrieval_indices = [
+            i for i, info in enumerate(routing)
+            if not isinstance(info, Exception)
+            and not info.get("direct_response")
+            and info.get("is_medical", True)
+        ]
+        retrieved: Dict[int, List] = {}
+        if retrieval_indices:
+            try:
+                batch_docs = self.rag_agent.retrieve_documents_batch(
+                    [routing[i]["query_refinement"] for i in retrieval_indices]
+                )
+                retrieved = dict(zip(retrieval_indices, batch_docs))
+            except Exception as e:
+                # Items fall back to retrieving individually
+                logger.error(f"Batch retrieval failed, retrieving per item: {e}")
+
+        def run_item(index: int) -> Dict:
+            start_time = time.time()
+            query = queries[index]
+            routing_info = routing[index]
+            if isinstance(routing_info, Exception):
+                raise routing_info
+
+            direct_response = routing_info.get("direct_response")
+            if direct_response or not routing_info.get("is_medical", True):
+                result = {
+                    "question": query,
+                    "answer": direct_response or NON_MEDICAL_MESSAGE,
+                    "routing_info": routing_info,
+                    "agent_type": "orchestration",
+                }
+            else:
+                result = self._execute_workflow(query, routing_info, retrieved_docs=retrieved.get(index))
+
+            result["thinking_time"] = time.time() - start_time
+            return result
+
+        # Step 3: Generate answers with bounded concurrency, yielding as each completes
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="batch")
+        try:
+            futures = {executor.submit(run_item, i): i for i in range(len(queries))}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    item = future.result()
+                    item.update({"index": index, "status": "ok"})
+                except Exception as e:
+                    logger.error(f"Error processing batch item {index}: {e}")
+                    item = {"index": index, "question": queries[index], "status": "error", "error": str(e)}
+                yield item
+        finally:
+            # Stop pending work if the consumer goes away (e.g. client disconnect)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_chat(self, query: str, session_id: Optional[str] = None) -> Generator[Dict, None, None]:
+        """
+        Process a query like process_query, streaming the answer as events.
+
+        The answer is generated by the same workflow as process_query; tokens
+        are relayed as soon as the model produces them. The document sources
+        are sent right after retrieval. For RAG and report answers the first
+        token still waits for the non-streamed RAG answer the final answer is
+        built from and, when retrieval is not sufficient, for web search (up
+        to search_fallback_timeout, or search_hedge_deadline for borderline
+        queries). When web sources are merged, a second "sources" event
+        follows with them appended; document source ids do not change.
+
+        Args:
+            query: User query
+            session_id: Session ID for memory
+
+        Yields:
+            Event dictionaries with a "type": "sources" (always first, and
+            again before the answer if web sources were added),
+            optionally "header", then "token" and "citation" events,
+            optionally "footer", and finally "done" carrying the same fields
+            process_query returns
+        """
+        try:
+            start_time = time.time()
+            logger.info(f"Streaming query: {query}")
+
+            # Step 1: Route query using orchestration agent
+            routing_info = self.orchestration_agent.process_query(query, session_id=session_id)
+            agent_type = AgentType(routing_info["agent_type"])
+            direct_response = routing_info.get("direct_response")
+            result = {"question": query, "routing_info": routing_info, "agent_type": agent_type.value}
+
+            # Step 2: Stream the appropriate workflow
+            if direct_response or not routing_info.get("is_medical", True):
+                result["agent_type"] = "orchestration"
+                events = iter([
+                    {"type": "sources", "sources": []},
+                    {"type": "token", "text": direct_response or NON_MEDICAL_MESSAGE},
+                ])
+
+            elif agent_type == AgentType.GENERAL:
+                refined_query = routing_info["query_refinement"]
+                retrieved_docs = self.rag_agent.retrieve_documents(refined_query)
+                result["retrieved_documents"] = [
+                    {"content": doc.page_content, "metadata": doc.metadata, "score": score}
+                    for doc, score in retrieved_docs
+                ]
+
+                def general_events():
+                    yield self.report_agent.sources_event(self.report_agent.compile_sources(result))
+                    for chunk in self.rag_agent.stream_answer(question=refined_query, retrieved_docs=retrieved_docs):
+                        yield {"type": "token", "text": chunk}
+
+                events = general_events()
+
+            else:
+                refined_query = routing_info["query_refinement"]
+                retrieved_docs = self.rag_agent.retrieve_documents(refined_query)
+                # Show the document sources while the RAG answer and any web search run
+                document_sources = self.report_agent.sources_event(self.report_agent.compile_sources({
+                    "retrieved_documents": [
+                        {"content": doc.page_content, "metadata": doc.metadata, "score": score}
+                        for doc, score in retrieved_docs
+                    ],
+                }))
+                yield document_sources
+
+                rag_result, search_result, sufficiency = self._gather_evidence(refined_query, retrieved_docs)
+                result["retrieved_documents"] = rag_result.get("retrieved_documents", [])
+                result["search_results"] = search_result.get("search_results", []) if search_result else []
+                result["sufficiency_check"] = sufficiency
+
                 if routing_info.get("requires_report", False):
-                    logger.info("Generating comprehensive report")
-                    report = self.report_agent.generate_summary_report(
+                    logger.info("Streaming comprehensive report")
+                    answer_events = self.report_agent.stream_summary_report(
                         query=query,
                         rag_results=rag_result,
                         search_results=search_result,
                     )
                 else:
-                    logger.info("Generating short answer with citations")
-                    report = self.report_agent.generate_short_answer(
+                    logger.info("Streaming short answer with citations")
+                    answer_events = self.report_agent.stream_short_answer(
                         query=query,
                         rag_results=rag_result,
                         search_results=search_result,
                     )
-                
-                result = {
-                    "question": query,
-                    "answer": report,
-                    "retrieved_documents": rag_result.get("retrieved_documents", []),
-                    "search_results": search_result.get("search_results", []) if search_result else [],
-                    "sufficiency_check": sufficiency.dict() if sufficiency else None
-                }
+                # Documents come first in the full source list, so it only needs resending when web sources were added
+                events = (
+                    event for event in answer_events
+                    if event["type"] != "sources" or event != document_sources
+                )
 
-            # Step 3: Add metadata
-            result["routing_info"] = routing_info
-            result["agent_type"] = agent_type.value
+            answer_parts = []
+            for event in events:
+                if event["type"] == "token":
+                    answer_parts.append(event["text"])
+                yield event
 
-            # Add to conversation history
-            end_time = time.time()
-            thinking_time = end_time - start_time
-            
+            # Step 3: Add to conversation history (without the report framing)
+            result["answer"] = "".join(answer_parts)
+            result["thinking_time"] = time.time() - start_time
             self.orchestration_agent.add_to_history(
                 role="assistant",
-                content=result.get("answer", "")[:200],
-                agent_type=agent_type.value,
+                content=result["answer"],
+                agent_type=result["agent_type"],
                 session_id=session_id,
-                thinking_time=thinking_time,
+                thinking_time=result["thinking_time"],
             )
-            
-            result["thinking_time"] = thinking_time
 
-            logger.info("Query processed successfully")
-            return result
+            yield {"type": "done", **result}
 
         except Exception as e:
-            logger.error(f"Error processing query: {e}")
+            logger.error(f"Error streaming query: {e}")
             raise
 
     def stream_query(self, query: str, session_id: Optional[str] = None) -> Generator:
@@ -312,6 +649,10 @@ class MedChat:
             logger.error(f"Error getting vector store info: {e}")
             raise
 
+    def get_document(self, point_id: str):
+        """Fetch a single chunk from the vector store by point ID."""
+        return self.qdrant_pipeline.get_document(point_id)
+
     def clear_conversation_history(self, session_id: Optional[str] = None) -> None:
         """Clear the conversation history."""
         self.orchestration_agent.clear_history(session_id=session_id)
@@ -319,46 +660,55 @@ class MedChat:
 
     def get_all_sessions(self) -> list[str]:
         """Retrieve all available session IDs."""
-        if self.supabase_memory:
-            return self.supabase_memory.get_all_sessions()
+        if self.memory:
+            return self.memory.get_all_sessions()
         return []
 
     def get_session_history(self, session_id: str) -> list[dict]:
         """Retrieve history for a specific session."""
-        if self.supabase_memory:
-            return self.supabase_memory.get_history(session_id=session_id)
+        if self.memory:
+            return self.memory.get_history(session_id=session_id)
         return []
 
-    def health_check(self) -> Dict:
+    def health_probes(self) -> Dict[str, Callable[[], bool]]:
         """
-        Perform a health check on all components.
+        Build the component health probes used by the background prober.
 
         Returns:
-            Dictionary with health status of each component
+            Mapping of component name to a callable returning True when healthy
         """
-        health_status = {
-            "qdrant": False,
-            "orchestration_agent": False,
-            "rag_agent": False,
-            "search_agent": False,
-            "report_agent": False,
-            "supabase_memory": False,
+        def probe_qdrant() -> bool:
+            self.qdrant_pipeline.get_collection_info()
+            return True
+
+        def probe_memory() -> bool:
+            return self.memory is not None and self.memory.ping()
+
+        return {
+            "qdrant": probe_qdrant,
+            "gemini": self.search_agent.ping,
+            "memory": probe_memory,
+            # Key reported before the memory backend became configurable; kept for existing clients and monitors
+            "supabase_memory": probe_memory,
+            "orchestration_agent": lambda: self.orchestration_agent is not None,
+            "rag_agent": lambda: self.rag_agent is not None,
+            "search_agent": lambda: self.search_agent is not None,
+            "report_agent": lambda: self.report_agent is not None,
         }
 
-        try:
-            # Check Qdrant
-            self.qdrant_pipeline.get_collection_info()
-            health_status["qdrant"] = True
-        except Exception as e:
-            logger.warning(f"Qdrant health check failed: {e}")
-
-        # Check agents (they should be initialized)
-        health_status["orchestration_agent"] = self.orchestration_agent is not None
-        health_status["rag_agent"] = self.rag_agent is not None
-        health_status["search_agent"] = self.search_agent is not None
-        health_status["report_agent"] = self.report_agent is not None
-        
-        # Check Supabase
-        health_status["supabase_memory"] = self.supabase_memory is not None
+    def health_check(self) -> Dict:
+        """
+        Perform a synchronous health check on all components.
+
+        Returns:
+            Dictionary with health status of each component
+        """
+        health_status = {}
+        for name, probe in self.health_probes().items():
+            try:
+                health_status[name] = bool(probe())
+            except Exception as e:
+                logger.warning(f"{name} health check failed: {e}")
+                health_status[name] = False
 
         return health_status
@@ -1 +1,23 @@
+from .base import MemoryBackend
+from .compaction import ConversationCompactor
+from .sqlite_memory import SQLiteMemory
 from .supabase_memory import SupabaseMemory
+
+
+def create_memory_backend(backend: str = "supabase", **kwargs) -> MemoryBackend:
+    """
+    Create the conversation memory backend selected in the configuration.
+
+    Args:
+        backend: "supabase" or "sqlite"
+        **kwargs: Backend-specific options (e.g. db_path for SQLite)
+
+    Returns:
+        MemoryBackend instance
+    """
+    backend = (backend or "").lower()
+    if backend == "sqlite":
+        return SQLiteMemory(**kwargs)
+    if backend == "supabase":
+        return SupabaseMemory()
+    raise ValueError(f"Unknown memory backend: {backend}")
@@ -0,0 +1,76 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+
+class MemoryBackend(ABC):
+    """
+    Interface for conversation memory storage.
+
+    Implementations persist chat messages per session. `get_history` returns
+    the most recent `limit` messages of a session, oldest first.
+    """
+
+    @abstractmethod
+    def add_message(self, session_id: str, role: str, content: str, metadata: Dict[str, Any] = None, thinking_time: float = None) -> Dict[str, Any]:
+        """
+        Add a message to the chat history.
+        """
+
+    def add_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add several messages at once.
+
+        Each item takes the keyword arguments of `add_message`. Backends that
+        support batched writes should override this.
+        """
+        return [self.add_message(**message) for message in messages]
+
+    @abstractmethod
+    def get_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Retrieve the most recent chat history for a session, oldest first.
+        """
+
+    @abstractmethod
+    def get_messages_after(self, session_id: str, after: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Retrieve up to `limit` messages created after the `after` timestamp, oldest first.
+        """
+
+    @abstractmethod
+    def clear_history(self, session_id: str) -> None:
+        """
+        Clear chat history and the stored summary for a session.
+        """
+
+    @abstractmethod
+    def get_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the rolling summary row for a session.
+
+        Returns a dict with 'summary' and 'covered_until' (created_at of the
+        last message folded into the summary), or None.
+        """
+
+    @abstractmethod
+    def save_summary(self, session_id: str, summary: str, covered_until: str) -> None:
+        """
+        Create or replace the rolling summary row for a session.
+        """
+
+    @abstractmethod
+    def get_all_sessions(self) -> List[str]:
+        """
+        Retrieve all distinct session IDs.
+        """
+
+    @abstractmethod
+    def ping(self) -> bool:
+        """
+        Perform a cheap round trip to the storage to verify it is reachable.
+        """
+
+    def close(self) -> None:
+        """
+        Release any resources held by the backend.
+        """
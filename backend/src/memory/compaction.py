@@ -0,0 +1,248 @@
+"""
+Conversation Compaction Module
+
+This module folds older conversation turns into a rolling per-session summary
+so that the context assembled for each request stays bounded in size.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from .base import MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """Parse a stored message timestamp (ISO string or datetime) into an aware datetime."""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to approximately `max_tokens` tokens."""
+    max_chars = max(max_tokens, 0) * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + "..."
+
+
+class ConversationCompactor:
+    """
+    Incrementally summarizes older turns of a session into a stored summary row.
+
+    Every `compact_every` turns a background job folds all messages except the
+    last `keep_recent` into the session summary. Context assembly then reads
+    the summary plus the last few raw turns, capped at `max_context_tokens`.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryBackend,
+        model_name: str = "gemini-2.0-flash",
+        temperature: float = 0.2,
+        compact_every: int = 6,
+        keep_recent: int = 4,
+        max_context_tokens: int = 1000,
+        max_fold_messages: int = 200,
+    ):
+        """
+        Initialize the Conversation Compactor.
+
+        Args:
+            memory: Memory backend holding history and summary rows
+            model_name: Name of the Gemini model used for summarization
+            temperature: Temperature for model generation
+            compact_every: Number of turns between compaction runs
+            keep_recent: Number of most recent messages kept verbatim
+            max_context_tokens: Token cap for the assembled context
+            max_fold_messages: Maximum messages folded in a single run
+        """
+        self.memory = memory
+        self.compact_every = compact_every
+        self.keep_recent = keep_recent
+        self.max_context_tokens = max_context_tokens
+        self.max_fold_messages = max_fold_messages
+
+        self.llm = ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=temperature,
+        )
+
+        self.prompt_template = ChatPromptTemplate.from_template(
+            """You maintain a running summary of a conversation between a medical student and a medical assistant.
+
+Current summary:
+{summary}
+
+New conversation turns:
+{turns}
+
+Update the summary so it includes the new turns. Keep the topics discussed, the student's goals,
+key medical facts already provided, and any open questions. Write plain prose of at most {max_words} words.
+Return only the updated summary."""
+        )
+
+        self.chain = (
+            self.prompt_template
+            | self.llm
+            | StrOutputParser()
+        )
+
+        # Single worker: compactions never race each other for the same session
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="compaction")
+        self._lock = threading.Lock()
+        self._turn_counts: Dict[str, int] = {}
+        self._pending: set = set()
+
+        logger.info(
+            f"Conversation compactor initialized (every {compact_every} turns, "
+            f"keep {keep_recent}, cap {max_context_tokens} tokens)"
+        )
+
+    def record_turn(self, session_id: str) -> None:
+        """
+        Count a completed turn and schedule compaction when due.
+
+        Args:
+            session_id: Session ID
+        """
+        with self._lock:
+            count = self._turn_counts.get(session_id, 0) + 1
+            self._turn_counts[session_id] = count
+            if count < self.compact_every or session_id in self._pending:
+                return
+            self._turn_counts[session_id] = 0
+            self._pending.add(session_id)
+
+        self._executor.submit(self._run_compaction, session_id)
+
+    def _run_compaction(self, session_id: str) -> None:
+        try:
+            self.compact(session_id)
+        except Exception as e:
+            logger.error(f"Conversation compaction failed for session {session_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(session_id)
+
+    def compact(self, session_id: str) -> bool:
+        """
+        Fold older turns of a session into its summary row.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            True if the summary was updated
+        """
+        summary_row = self.memory.get_summary(session_id)
+        covered_until = summary_row["covered_until"] if summary_row else None
+
+        pending = self.memory.get_messages_after(
+            session_id, after=covered_until, limit=self.max_fold_messages + self.keep_recent
+        )
+        to_fold = pending[:-self.keep_recent] if self.keep_recent else pending
+        if not to_fold:
+            return False
+
+        summary = self.chain.invoke({
+            "summary": summary_row["summary"] if summary_row else "(none yet)",
+            "turns": self._format_messages(to_fold),
+            # The summary gets about a third of the token budget (~0.75 words per token)
+            "max_words": max(self.max_context_tokens // 4, 50),
+        })
+
+        self.memory.save_summary(session_id, summary.strip(), to_fold[-1]["created_at"])
+        logger.info(f"Compacted {len(to_fold)} messages for session {session_id}")
+        return True
+
+    @staticmethod
+    def _format_messages(messages: List[Dict]) -> str:
+        return "\n".join(f"{msg['role'].upper()}: {msg['content']}" for msg in messages)
+
+    def build_context(self, session_id: str) -> str:
+        """
+        Assemble the session summary plus every raw turn it does not cover yet.
+
+        Raw turns take priority over the summary; the oldest turns are dropped
+        first when the token cap is reached.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Formatted conversation context
+        """
+        summary_row = self.memory.get_summary(session_id)
+        covered_until = summary_row["covered_until"] if summary_row else None
+
+        limit = self.max_fold_messages + self.keep_recent
+        recent = self.memory.get_messages_after(session_id, after=covered_until, limit=limit)
+        if len(recent) >= limit:
+            # More uncovered messages than one page (e.g. compaction keeps failing): keep the newest
+            recent = self.memory.get_history(session_id, limit=limit)
+            if covered_until:
+                cutoff = parse_timestamp(covered_until)
+                recent = [msg for msg in recent if parse_timestamp(msg["created_at"]) > cutoff]
+
+        return self.fit_context(
+            summary_row["summary"] if summary_row else None,
+            recent,
+        )
+
+    def fit_context(self, summary: Optional[str], messages: List[Dict]) -> str:
+        """
+        Format a summary and messages within the token cap.
+
+        Args:
+            summary: Rolling summary text, if any
+            messages: Recent messages, oldest first
+
+        Returns:
+            Formatted conversation context
+        """
+        budget = self.max_context_tokens
+        # Reserve part of the budget for the summary so it is never crowded out entirely
+        summary_reserve = min(estimate_tokens(summary), budget // 3) if summary else 0
+        remaining = budget - summary_reserve
+
+        turn_parts = []
+        for msg in reversed(messages):
+            line = f"{msg['role'].upper()}: {msg['content']}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                if not turn_parts and remaining > 0:
+                    turn_parts.append(truncate_to_tokens(line, remaining))
+                    remaining = 0
+                break
+            turn_parts.append(line)
+            remaining -= cost
+        turn_parts.reverse()
+
+        context_parts = []
+        if summary:
+            summary_budget = summary_reserve + remaining
+            context_parts.append(f"SUMMARY OF EARLIER CONVERSATION: {truncate_to_tokens(summary, summary_budget)}")
+        context_parts.extend(turn_parts)
+
+        return "\n".join(context_parts)
+
+    def shutdown(self) -> None:
+        """Stop the background worker after pending compactions finish."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,214 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from .base import MemoryBackend
+
+
+class SQLiteMemory(MemoryBackend):
+    """
+    Local conversation memory backed by SQLite in WAL mode.
+
+    Intended for single-node deployments and offline tests. Each thread gets
+    its own connection; SQL text is kept constant so sqlite3's per-connection
+    statement cache reuses the prepared statements.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata TEXT NOT NULL DEFAULT '{}',
+            thinking_time REAL,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_chat_history_session_created
+            ON chat_history(session_id, created_at);
+        CREATE TABLE IF NOT EXISTS chat_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            covered_until TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    """
+
+    _INSERT_SQL = (
+        "INSERT INTO chat_history (id, session_id, role, content, metadata, thinking_time, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    _HISTORY_SQL = (
+        "SELECT id, session_id, role, content, metadata, thinking_time, created_at FROM ("
+        "SELECT rowid AS rid, * FROM chat_history WHERE session_id = ? "
+        "ORDER BY created_at DESC, rid DESC LIMIT ?"
+        ") ORDER BY created_at ASC, rid ASC"
+    )
+    _AFTER_SQL = (
+        "SELECT id, session_id, role, content, metadata, thinking_time, created_at FROM chat_history "
+        "WHERE session_id = ? AND created_at > ? ORDER BY created_at ASC, rowid ASC LIMIT ?"
+    )
+    _DELETE_SQL = "DELETE FROM chat_history WHERE session_id = ?"
+    _DELETE_SUMMARY_SQL = "DELETE FROM chat_summaries WHERE session_id = ?"
+    _GET_SUMMARY_SQL = "SELECT session_id, summary, covered_until, updated_at FROM chat_summaries WHERE session_id = ?"
+    _SAVE_SUMMARY_SQL = (
+        "INSERT INTO chat_summaries (session_id, summary, covered_until, updated_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, "
+        "covered_until = excluded.covered_until, updated_at = excluded.updated_at"
+    )
+    _SESSIONS_SQL = "SELECT DISTINCT session_id FROM chat_history"
+
+    def __init__(self, db_path: str = "medchat_memory.db"):
+        self.db_path = db_path
+        self.table_name = "chat_history"
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.executescript(self._SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection owned by the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=128)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _now() -> str:
+        # Fixed-width ISO timestamps sort lexicographically in insertion order.
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["metadata"] = json.loads(record["metadata"]) if record["metadata"] else {}
+        return record
+
+    def _build_row(self, session_id: str, role: str, content: str, metadata: Optional[Dict[str, Any]], thinking_time: Optional[float]) -> tuple:
+        return (
+            str(uuid.uuid4()),
+            session_id,
+            role,
+            content,
+            json.dumps(metadata or {}, ensure_ascii=False),
+            thinking_time,
+            self._now(),
+        )
+
+    def add_message(self, session_id: str, role: str, content: str, metadata: Dict[str, Any] = None, thinking_time: float = None) -> Dict[str, Any]:
+        """
+        Add a message to the chat history.
+        """
+        row = self._build_row(session_id, role, content, metadata, thinking_time)
+        conn = self._connection()
+        with conn:
+            conn.execute(self._INSERT_SQL, row)
+        return {
+            "id": row[0],
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "metadata": metadata or {},
+            "thinking_time": thinking_time,
+            "created_at": row[6],
+        }
+
+    def add_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add several messages in a single transaction.
+        """
+        rows = [
+            self._build_row(
+                m["session_id"], m["role"], m["content"], m.get("metadata"), m.get("thinking_time")
+            )
+            for m in messages
+        ]
+        conn = self._connection()
+        with conn:
+            conn.executemany(self._INSERT_SQL, rows)
+        return [
+            {
+                "id": row[0],
+                "session_id": row[1],
+                "role": row[2],
+                "content": row[3],
+                "metadata": json.loads(row[4]),
+                "thinking_time": row[5],
+                "created_at": row[6],
+            }
+            for row in rows
+        ]
+
+    def get_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Retrieve the most recent chat history for a session, oldest first.
+        """
+        rows = self._connection().execute(self._HISTORY_SQL, (session_id, limit)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get_messages_after(self, session_id: str, after: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Retrieve up to `limit` messages created after the `after` timestamp, oldest first.
+        """
+        rows = self._connection().execute(self._AFTER_SQL, (session_id, after or "", limit)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def clear_history(self, session_id: str) -> None:
+        """
+        Clear chat history and the stored summary for a session.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute(self._DELETE_SQL, (session_id,))
+            conn.execute(self._DELETE_SUMMARY_SQL, (session_id,))
+
+    def get_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the rolling summary row for a session.
+        """
+        row = self._connection().execute(self._GET_SUMMARY_SQL, (session_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save_summary(self, session_id: str, summary: str, covered_until: str) -> None:
+        """
+        Create or replace the rolling summary row for a session.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute(self._SAVE_SUMMARY_SQL, (session_id, summary, covered_until, self._now()))
+
+    def get_all_sessions(self) -> List[str]:
+        """
+        Retrieve all distinct session IDs.
+        """
+        rows = self._connection().execute(self._SESSIONS_SQL).fetchall()
+        return [row["session_id"] for row in rows]
+
+    def ping(self) -> bool:
+        """
+        Verify the database can be queried.
+        """
+        self._connection().execute("SELECT 1").fetchone()
+        return True
+
+    def close(self) -> None:
+        """
+        Close the calling thread's connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -1,11 +1,14 @@
 import os
-from typing import List, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from .base import MemoryBackend
+
 load_dotenv()
 
-class SupabaseMemory:
+class SupabaseMemory(MemoryBackend):
     def __init__(self):
         self.url: str = os.environ.get("SUPABASE_URL")
         self.key: str = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
@@ -15,6 +18,7 @@ class SupabaseMemory:
             
         self.client: Client = create_client(self.url, self.key)
         self.table_name = "chat_history"
+        self.summary_table_name = "chat_summaries"
 
     def add_message(self, session_id: str, role: str, content: str, metadata: Dict[str, Any] = None, thinking_time: float = None) -> Dict[str, Any]:
         """
@@ -34,24 +38,83 @@ class SupabaseMemory:
         response = self.client.table(self.table_name).insert(data).execute()
         return response.data[0] if response.data else None
 
+    def add_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add several messages with a single insert request.
+        """
+        if not messages:
+            return []
+
+        data = [
+            {
+                "session_id": m["session_id"],
+                "role": m["role"],
+                "content": m["content"],
+                "metadata": m.get("metadata") or {},
+                "thinking_time": m.get("thinking_time"),
+            }
+            for m in messages
+        ]
+
+        response = self.client.table(self.table_name).insert(data).execute()
+        return response.data or []
+
     def get_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
-        Retrieve chat history for a session.
+        Retrieve the most recent chat history for a session, oldest first.
         """
         response = self.client.table(self.table_name)\
             .select("*")\
             .eq("session_id", session_id)\
-            .order("created_at", desc=False)\
+            .order("created_at", desc=True)\
             .limit(limit)\
             .execute()
             
-        return response.data
+        return list(reversed(response.data or []))
+
+    def get_messages_after(self, session_id: str, after: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Retrieve up to `limit` messages created after the `after` timestamp, oldest first.
+        """
+        query = self.client.table(self.table_name)\
+            .select("*")\
+            .eq("session_id", session_id)
+        if after:
+            query = query.gt("created_at", after)
+
+        response = query.order("created_at", desc=False).limit(limit).execute()
+        return response.data or []
 
     def clear_history(self, session_id: str) -> None:
         """
-        Clear chat history for a session.
+        Clear chat history and the stored summary for a session.
         """
         self.client.table(self.table_name).delete().eq("session_id", session_id).execute()
+        self.client.table(self.summary_table_name).delete().eq("session_id", session_id).execute()
+
+    def get_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the rolling summary row for a session.
+        """
+        response = self.client.table(self.summary_table_name)\
+            .select("*")\
+            .eq("session_id", session_id)\
+            .limit(1)\
+            .execute()
+        return response.data[0] if response.data else None
+
+    def save_summary(self, session_id: str, summary: str, covered_until: str) -> None:
+        """
+        Create or replace the rolling summary row for a session.
+        """
+        data = {
+            "session_id": session_id,
+            "summary": summary,
+            "covered_until": covered_until,
+            # The column default only applies on insert
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.client.table(self.summary_table_name).upsert(data).execute()
 
     def get_all_sessions(self) -> List[str]:
         """
@@ -70,3 +133,10 @@ class SupabaseMemory:
             # Dedup and return
             return list(set(item["session_id"] for item in response.data))
         return []
+
+    def ping(self) -> bool:
+        """
+        Verify the Supabase table can be queried.
+        """
+        self.client.table(self.table_name).select("id").limit(1).execute()
+        return True
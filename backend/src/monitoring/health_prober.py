@@ -0,0 +1,141 @@
+"""
+Health Prober Module
+
+This module refreshes component health in a background thread so that health
+and readiness endpoints can serve a cached snapshot without calling remote
+dependencies on every probe.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Periodically runs component health probes and caches the results.
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Callable[[], bool]],
+        interval: float = 30.0,
+        timeout: float = 5.0,
+    ):
+        """
+        Initialize the Health Prober.
+
+        Args:
+            probes: Mapping of component name to a callable returning True when healthy
+            interval: Seconds between refreshes
+            timeout: Seconds to wait for each probe before marking it unhealthy
+        """
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+
+        # Two workers per probe so a hung probe cannot starve the next refresh
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(2 * len(probes), 1),
+            thread_name_prefix="health-probe",
+        )
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start refreshing in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+        logger.info(f"Health prober started (interval {self.interval}s, timeout {self.timeout}s)")
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Health prober stopped")
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def refresh(self) -> Dict:
+        """
+        Run all probes concurrently and update the cached snapshot.
+
+        Returns:
+            The new snapshot
+        """
+        started = time.time()
+        futures: Dict[str, Optional[Future]] = {}
+        for name, probe in self.probes.items():
+            previous = self._in_flight.get(name)
+            if previous is not None and not previous.done():
+                # The previous run is still hanging; do not pile up more calls
+                futures[name] = None
+                continue
+            futures[name] = self._in_flight[name] = self._executor.submit(probe)
+
+        components: Dict[str, bool] = {}
+        errors: Dict[str, str] = {}
+        deadline = started + self.timeout
+        for name, future in futures.items():
+            if future is None:
+                components[name] = False
+                errors[name] = "previous probe still running"
+                continue
+            try:
+                components[name] = bool(future.result(timeout=max(deadline - time.time(), 0)))
+            except FutureTimeoutError:
+                components[name] = False
+                errors[name] = f"timed out after {self.timeout}s"
+            except Exception as e:
+                components[name] = False
+                errors[name] = str(e)
+
+        for name, error in errors.items():
+            logger.warning(f"Health probe '{name}' failed: {error}")
+
+        snapshot = {
+            "components": components,
+            "errors": errors,
+            "checked_at": time.time(),
+            "duration": time.time() - started,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self) -> Optional[Dict]:
+        """
+        Return the latest cached snapshot with its age, without probing.
+
+        Returns:
+            Snapshot dictionary with "age_seconds", or None before the first refresh
+        """
+        with self._lock:
+            if self._snapshot is None:
+                return None
+            snapshot = dict(self._snapshot)
+        snapshot["age_seconds"] = time.time() - snapshot["checked_at"]
+        return snapshot
+
+    def is_stale(self, snapshot: Optional[Dict] = None) -> bool:
+        """Whether the snapshot is missing or older than three refresh intervals."""
+        snapshot = snapshot or self.snapshot()
+        return snapshot is None or snapshot["age_seconds"] > 3 * self.interval + self.timeout
@@ -12,6 +12,17 @@ create table if not exists chat_history (
 -- Create an index on session_id for faster retrieval
 create index if not exists idx_chat_history_session_id on chat_history(session_id);
 
+-- Composite index for "most recent messages of a session" lookups
+create index if not exists idx_chat_history_session_created on chat_history(session_id, created_at);
+
+-- Rolling per-session summary of older turns (conversation compaction)
+create table if not exists chat_summaries (
+  session_id text primary key,
+  summary text not null,
+  covered_until timestamp with time zone not null,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
 -- Enable Row Level Security (RLS)
 alter table chat_history enable row level security;
 
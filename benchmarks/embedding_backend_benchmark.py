@@ -0,0 +1,84 @@
+# =========================
+# EMBEDDING BACKEND BENCHMARK
+# =========================
+# Compares ingestion throughput of the PyTorch (HuggingFace) embedding model
+# against the int8-quantized ONNX backend, and checks that both produce
+# compatible vectors. The embedding cache is bypassed so every chunk is embedded.
+#
+# Usage:
+#   python benchmarks/embedding_backend_benchmark.py --pdf book.pdf
+#   python benchmarks/embedding_backend_benchmark.py --synthetic 2000 --batch-size 32 --threads 4
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+
+from medical_rag import EMBEDDING_MODEL_NAME, EMBED_WORKERS, create_vectorstore, process_standard_pdf
+from onnx_embeddings import ONNX_BATCH_SIZE, ONNX_INTRA_OP_THREADS, OnnxEmbeddings, check_compatibility
+
+def synthetic_chunks(count, seed=0):
+    """Chunks of 20-200 words, so length sorting has uneven batches to work with."""
+    rng = random.Random(seed)
+    words = ("patient clinical diagnosis treatment cardiac renal therapy dose symptom chronic acute "
+             "hypertension insulin creatinine infection antibiotic").split()
+    return [
+        Document(page_content=" ".join(rng.choice(words) for _ in range(rng.randint(20, 200))),
+                 metadata={"source": "synthetic", "page": i})
+        for i in range(count)
+    ]
+
+def load_huggingface():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': False},
+    )
+
+def run_backend(name, loader, chunks, workers):
+    started = time.time()
+    embeddings = loader()
+    load_seconds = time.time() - started
+    _, report = create_vectorstore(chunks, embeddings, tempfile.mkdtemp(prefix=f"embed_bench_{name}_"), workers=workers)
+    return embeddings, {"load_seconds": round(load_seconds, 2), **report}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and int8 ONNX embedding throughput.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pdf")
+    source.add_argument("--synthetic", type=int, metavar="CHUNKS")
+    parser.add_argument("--batch-size", type=int, default=ONNX_BATCH_SIZE, help="ONNX texts per inference call")
+    parser.add_argument("--threads", type=int, default=ONNX_INTRA_OP_THREADS, help="ONNX intra-op threads")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="Concurrent ingestion workers")
+    args = parser.parse_args()
+
+    chunks = process_standard_pdf(args.pdf) if args.pdf else synthetic_chunks(args.synthetic)
+    print(f"Chunks: {len(chunks)}  Workers: {args.workers}  ONNX batch: {args.batch_size}  ONNX threads: {args.threads}")
+
+    hf, hf_report = run_backend("huggingface", load_huggingface, chunks, args.workers)
+    onnx, onnx_report = run_backend(
+        "onnx", lambda: OnnxEmbeddings(EMBEDDING_MODEL_NAME, batch_size=args.batch_size, intra_op_threads=args.threads),
+        chunks, args.workers,
+    )
+
+    print(f"{'':<13}{'load_s':>9}{'embed_s':>10}{'total_s':>10}{'chunks/s':>11}")
+    for name, report in (("huggingface", hf_report), ("onnx-int8", onnx_report)):
+        print(f"{name:<13}{report['load_seconds']:>9}{report['embed_seconds']:>10}"
+              f"{report['total_seconds']:>10}{report['chunks_per_sec']:>11}")
+    if hf_report["chunks_per_sec"]:
+        print(f"Speedup: {onnx_report['chunks_per_sec'] / hf_report['chunks_per_sec']:.2f}x")
+
+    sample = [c.page_content for c in random.Random(1).sample(chunks, min(64, len(chunks)))]
+    compat = check_compatibility(onnx, hf, sample)
+    print(f"Compatibility: min cosine {compat['min_cosine']:.4f}, mean cosine {compat['mean_cosine']:.4f}, "
+          f"max abs diff {compat['max_abs_diff']:.4f} -> {'OK' if compat['compatible'] else 'FAIL'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# =========================
+# IMAGE REFERENCE BENCHMARK
+# =========================
+# Compares chunk count and embedding tokens when OCR images are inlined as
+# base64 data URIs (old behaviour) versus stored in the image store and
+# referenced as image://<sha256>.
+#
+# Usage:
+#   python benchmarks/image_refs_benchmark.py --pdf book.pdf          # runs Mistral OCR (needs MISTRAL_API_KEY)
+#   python benchmarks/image_refs_benchmark.py --ocr-json pages.json   # saved OCR pages
+#   python benchmarks/image_refs_benchmark.py --synthetic 200         # synthetic scanned pages
+
+import os
+import sys
+import json
+import random
+import base64
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from image_store import ImageStore
+from medical_rag import CHUNK_SIZE, CHUNK_OVERLAP, replace_images_in_markdown
+
+def load_ocr_json(path):
+    """Pages as [{"markdown": str, "images": [{"id": str, "image_base64": str}]}]."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["pages"] if isinstance(data, dict) else data
+
+def ocr_pdf(path):
+    from medical_rag import get_mistral_client, upload_pdf, ocr_pages, OCR_PAGE_WINDOW
+    from pypdf import PdfReader
+
+    client = get_mistral_client()
+    if not client:
+        raise SystemExit("MISTRAL_API_KEY is not set")
+    signed_url = upload_pdf(client, path)
+    total = len(PdfReader(path).pages)
+    pages = []
+    for start in range(0, total, OCR_PAGE_WINDOW):
+        for page in ocr_pages(client, signed_url, list(range(start, min(start + OCR_PAGE_WINDOW, total)))):
+            pages.append({
+                "markdown": page.markdown,
+                "images": [{"id": img.id, "image_base64": img.image_base64} for img in page.images],
+            })
+    return pages
+
+def synthetic_pages(count, seed=0):
+    """Scanned-textbook-like pages: ~2.5k chars of text and 0-2 figures of 20-60KB each."""
+    rng = random.Random(seed)
+    words = "patient clinical diagnosis treatment cardiac renal therapy dose symptom chronic acute".split()
+    pages = []
+    for i in range(count):
+        text = " ".join(rng.choice(words) for _ in range(400))
+        images = []
+        for j in range(rng.choice([0, 1, 1, 2])):
+            name = f"img-{i}-{j}.jpeg"
+            payload = b"\xff\xd8\xff" + rng.randbytes(rng.randint(20_000, 60_000))
+            images.append({"id": name, "image_base64": base64.b64encode(payload).decode()})
+            text += f"\n\n![{name}]({name})\n\n" + " ".join(rng.choice(words) for _ in range(60))
+        pages.append({"markdown": text, "images": images})
+    return pages
+
+def inline_images(markdown, images):
+    for img in images:
+        data = img["image_base64"]
+        uri = data if data.startswith("data:") else f"data:image/jpeg;base64,{data}"
+        markdown = markdown.replace(f"![{img['id']}]({img['id']})", f"![{img['id']}]({uri})")
+    return markdown
+
+def measure(texts):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = [c for t in texts for c in splitter.split_text(t) if c.strip()]
+    chars = sum(len(c) for c in chunks)
+    # ~4 characters per token, the same estimate used for context budgeting
+    return {"chunks": len(chunks), "chars": chars, "est_tokens": chars // 4}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare chunk and token counts for inlined versus stored OCR images.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pdf")
+    source.add_argument("--ocr-json")
+    source.add_argument("--synthetic", type=int, metavar="PAGES")
+    args = parser.parse_args()
+
+    if args.pdf:
+        pages = ocr_pdf(args.pdf)
+    elif args.ocr_json:
+        pages = load_ocr_json(args.ocr_json)
+    else:
+        pages = synthetic_pages(args.synthetic)
+
+    store = ImageStore(tempfile.mkdtemp(prefix="image_store_bench_"))
+    inline = measure(inline_images(p["markdown"], p["images"]) for p in pages)
+    refs = measure(
+        replace_images_in_markdown(p["markdown"], {img["id"]: img["image_base64"] for img in p["images"]}, store)
+        for p in pages
+    )
+
+    images = sum(len(p["images"]) for p in pages)
+    print(f"Pages: {len(pages)}  Images: {images}")
+    print(f"{'':<10}{'chunks':>10}{'est_tokens':>14}")
+    print(f"{'inline':<10}{inline['chunks']:>10}{inline['est_tokens']:>14}")
+    print(f"{'refs':<10}{refs['chunks']:>10}{refs['est_tokens']:>14}")
+    if inline["chunks"]:
+        print(f"Chunk reduction: {1 - refs['chunks'] / inline['chunks']:.1%}")
+    if inline["est_tokens"]:
+        print(f"Embedding token reduction: {1 - refs['est_tokens'] / inline['est_tokens']:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# =========================
+# REPORT MODE BENCHMARK
+# =========================
+# Compares wall-clock time of the single-shot report against the parallel
+# report mode (outline + concurrent sections + citation merge) over the same
+# retrieved documents, so both modes see identical inputs.
+#
+# Usage:
+#   python benchmarks/report_mode_benchmark.py --query "Management of sepsis" --save-rag rag.json   # retrieves from Qdrant
+#   python benchmarks/report_mode_benchmark.py --rag-json rag.json --query "Management of sepsis" --runs 3 --concurrency 4
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from src.agents.report_agent import ReportAgent
+
+def retrieve(query, k):
+    """RAG results for the query from the configured Qdrant collection."""
+    from config_template import (
+        GOOGLE_API_KEY, QDRANT_URL, QDRANT_API_KEY, GEMINI_MODEL,
+        MEDICAL_COLLECTION_NAME, EMBEDDING_DIMENSION,
+    )
+    from src.data.qdrant_pipeline import QdrantPipeline
+    from src.agents.rag_agent import RAGAgent
+
+    pipeline = QdrantPipeline(
+        qdrant_url=QDRANT_URL,
+        qdrant_api_key=QDRANT_API_KEY,
+        collection_name=MEDICAL_COLLECTION_NAME,
+        embedding_dimension=EMBEDDING_DIMENSION,
+    )
+    agent = RAGAgent(qdrant_pipeline=pipeline, google_api_key=GOOGLE_API_KEY, model_name=GEMINI_MODEL)
+    return agent.answer_question(query, k=k)
+
+def time_mode(agent, mode, query, rag_results, runs):
+    seconds, report = [], ""
+    for _ in range(runs):
+        started = time.time()
+        report = agent.generate_summary_report(query, rag_results=rag_results, mode=mode)
+        seconds.append(time.time() - started)
+    return seconds, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-shot and parallel report generation time.")
+    parser.add_argument("--query", required=True)
+    parser.add_argument("--rag-json", help="Saved RAG results (skips retrieval)")
+    parser.add_argument("--save-rag", help="Write the retrieved RAG results here for later runs")
+    parser.add_argument("--k", type=int, default=8, help="Documents retrieved")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4, help="Sections generated at once")
+    parser.add_argument("--sections", type=int, default=6, help="Maximum planned sections")
+    parser.add_argument("--model", default="gemini-2.0-flash")
+    args = parser.parse_args()
+
+    if args.rag_json:
+        with open(args.rag_json, "r", encoding="utf-8") as f:
+            rag_results = json.load(f)
+    else:
+        rag_results = retrieve(args.query, args.k)
+        if args.save_rag:
+            with open(args.save_rag, "w", encoding="utf-8") as f:
+                json.dump(rag_results, f, ensure_ascii=False, indent=2)
+
+    agent = ReportAgent(
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        model_name=args.model,
+        max_concurrency=args.concurrency,
+        max_sections=args.sections,
+    )
+    print(f"Documents: {len(rag_results.get('retrieved_documents', []))}  Runs: {args.runs}  "
+          f"Concurrency: {args.concurrency}  Max sections: {args.sections}")
+
+    results = {}
+    for mode in ("single", "parallel"):
+        seconds, report = time_mode(agent, mode, args.query, rag_results, args.runs)
+        results[mode] = seconds
+        print(f"{mode:<10} median {statistics.median(seconds):>7.2f}s  min {min(seconds):>7.2f}s  "
+              f"max {max(seconds):>7.2f}s  {len(report):>6} chars")
+
+    print(f"Speedup: {statistics.median(results['single']) / statistics.median(results['parallel']):.2f}x")
+
+if __name__ == "__main__":
+    main()
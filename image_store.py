@@ -0,0 +1,82 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+import os
+import re
+import base64
+import hashlib
+import tempfile
+from typing import Optional
+
+# =========================
+# CONFIGURATION SETTINGS
+# =========================
+
+# Same persistent default as the API's IMAGE_STORE_DIR (backend/config_template.py), which serves these files:
+# image:// references outlive any temp directory
+IMAGE_STORE_DIR = os.getenv("MEDCHAT_IMAGE_STORE_DIR", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "backend", "data", "images"
+))
+IMAGE_REF_SCHEME = "image://"     # Chunks reference stored images as image://<sha256>
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# =========================
+# HELPERS
+# =========================
+
+def image_ref(digest: str) -> str:
+    return f"{IMAGE_REF_SCHEME}{digest}"
+
+def decode_image_base64(data: str) -> bytes:
+    """Decode raw base64 or a data: URI."""
+    if data.startswith("data:"):
+        data = data.split(",", 1)[1]
+    return base64.b64decode(data)
+
+# =========================
+# CONTENT-ADDRESSED IMAGE STORE
+# =========================
+
+class ImageStore:
+    """
+    Stores image bytes on disk under their SHA-256 digest.
+
+    Blobs are sharded as <root>/ab/cd/<digest> so no directory grows too large.
+    Identical images (e.g. repeated logos or figures) are stored once.
+    """
+
+    def __init__(self, root: str = IMAGE_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid image digest: {digest}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data: bytes) -> str:
+        """Store bytes and return their digest; existing blobs are not rewritten."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def put_base64(self, data: str) -> str:
+        return self.put(decode_image_base64(data))
+
+_default_store: Optional[ImageStore] = None
+
+def get_image_store() -> ImageStore:
+    """Shared store under IMAGE_STORE_DIR."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ImageStore()
+    return _default_store
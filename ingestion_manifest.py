@@ -0,0 +1,181 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+import os
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# =========================
+# HASH HELPERS
+# =========================
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def text_sha256(text: str) -> str:
+    """SHA-256 of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# =========================
+# INGESTION MANIFEST
+# =========================
+
+class IngestionManifest:
+    """
+    Persistent record of which files and chunks are already embedded.
+
+    Files are keyed by SHA-256 of their bytes, chunks by SHA-256 of their text.
+    Each file also records a stable document_id (e.g. its upload name), so an
+    edited version of a document can be diffed against the one it replaces.
+    Chunks are recorded as each batch is committed to the vector store, so an
+    interrupted ingestion resumes after the last committed batch.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            file_sha256 TEXT PRIMARY KEY,
+            source_name TEXT,
+            document_id TEXT,
+            status TEXT NOT NULL,
+            chunk_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS chunks (
+            file_sha256 TEXT NOT NULL,
+            chunk_hash TEXT NOT NULL,
+            chunk_id TEXT NOT NULL,
+            batch_no INTEGER NOT NULL,
+            PRIMARY KEY (file_sha256, chunk_hash)
+        );
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self._SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(files)")}
+        if "document_id" not in columns:
+            # Manifests written before versions were tracked: a document is identified by its name
+            self.conn.execute("ALTER TABLE files ADD COLUMN document_id TEXT")
+            self.conn.execute("UPDATE files SET document_id = source_name")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_files_document_id ON files (document_id)")
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    # ----- files -----
+
+    def get_file(self, file_sha: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM files WHERE file_sha256 = ?", (file_sha,)).fetchone()
+        return dict(row) if row else None
+
+    def is_complete(self, file_sha: str) -> bool:
+        record = self.get_file(file_sha)
+        return bool(record) and record["status"] == "complete"
+
+    def start_file(self, file_sha: str, source_name: Optional[str], document_id: Optional[str] = None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO files (file_sha256, source_name, document_id, status, updated_at) "
+                "VALUES (?, ?, ?, 'in_progress', ?) "
+                "ON CONFLICT(file_sha256) DO UPDATE SET status = 'in_progress', "
+                "source_name = COALESCE(excluded.source_name, files.source_name), "
+                "document_id = COALESCE(excluded.document_id, files.document_id), updated_at = excluded.updated_at",
+                (file_sha, source_name, document_id or source_name, self._now()),
+            )
+
+    def complete_file(self, file_sha: str):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE files SET status = 'complete', updated_at = ?, "
+                "chunk_count = (SELECT COUNT(*) FROM chunks WHERE file_sha256 = ?) WHERE file_sha256 = ?",
+                (self._now(), file_sha, file_sha),
+            )
+
+    def other_versions(self, document_id: str, file_sha: str) -> List[str]:
+        """Hashes of other files recorded for the same document (its earlier versions), newest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT file_sha256 FROM files WHERE document_id = ? AND file_sha256 != ? ORDER BY updated_at DESC",
+                (document_id, file_sha),
+            ).fetchall()
+        return [row["file_sha256"] for row in rows]
+
+    def list_files(self) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM files ORDER BY updated_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def remove_file(self, file_sha: str) -> List[str]:
+        """Forget a file and return the IDs of its chunks."""
+        with self.lock, self.conn:
+            ids = [row["chunk_id"] for row in self.conn.execute(
+                "SELECT chunk_id FROM chunks WHERE file_sha256 = ?", (file_sha,)
+            )]
+            self.conn.execute("DELETE FROM chunks WHERE file_sha256 = ?", (file_sha,))
+            self.conn.execute("DELETE FROM files WHERE file_sha256 = ?", (file_sha,))
+        return ids
+
+    # ----- chunks -----
+
+    def committed_chunks(self, file_sha: str) -> Dict[str, str]:
+        """Map chunk_hash -> chunk_id for chunks already in the vector store."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT chunk_hash, chunk_id FROM chunks WHERE file_sha256 = ?", (file_sha,)
+            ).fetchall()
+        return {row["chunk_hash"]: row["chunk_id"] for row in rows}
+
+    def last_batch(self, file_sha: str) -> int:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COALESCE(MAX(batch_no), -1) AS last FROM chunks WHERE file_sha256 = ?", (file_sha,)
+            ).fetchone()
+        return row["last"]
+
+    def plan(self, file_sha: str, chunk_hashes: Iterable[str]) -> Tuple[Set[str], Dict[str, str]]:
+        """
+        Compare the current chunk set with the manifest.
+
+        Returns:
+            (hashes still to embed, {stale chunk_hash: chunk_id} to delete)
+        """
+        current = set(chunk_hashes)
+        committed = self.committed_chunks(file_sha)
+        to_add = current - committed.keys()
+        stale = {h: cid for h, cid in committed.items() if h not in current}
+        return to_add, stale
+
+    def commit_batch(self, file_sha: str, entries: List[Tuple[str, str]], batch_no: int):
+        """Record (chunk_hash, chunk_id) pairs once their batch is in the vector store."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks (file_sha256, chunk_hash, chunk_id, batch_no) VALUES (?, ?, ?, ?)",
+                [(file_sha, h, cid, batch_no) for h, cid in entries],
+            )
+
+    def remove_chunks(self, file_sha: str, chunk_hashes: Iterable[str]):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM chunks WHERE file_sha256 = ? AND chunk_hash = ?",
+                [(file_sha, h) for h in chunk_hashes],
+            )
+
+    def close(self):
+        self.conn.close()
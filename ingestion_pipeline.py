@@ -0,0 +1,381 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+# LangChain core modules
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+# PDF text extraction (runs inside worker processes)
+from pypdf import PdfReader
+
+# System & utility libraries
+import os
+import time
+import uuid
+import queue
+import hashlib
+import argparse
+import threading
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from medical_rag import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    VECTORSTORE_BACKEND,
+    RateLimitThrottle,
+    chunk_id,
+    embed_with_retry,
+    upsert_embeddings,
+    iter_mistral_ocr_pages,
+)
+
+# =========================
+# CONFIGURATION SETTINGS
+# =========================
+
+PAGES_PER_TASK = 16               # Pages extracted per worker task
+QUEUE_SIZE = 8                    # Max items buffered between stages (pages, chunks, batches)
+EMBED_BATCH_SIZE = 64             # Chunks embedded per embedding call
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_SENTINEL = object()
+
+# =========================
+# STAGE METRICS
+# =========================
+
+@dataclass
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+    name: str
+    unit: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def add(self, count: int, seconds: float):
+        if self.started_at is None:
+            self.started_at = time.time() - seconds
+        self.items += count
+        self.busy_seconds += seconds
+
+    @property
+    def wall_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Items per wall-clock second while the stage was active."""
+        return self.items / self.wall_seconds if self.wall_seconds else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "items": self.items,
+            "unit": self.unit,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            f"{self.unit}_per_sec": round(self.rate, 2),
+        }
+
+# =========================
+# PAGE EXTRACTION (PROCESS POOL)
+# =========================
+
+def list_pdfs(path: str) -> List[str]:
+    """Return a single PDF path or all PDFs in a directory (sorted)."""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(".pdf")
+        )
+    return [path]
+
+def count_pdf_pages(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[tuple]:
+    """Extract text of pages [start, end) — executed in a worker process."""
+    reader = PdfReader(file_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+def iter_pdf_pages(file_paths: List[str], executor: ProcessPoolExecutor, max_in_flight: int) -> Iterator[Document]:
+    """Yield one Document per page, in order, extracting page ranges in parallel."""
+    in_flight = deque()
+
+    def drain_one():
+        file_path, future = in_flight.popleft()
+        for page_index, text in future.result():
+            yield Document(
+                page_content=text,
+                metadata={
+                    "source": file_path,
+                    "page": page_index,
+                    "page_number": page_index + 1,
+                    "processing_method": "pypdf",
+                },
+            )
+
+    for file_path in file_paths:
+        total_pages = count_pdf_pages(file_path)
+        print(f"📄 Queued {os.path.basename(file_path)} ({total_pages} pages)")
+        for start in range(0, total_pages, PAGES_PER_TASK):
+            end = min(start + PAGES_PER_TASK, total_pages)
+            in_flight.append((file_path, executor.submit(extract_page_range, file_path, start, end)))
+            # Bound the number of extracted-but-unconsumed pages
+            while len(in_flight) >= max_in_flight:
+                yield from drain_one()
+
+    while in_flight:
+        yield from drain_one()
+
+def iter_ocr_pages(file_paths: List[str]) -> Iterator[Document]:
+    """Page source that OCRs each file with Mistral, one page window at a time."""
+    for file_path in file_paths:
+        print(f"📄 OCR {os.path.basename(file_path)}")
+        yield from iter_mistral_ocr_pages(file_path)
+
+# =========================
+# VECTOR STORE SINKS
+# =========================
+
+def vectorstore_upsert(vectorstore) -> Callable:
+    """Upsert pre-computed embeddings into a local index or a LangChain Chroma store."""
+    def upsert(ids, texts, vectors, metadatas):
+        upsert_embeddings(vectorstore, ids, texts, vectors, metadatas)
+    return upsert
+
+# =========================
+# STREAMING INGESTION PIPELINE
+# =========================
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    """Blocking put that gives up when the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Blocking get that returns the sentinel when the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _SENTINEL
+
+def ingest_pdfs(
+    path: str,
+    embedding_function,
+    upsert_fn: Callable,
+    page_source: Optional[Callable[[List[str]], Iterator[Document]]] = None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    workers: int = EXTRACT_WORKERS,
+    queue_size: int = QUEUE_SIZE,
+) -> Dict:
+    """
+    Stream PDFs through extraction -> chunking -> embedding -> upsert.
+
+    Stages run concurrently and are connected by bounded queues, so memory
+    stays flat regardless of book size and chunks reach the store while later
+    pages are still being extracted.
+
+    Args:
+        path: A PDF file or a directory of PDFs
+        embedding_function: LangChain Embeddings used for chunk vectors
+        upsert_fn: Callable(ids, texts, vectors, metadatas) writing to the store
+        page_source: Optional callable yielding page Documents for the files
+                     (defaults to parallel PyPDF extraction)
+        batch_size: Chunks per embedding call
+        workers: Extraction worker processes
+        queue_size: Capacity of each inter-stage queue
+
+    Returns:
+        Report with per-stage item counts and throughput
+    """
+    file_paths = list_pdfs(path)
+    if not file_paths:
+        raise ValueError(f"No PDF files found at {path}")
+
+    print(f"🚀 Streaming ingestion of {len(file_paths)} file(s) with {workers} extraction workers")
+
+    stats = {
+        "extract": StageStats("extract", "pages"),
+        "chunk": StageStats("chunk", "chunks"),
+        "embed": StageStats("embed", "chunks"),
+        "upsert": StageStats("upsert", "chunks"),
+    }
+    pages_q = queue.Queue(maxsize=queue_size)
+    chunks_q = queue.Queue(maxsize=queue_size * batch_size)
+    batches_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    throttle = RateLimitThrottle()
+    errors = []
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+
+    def run_stage(name, target, out_q):
+        try:
+            target()
+        except Exception as e:
+            print(f"   ❌ Stage '{name}' failed: {e}")
+            errors.append(e)
+            stop.set()
+        finally:
+            stats[name].finished_at = time.time()
+            if out_q is not None:
+                _put(out_q, _SENTINEL, stop)
+
+    def feed_pages(pages):
+        last = time.time()
+        for page in pages:
+            stats["extract"].add(1, time.time() - last)
+            _put(pages_q, page, stop)
+            if stop.is_set():
+                break
+            last = time.time()
+
+    def extract_stage():
+        if page_source:
+            feed_pages(page_source(file_paths))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            feed_pages(iter_pdf_pages(file_paths, executor, workers * 2))
+
+    def chunk_stage():
+        while True:
+            page = _get(pages_q, stop)
+            if page is _SENTINEL:
+                return
+            t0 = time.time()
+            chunks = [c for c in text_splitter.split_documents([page]) if c.page_content.strip()]
+            for chunk in chunks:
+                chunk.metadata.update({
+                    "doc_id": str(uuid.uuid4()),
+                    "chunk_hash": hashlib.md5(chunk.page_content.encode()).hexdigest()[:8]
+                })
+            stats["chunk"].add(len(chunks), time.time() - t0)
+            for chunk in chunks:
+                _put(chunks_q, chunk, stop)
+
+    def embed_stage():
+        seen_ids = set()
+        batch = []
+
+        def flush():
+            t0 = time.time()
+            vectors, _ = embed_with_retry(embedding_function, [c.page_content for c in batch], throttle)
+            stats["embed"].add(len(batch), time.time() - t0)
+            _put(batches_q, (list(batch), vectors), stop)
+            batch.clear()
+
+        while True:
+            chunk = _get(chunks_q, stop)
+            if chunk is _SENTINEL:
+                break
+            cid = chunk_id(chunk.page_content)
+            if cid in seen_ids:
+                continue
+            seen_ids.add(cid)
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                flush()
+        if batch and not stop.is_set():
+            flush()
+
+    threads = [
+        threading.Thread(target=run_stage, args=("extract", extract_stage, pages_q), daemon=True),
+        threading.Thread(target=run_stage, args=("chunk", chunk_stage, chunks_q), daemon=True),
+        threading.Thread(target=run_stage, args=("embed", embed_stage, batches_q), daemon=True),
+    ]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+
+    # Upsert stage runs on the calling thread
+    try:
+        while True:
+            item = _get(batches_q, stop)
+            if item is _SENTINEL:
+                break
+            chunks, vectors = item
+            t0 = time.time()
+            upsert_fn(
+                [chunk_id(c.page_content) for c in chunks],
+                [c.page_content for c in chunks],
+                vectors,
+                [c.metadata for c in chunks],
+            )
+            stats["upsert"].add(len(chunks), time.time() - t0)
+            print(f"   ✅ Upserted {stats['upsert'].items} chunks "
+                  f"({stats['extract'].items} pages extracted)")
+    except Exception as e:
+        print(f"   ❌ Stage 'upsert' failed: {e}")
+        errors.append(e)
+        stop.set()
+    finally:
+        stats["upsert"].finished_at = time.time()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    total_seconds = time.time() - started
+    report = {
+        "files": len(file_paths),
+        "pages": stats["extract"].items,
+        "chunks": stats["upsert"].items,
+        "total_seconds": round(total_seconds, 3),
+        "stages": {name: stage.as_dict() for name, stage in stats.items()},
+    }
+
+    print(f"✅ Ingestion complete: {report['pages']} pages, {report['chunks']} chunks in {total_seconds:.1f}s")
+    for name, stage in stats.items():
+        print(f"   {name:<8} {stage.items:>7} {stage.unit:<6} {stage.rate:>9.1f} {stage.unit}/sec")
+    return report
+
+# =========================
+# ENTRY POINT
+# =========================
+
+def main():
+    from medical_rag import get_embedding_function, make_vectorstore
+
+    parser = argparse.ArgumentParser(description=f"Stream PDFs into a vector store (backend: {VECTORSTORE_BACKEND}).")
+    parser.add_argument("path", help="PDF file or directory of PDFs")
+    parser.add_argument(
+        "--db",
+        default="medical_vector_index" if VECTORSTORE_BACKEND == "local" else "medical_chroma_db",
+        help="Vector store directory (MEDCHAT_VECTORSTORE_BACKEND selects the local index or Chroma)",
+    )
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS)
+    parser.add_argument("--ocr", action="store_true", help="Extract pages with Mistral OCR instead of PyPDF")
+    args = parser.parse_args()
+
+    embeddings = get_embedding_function()
+    vectorstore = make_vectorstore(args.db, embeddings)
+    ingest_pdfs(
+        args.path,
+        embeddings,
+        vectorstore_upsert(vectorstore),
+        page_source=iter_ocr_pages if args.ocr else None,
+        batch_size=args.batch_size,
+        workers=args.workers,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+import os
+import re
+import json
+import uuid
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:               # Optional: only needed for the approximate tier
+    hnswlib = None
+
+# =========================
+# CONFIGURATION SETTINGS
+# =========================
+
+HNSW_MIN_ROWS = 50_000            # Live vectors before queries switch from exact search to HNSW
+HNSW_M = 16                       # Graph degree
+HNSW_EF_CONSTRUCTION = 200        # Build-time candidate list size
+HNSW_EF_SEARCH = 64               # Query-time candidate list size (raised to k when k is larger)
+SEARCH_BLOCK_ROWS = 65_536        # Rows scored per NumPy block, bounds temporary memory
+
+DISTANCES = ("l2", "cosine", "ip")
+
+_FILTER_KEY_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+# =========================
+# LOCAL VECTOR INDEX
+# =========================
+
+class LocalVectorIndex(VectorStore):
+    """
+    Lightweight on-disk vector store for single-document sessions.
+
+    Vectors are appended to a memory-mapped float32/float16 file; ids, texts and
+    metadata live in a SQLite sidecar mapping each id to its row. Queries are an
+    exact vectorized NumPy scan (squared L2 by default, like Chroma). When
+    hnswlib is installed and the index holds at least HNSW_MIN_ROWS live
+    vectors, unfiltered queries use an HNSW graph built from the same rows.
+    Deleted or replaced rows are masked out rather than rewritten.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS docs (
+            row INTEGER PRIMARY KEY,
+            id TEXT NOT NULL,
+            text TEXT NOT NULL,
+            metadata TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_docs_live_id ON docs (id) WHERE deleted = 0;
+    """
+
+    def __init__(self, path: str, embedding_function: Embeddings, dtype: str = "float32",
+                 distance: str = "l2", use_hnsw: Optional[bool] = None):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16'")
+        if distance not in DISTANCES:
+            raise ValueError(f"distance must be one of {', '.join(DISTANCES)}")
+        self.path = path
+        self.embedding_function = embedding_function
+        self.use_hnsw = (hnswlib is not None) if use_hnsw is None else use_hnsw
+        if self.use_hnsw and hnswlib is None:
+            raise ImportError("hnswlib is required for use_hnsw=True (pip install hnswlib)")
+
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.bin")
+        self.hnsw_path = os.path.join(path, "hnsw.bin")
+        self.conn = sqlite3.connect(os.path.join(path, "metadata.sqlite3"), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self._SCHEMA)
+        self.conn.commit()
+        self.lock = threading.RLock()
+
+        # Settings of an existing index win over constructor arguments
+        settings = dict(self.conn.execute("SELECT key, value FROM settings").fetchall())
+        self.dtype = np.dtype(settings.get("dtype", dtype))
+        self.distance = settings.get("distance", distance)
+        self.dim = int(settings["dim"]) if "dim" in settings else None
+
+        self._rows = 0
+        self._live = np.zeros(0, dtype=bool)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._mmap = None
+        self._mapped_rows = 0
+        self._hnsw = None
+        self._data_version = None
+        self._refresh()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    # ----- storage -----
+
+    def _vectors(self) -> np.ndarray:
+        """Memory map of all written rows, remapped when the file has grown."""
+        if self._mmap is None or self._mapped_rows != self._rows:
+            self._mmap = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self.dim))
+            self._mapped_rows = self._rows
+        return self._mmap
+
+    def _refresh(self):
+        """Pick up rows written or deleted through another connection (e.g. another process sharing the directory)."""
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        if self.dim is None:
+            row = self.conn.execute("SELECT value FROM settings WHERE key = 'dim'").fetchone()
+            self.dim = int(row[0]) if row else None
+        start = self._rows
+        self._rows = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM docs").fetchone()[0]
+        self._live = np.zeros(self._rows, dtype=bool)
+        self._live[[r for (r,) in self.conn.execute("SELECT row FROM docs WHERE deleted = 0")]] = True
+        if self._rows > start:
+            self._norms = np.concatenate([self._norms, self._compute_norms(start, self._rows)])
+        if self._hnsw is not None:
+            if self._rows > start:
+                self._hnsw_add(start, self._rows)
+            self._hnsw_mark_deleted(np.flatnonzero(~self._live))
+
+    def _compute_norms(self, start: int, end: int) -> np.ndarray:
+        """Squared L2 norms (or L2 norms for cosine) of rows start..end, used to score without rereading."""
+        vectors = self._vectors()
+        parts = []
+        for i in range(start, end, SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[i:min(i + SEARCH_BLOCK_ROWS, end)], dtype=np.float32)
+            sq = np.einsum("ij,ij->i", block, block)
+            parts.append(np.sqrt(sq) if self.distance == "cosine" else sq)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def upsert(self, ids: List[str], texts: List[str], vectors: Sequence[Sequence[float]],
+               metadatas: Optional[List[dict]] = None):
+        """
+        Write pre-computed embeddings; an existing id is replaced by the new row.
+
+        Rows are reserved under SQLite's write lock (BEGIN IMMEDIATE), so
+        processes sharing the index directory cannot claim the same rows.
+        """
+        if not ids:
+            return
+        metadatas = metadatas or [{} for _ in ids]
+        data = np.asarray(vectors, dtype=self.dtype)
+        with self.lock:
+            self._refresh()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-read under the lock: another process may have set the dimension or appended rows
+                row = self.conn.execute("SELECT value FROM settings WHERE key = 'dim'").fetchone()
+                dim = int(row[0]) if row else data.shape[1]
+                if data.shape[1] != dim:
+                    raise ValueError(f"Embedding dimension {data.shape[1]} does not match index dimension {dim}")
+                if row is None:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                        [("dim", str(dim)), ("dtype", self.dtype.name), ("distance", self.distance)],
+                    )
+                start = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM docs").fetchone()[0]
+
+                # Vectors reach the disk before the sidecar points at them
+                mode = "r+b" if os.path.exists(self.vectors_path) else "wb"
+                with open(self.vectors_path, mode) as f:
+                    f.seek(start * dim * self.dtype.itemsize)
+                    f.write(data.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                replaced = self._live_rows(ids)
+                rows = list(range(start, start + len(ids)))
+                if replaced:
+                    self.conn.executemany("UPDATE docs SET deleted = 1 WHERE row = ?", [(r,) for r in replaced])
+                self.conn.executemany(
+                    "INSERT INTO docs (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                    [(r, i, t, json.dumps(m or {}, ensure_ascii=False))
+                     for r, i, t, m in zip(rows, ids, texts, metadatas)],
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.dim = dim
+
+            if start != self._rows:
+                # Another writer committed in between: reload its rows along with ours
+                self._data_version = None
+                self._refresh()
+                return
+            self._rows += len(ids)
+            self._live = np.concatenate([self._live, np.ones(len(ids), dtype=bool)])
+            self._live[replaced] = False
+            self._norms = np.concatenate([self._norms, self._compute_norms(start, self._rows)])
+            if self._hnsw is not None:
+                self._hnsw_mark_deleted(replaced)
+                self._hnsw_add(start, self._rows)
+
+    def _live_rows(self, ids: List[str]) -> List[int]:
+        rows = []
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            placeholders = ",".join("?" * len(part))
+            rows.extend(r for (r,) in self.conn.execute(
+                f"SELECT row FROM docs WHERE deleted = 0 AND id IN ({placeholders})", part
+            ))
+        return rows
+
+    # ----- VectorStore API -----
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        self.upsert(ids, texts, self.embedding_function.embed_documents(texts), metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self.lock:
+            self._refresh()
+            rows = self._live_rows(list(ids))
+            with self.conn:
+                self.conn.executemany("UPDATE docs SET deleted = 1 WHERE row = ?", [(r,) for r in rows])
+            self._live[rows] = False
+            if self._hnsw is not None:
+                self._hnsw_mark_deleted(rows)
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        found = {
+            row[0]: Document(id=row[0], page_content=row[1], metadata=json.loads(row[2]))
+            for row in self.conn.execute(
+                f"SELECT id, text, metadata FROM docs WHERE deleted = 0 AND id IN ({placeholders})", list(ids)
+            )
+        }
+        return [found[i] for i in ids if i in found]
+
+    def get_vectors(self, ids: Sequence[str]) -> Dict[str, List[float]]:
+        """Stored embeddings of live ids, e.g. to copy rows without embedding them again."""
+        with self.lock:
+            self._refresh()
+            rows = {}
+            for i in range(0, len(ids), 500):
+                part = list(ids[i:i + 500])
+                placeholders = ",".join("?" * len(part))
+                rows.update(self.conn.execute(
+                    f"SELECT id, row FROM docs WHERE deleted = 0 AND id IN ({placeholders})", part
+                ).fetchall())
+            if not rows:
+                return {}
+            vectors = self._vectors()
+            return {i: np.asarray(vectors[r], dtype=np.float32).tolist() for i, r in rows.items()}
+
+    def count(self) -> int:
+        with self.lock:
+            self._refresh()
+            return int(self._live.sum())
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """Top-k (document, distance) pairs, closest first. filter matches metadata ({key: value} or {key: {"$in": [...]}})."""
+        with self.lock:
+            self._refresh()
+            if not self._rows or k <= 0:
+                return []
+            query = np.asarray(embedding, dtype=np.float32)
+            if filter:
+                rows, distances = self._search_exact(query, k, self._filter_rows(filter))
+            elif self.use_hnsw and self.count() >= HNSW_MIN_ROWS:
+                rows, distances = self._search_hnsw(query, k)
+            else:
+                rows, distances = self._search_exact(query, k)
+        return self._documents(rows, distances)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        if self.distance == "cosine":
+            return self._cosine_relevance_score_fn
+        if self.distance == "ip":
+            return self._max_inner_product_relevance_score_fn
+        return self._euclidean_relevance_score_fn
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, path: Optional[str] = None, **kwargs: Any) -> "LocalVectorIndex":
+        if path is None:
+            raise ValueError("path is required for LocalVectorIndex")
+        index = cls(path, embedding, **kwargs)
+        index.add_texts(texts, metadatas, ids)
+        return index
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+            self._mmap = None
+
+    # ----- exact search -----
+
+    def _distances(self, dots: np.ndarray, rows: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        norms = self._norms if rows is None else self._norms[rows]
+        if self.distance == "l2":
+            return norms - 2 * dots + float(query @ query)
+        if self.distance == "cosine":
+            return 1 - dots / np.clip(norms * np.linalg.norm(query), 1e-12, None)
+        return 1 - dots
+
+    def _search_exact(self, query: np.ndarray, k: int, rows: Optional[np.ndarray] = None):
+        vectors = self._vectors()
+        if rows is None:
+            dots = np.empty(self._rows, dtype=np.float32)
+            for i in range(0, self._rows, SEARCH_BLOCK_ROWS):
+                dots[i:i + SEARCH_BLOCK_ROWS] = np.asarray(vectors[i:i + SEARCH_BLOCK_ROWS], dtype=np.float32) @ query
+            distances = self._distances(dots, None, query)
+            distances[~self._live] = np.inf
+            candidates = np.arange(self._rows)
+        else:
+            if not len(rows):
+                return [], []
+            dots = np.asarray(vectors[rows], dtype=np.float32) @ query
+            distances = self._distances(dots, rows, query)
+            candidates = rows
+
+        k = min(k, int(np.isfinite(distances).sum()))
+        if k == 0:
+            return [], []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return candidates[top].tolist(), distances[top].tolist()
+
+    def _filter_rows(self, filter: dict) -> np.ndarray:
+        clauses, params = ["deleted = 0"], []
+        for key, value in filter.items():
+            if not _FILTER_KEY_RE.match(key):
+                raise ValueError(f"Unsupported filter key: {key}")
+            if isinstance(value, dict):
+                if set(value) != {"$in"}:
+                    raise ValueError("Only equality and {'$in': [...]} filters are supported")
+                values = list(value["$in"])
+                if not values:
+                    return np.zeros(0, dtype=np.int64)
+                clauses.append(f"json_extract(metadata, ?) IN ({','.join('?' * len(values))})")
+                params.extend([f'$."{key}"', *values])
+            else:
+                clauses.append("json_extract(metadata, ?) = ?")
+                params.extend([f'$."{key}"', value])
+        rows = [r for (r,) in self.conn.execute(f"SELECT row FROM docs WHERE {' AND '.join(clauses)}", params)]
+        return np.asarray(rows, dtype=np.int64)
+
+    def _documents(self, rows: List[int], distances: List[float]) -> List[Tuple[Document, float]]:
+        if not rows:
+            return []
+        placeholders = ",".join("?" * len(rows))
+        found = {
+            row: Document(id=doc_id, page_content=text, metadata=json.loads(metadata))
+            for row, doc_id, text, metadata in self.conn.execute(
+                f"SELECT row, id, text, metadata FROM docs WHERE row IN ({placeholders})", rows
+            )
+        }
+        return [(found[r], float(d)) for r, d in zip(rows, distances)]
+
+    # ----- HNSW tier -----
+
+    def _hnsw_add(self, start: int, end: int):
+        index = self._hnsw
+        if end > index.get_max_elements():
+            index.resize_index(max(end, index.get_max_elements() * 2))
+        vectors = self._vectors()
+        for i in range(start, end, SEARCH_BLOCK_ROWS):
+            stop = min(i + SEARCH_BLOCK_ROWS, end)
+            index.add_items(np.asarray(vectors[i:stop], dtype=np.float32), np.arange(i, stop))
+        self._hnsw_mark_deleted(np.flatnonzero(~self._live[start:end]) + start)
+
+    def _hnsw_mark_deleted(self, rows):
+        for row in rows:
+            try:
+                self._hnsw.mark_deleted(int(row))
+            except RuntimeError:  # Already deleted or never added
+                pass
+
+    def _load_hnsw(self):
+        """Load the saved graph and catch it up with rows written since, or build it from scratch."""
+        index = hnswlib.Index(space=self.distance, dim=self.dim)  # Same distances as the exact scan
+        covered = 0
+        if os.path.exists(self.hnsw_path):
+            index.load_index(self.hnsw_path, max_elements=max(self._rows, 1), allow_replace_deleted=False)
+            covered = index.get_current_count()
+        else:
+            index.init_index(max_elements=max(self._rows, 1), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        self._hnsw = index
+        if covered < self._rows:
+            self._hnsw_add(covered, self._rows)
+        self._hnsw_mark_deleted(np.flatnonzero(~self._live[:covered]))
+        self.save_hnsw()
+
+    def save_hnsw(self):
+        """Persist the HNSW graph; rows added later are caught up on the next load."""
+        with self.lock:
+            if self._hnsw is not None:
+                self._hnsw.save_index(self.hnsw_path)
+
+    def _search_hnsw(self, query: np.ndarray, k: int):
+        if self._hnsw is None:
+            self._load_hnsw()
+        k = min(k, self.count())
+        self._hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+        labels, distances = self._hnsw.knn_query(query, k=k)
+        return labels[0].astype(np.int64).tolist(), distances[0].tolist()
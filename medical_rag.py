@@ -10,6 +10,7 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document
 
 # Import Mistral OCR modules
@@ -17,20 +18,37 @@ from mistralai import Mistral
 from mistralai import DocumentURLChunk, ImageURLChunk
 from mistralai.models import OCRResponse
 
+# PDF page counting for windowed OCR
+from pypdf import PdfReader
+
 # System & utility libraries
 import os
+import sys
+import json
 import time
 import uuid
 import hashlib
 import tempfile
 import base64
+import random
+import threading
 from datetime import datetime
-from typing import List, Optional, Any
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Any, Callable, Iterator, Tuple
 
 # Environment & validation
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+from ingestion_manifest import IngestionManifest, file_sha256, text_sha256
+from image_store import ImageStore, get_image_store, image_ref
+from local_vector_index import LocalVectorIndex
+
+# The embedding cache lives in the backend, which uses it for Qdrant bulk loads
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from src.data.embedding_cache import CachedEmbeddings
+
 # =========================
 # LOAD API KEYS
 # =========================
@@ -48,6 +66,14 @@ CHUNK_SIZE = 1000                 # Number of characters per text chunk
 CHUNK_OVERLAP = 200               # Overlap between consecutive chunks
 MISTRAL_FILE_LIMIT_MB = 50        # Maximum file size supported for Mistral OCR
 MAX_REQUESTS_PER_MINUTE = 20      # API rate limit
+OCR_PAGE_WINDOW = 8               # Pages sent per OCR request
+OCR_PAGE_RETRIES = 2              # Extra attempts for a page whose window failed
+OCR_CACHE_DIR = os.getenv("MEDCHAT_OCR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "medical_ocr_cache"))
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+EMBEDDING_CACHE_DIR = os.getenv("MEDCHAT_EMBEDDING_CACHE_DIR", os.path.join(tempfile.gettempdir(), "medical_embedding_cache"))
+VECTORSTORE_BACKEND = os.getenv("MEDCHAT_VECTORSTORE_BACKEND", "local")   # "local" (memory-mapped index) or "chroma"
+EMBEDDING_BACKEND = os.getenv("MEDCHAT_EMBEDDING_BACKEND", "huggingface")   # "huggingface" or "onnx" (int8, CPU)
+MAX_CACHED_CHAINS = 32            # RAG chains kept per process (one per vector store, API key and k)
 
 # =========================
 # RATE LIMIT TRACKER
@@ -109,17 +135,21 @@ def get_mistral_client():
         return None
     return Mistral(api_key=api_key)
 
-def get_gemini_llm():
-    """Initialize Gemini LLM dynamically."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return None
+@lru_cache(maxsize=4)
+def _load_gemini_llm(api_key: str):
     return ChatGoogleGenerativeAI(
         model="gemini-2.5-flash",
         temperature=0.7,
         google_api_key=api_key
     )
 
+def get_gemini_llm():
+    """Gemini LLM for the current GEMINI_API_KEY, created once per key."""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    return _load_gemini_llm(api_key)
+
 def print_api_metrics(client, file_path=None):
     """Print API usage, file info, and request limit details."""
     print("\n" + "="*60)
@@ -181,53 +211,160 @@ def load_and_chunk(path):
     chunks = text_splitter.split_documents(pages)
     return chunks
 
-def replace_images_in_markdown(markdown_str: str, images_dict: dict) -> str:
-    """Replace Mistral placeholder images with Base64 encoded images."""
+def replace_images_in_markdown(markdown_str: str, images_dict: dict, image_store: Optional[ImageStore] = None) -> str:
+    """Store Mistral OCR images by content hash and replace placeholders with short image:// references."""
+    image_store = image_store or get_image_store()
     for img_name, base64_str in images_dict.items():
+        if not base64_str:
+            continue
         mistral_pattern = f"![{img_name}]({img_name})"
-        replacement = f"![{img_name}](data:image/jpeg;base64,{base64_str})"
+        replacement = f"![{img_name}]({image_ref(image_store.put_base64(base64_str))})"
         markdown_str = markdown_str.replace(mistral_pattern, replacement)
     return markdown_str
 
+def ocr_pages(client: Mistral, signed_url: str, pages: List[int]):
+    """OCR the given 0-based pages of an uploaded document."""
+    rate_tracker.wait_if_needed()
+    print(f"🔍 API Request {rate_tracker.requests_made}/{rate_tracker.limit} - OCR pages {pages[0] + 1}-{pages[-1] + 1}")
+    response = client.ocr.process(
+        document=DocumentURLChunk(document_url=signed_url),
+        model="mistral-ocr-latest",
+        pages=pages,
+        include_image_base64=True
+    )
+    return response.pages
+
+def page_document(file_path: str, page_index: int, text: str, method: str) -> Document:
+    """Document for one page that keeps its page number."""
+    return Document(
+        page_content=text,
+        metadata={
+            "source": file_path,
+            "page": page_index,
+            "page_number": page_index + 1,
+            "processing_method": method
+        }
+    )
+
+def ocr_page_to_document(page, file_path: str) -> Document:
+    """Convert one OCR page into a Document that keeps its page number."""
+    image_data = {img.id: img.image_base64 for img in page.images}
+    return page_document(file_path, page.index, replace_images_in_markdown(page.markdown, image_data), "mistral_ocr")
+
+class OCRCache:
+    """OCR pages stored on disk by file SHA-256 (and page range), so a file is never OCR'd twice."""
+
+    def __init__(self, root: str = OCR_CACHE_DIR):
+        self.root = root
+
+    @staticmethod
+    def key(file_sha: str, page_range: Optional[tuple] = None) -> str:
+        return f"{file_sha}_{page_range[0]}-{page_range[1]}" if page_range else file_sha
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """Cached pages as [{"index": int, "markdown": str}], or None."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["pages"]
+
+    def put(self, key: str, pages: List[dict]):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        path = self.path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+def iter_mistral_ocr_pages(file_path: str, client: Optional[Mistral] = None, window: int = OCR_PAGE_WINDOW,
+                           cache: Optional[OCRCache] = None):
+    """
+    Yield one Document per page, OCR-ing the file a window of pages at a time.
+
+    When a window fails, its pages are retried one by one; a page that still
+    fails falls back to PyPDF text so the rest of the file is not lost.
+    Fully OCR'd files are cached by content hash and replayed without API calls.
+    """
+    cache = cache or OCRCache()
+    cache_key = cache.key(file_sha256(file_path))
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print(f"♻️ Using cached OCR for {os.path.basename(file_path)} ({len(cached)} pages)")
+        for page in cached:
+            yield page_document(file_path, page["index"], page["markdown"], "mistral_ocr")
+        return
+
+    client = client or get_mistral_client()
+    if not client:
+        return
+
+    total_pages = len(PdfReader(file_path).pages)
+    signed_url = upload_pdf(client, file_path)
+    reader = None
+    ocr_results = []
+    complete = True
+
+    for start in range(0, total_pages, window):
+        pages = list(range(start, min(start + window, total_pages)))
+        try:
+            docs = [ocr_page_to_document(page, file_path) for page in ocr_pages(client, signed_url, pages)]
+        except Exception as e:
+            print(f"⚠️ OCR failed for pages {pages[0] + 1}-{pages[-1] + 1}: {e}. Retrying page by page...")
+            docs = []
+            for page_index in pages:
+                for attempt in range(OCR_PAGE_RETRIES + 1):
+                    try:
+                        docs.extend(ocr_page_to_document(page, file_path)
+                                    for page in ocr_pages(client, signed_url, [page_index]))
+                        break
+                    except Exception as e:
+                        if attempt < OCR_PAGE_RETRIES:
+                            continue
+                        print(f"❌ OCR failed for page {page_index + 1}: {e}. Using PyPDF text.")
+                        reader = reader or PdfReader(file_path)
+                        docs.append(page_document(file_path, page_index, reader.pages[page_index].extract_text() or "", "pypdf"))
+                        complete = False
+
+        for doc in docs:
+            if doc.metadata["processing_method"] == "mistral_ocr":
+                ocr_results.append({"index": doc.metadata["page"], "markdown": doc.page_content})
+            yield doc
+
+    # Only cache complete OCR output; files with PyPDF fallbacks are retried next time
+    if complete:
+        cache.put(cache_key, ocr_results)
+
+def iter_page_chunks(pages):
+    """Split each page as it arrives; chunks inherit the page metadata."""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE, 
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    for page in pages:
+        for chunk in text_splitter.split_documents([page]):
+            if chunk.page_content.strip():
+                yield chunk
+
 def process_mistral_ocr(file_path):
-    """Process document using Mistral OCR."""
+    """Process document using Mistral OCR, page by page."""
     client = get_mistral_client()
     if not client: 
         return []
     
     try:
-        signed_url = upload_pdf(client, file_path)
-        rate_tracker.wait_if_needed()        
-
-        print(f"🔍 API Request {rate_tracker.requests_made}/{rate_tracker.limit} - Starting OCR processing")
-        
-        ocr_response = client.ocr.process(
-            document=DocumentURLChunk(document_url=signed_url),
-            model="mistral-ocr-latest",
-            include_image_base64=True
-        )
-              
-        markdowns = []
-        for page in ocr_response.pages:
-            image_data = {img.id: img.image_base64 for img in page.images}
-            page_md = replace_images_in_markdown(page.markdown, image_data)
-            markdowns.append(page_md)
-            
-        full_text = "\n\n".join(markdowns)
-        
-        ocr_doc = Document(
-            page_content=full_text,
-            metadata={"source": file_path, "processing_method": "mistral_ocr"}
-        )
-        
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE, 
-            chunk_overlap=CHUNK_OVERLAP
-        )
-        
-        ocr_chunks = text_splitter.split_documents([ocr_doc])        
+        ocr_chunks = list(iter_page_chunks(iter_mistral_ocr_pages(file_path, client)))
+        pages = {chunk.metadata["page"] for chunk in ocr_chunks}
         print(f"✅ OCR processing completed successfully")
-        print(f"Pages processed: {len(ocr_response.pages)}")
+        print(f"Pages processed: {len(pages)}")
         print(f"✅ Created {len(ocr_chunks)} OCR chunks")
         return ocr_chunks
         
@@ -289,9 +426,16 @@ def process_medical_document(file_path):
 def format_docs(docs):
     return "\n\n --- \n\n".join([doc.page_content for doc in docs])
 
-def get_embedding_function():
-    """Load HuggingFace embedding model."""
-    model_name = "sentence-transformers/all-mpnet-base-v2"
+@lru_cache(maxsize=1)
+def load_embedding_model():
+    """Load the embedding model for EMBEDDING_BACKEND once per process."""
+    if EMBEDDING_BACKEND == "onnx":
+        from onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(EMBEDDING_MODEL_NAME)
+    if EMBEDDING_BACKEND != "huggingface":
+        raise ValueError(f"Unknown embedding backend: {EMBEDDING_BACKEND}")
+
+    model_name = EMBEDDING_MODEL_NAME
     model_kwargs = {'device': 'cpu'}
     encode_kwargs = {'normalize_embeddings': False}
     
@@ -302,60 +446,433 @@ def get_embedding_function():
     )
     return embeddings
 
-def create_vectorstore(chunks, embedding_function, vectorstore_path):   
-    """Create Chroma DB from processed document chunks."""
-    ids = [str(uuid.uuid5(uuid.NAMESPACE_DNS, doc.page_content)) for doc in chunks]
+@lru_cache(maxsize=1)
+def load_cached_embedding_model():
+    """Shared model wrapped in the on-disk embedding cache."""
+    # Cached vectors are namespaced by the model's name, so each backend keeps its own
+    return CachedEmbeddings(load_embedding_model(), EMBEDDING_CACHE_DIR)
 
-    unique_ids = set()
+def get_embedding_function(use_cache: bool = True):
+    """Return the process-wide embedding model, wrapped in the embedding cache by default."""
+    return load_cached_embedding_model() if use_cache else load_embedding_model()
+
+# =========================
+# ADAPTIVE BATCHING & THROTTLING
+# =========================
+
+MIN_BATCH_SIZE = 16               # Smallest embedding batch
+MAX_BATCH_SIZE = 512              # Largest embedding batch
+INITIAL_BATCH_SIZE = 64           # Starting batch size before throughput is known
+TARGET_BATCH_SECONDS = 2.0        # Batch size is tuned so one embedding call takes about this long
+EMBED_WORKERS = 4                 # Concurrent embedding workers
+MAX_RATE_LIMIT_RETRIES = 6        # Retries per batch after a rate-limit response
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Detect rate-limit / quota responses from remote embedders (e.g. HTTP 429)."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "rate limit", "resource exhausted", "resource_exhausted", "quota"))
+
+class AdaptiveBatchSizer:
+    """Tunes the embedding batch size to the measured embedder throughput."""
+
+    def __init__(self, initial: int = INITIAL_BATCH_SIZE, minimum: int = MIN_BATCH_SIZE,
+                 maximum: int = MAX_BATCH_SIZE, target_seconds: float = TARGET_BATCH_SECONDS):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.lock = threading.Lock()
+
+    def next_size(self) -> int:
+        with self.lock:
+            return self.size
+
+    def record(self, batch_size: int, seconds: float):
+        """Move the batch size halfway towards the size that would hit the target latency."""
+        if seconds <= 0:
+            return
+        ideal = batch_size / seconds * self.target_seconds
+        with self.lock:
+            self.size = int(min(self.maximum, max(self.minimum, (self.size + ideal) / 2)))
+
+    def shrink(self):
+        with self.lock:
+            self.size = max(self.minimum, self.size // 2)
+
+class RateLimitThrottle:
+    """Shared backoff that only engages after a remote embedder signals rate limiting."""
+
+    def __init__(self):
+        self.resume_at = 0.0
+        self.throttled_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            delay = self.resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+            with self.lock:
+                self.throttled_seconds += delay
+
+    def backoff(self, attempt: int):
+        delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+        with self.lock:
+            self.resume_at = max(self.resume_at, time.time() + delay)
+        print(f"⏳ Embedder rate limited. Backing off {delay:.1f}s...")
+
+def embed_with_retry(embedding_function, texts: List[str], throttle: RateLimitThrottle,
+                     sizer: Optional[AdaptiveBatchSizer] = None):
+    """Embed texts, retrying with backoff only on rate-limit errors. Returns (vectors, retries)."""
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        throttle.wait()
+        try:
+            return embedding_function.embed_documents(texts), attempt
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            throttle.backoff(attempt)
+            if sizer:
+                sizer.shrink()
+
+def make_vectorstore(vectorstore_path: str, embedding_function):
+    """Open (or create) the VECTORSTORE_BACKEND store at vectorstore_path."""
+    if VECTORSTORE_BACKEND == "local":
+        return LocalVectorIndex(vectorstore_path, embedding_function)
+    if VECTORSTORE_BACKEND != "chroma":
+        raise ValueError(f"Unknown vector store backend: {VECTORSTORE_BACKEND}")
+    return Chroma(embedding_function=embedding_function, persist_directory=vectorstore_path)
+
+def upsert_embeddings(vectorstore, ids, texts, vectors, metadatas):
+    """Write pre-computed embeddings into a local index or a LangChain Chroma store."""
+    if isinstance(vectorstore, LocalVectorIndex):
+        vectorstore.upsert(ids, texts, vectors, metadatas)
+        return
+    vectorstore._collection.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=texts,
+        metadatas=metadatas,
+    )
+
+def stored_embeddings(vectorstore, ids) -> dict:
+    """Embeddings already stored for ids in a local index or a LangChain Chroma store (missing ids are left out)."""
+    if not ids:
+        return {}
+    if isinstance(vectorstore, LocalVectorIndex):
+        return vectorstore.get_vectors(ids)
+    result = vectorstore._collection.get(ids=list(ids), include=["embeddings"])
+    return {i: [float(x) for x in e] for i, e in zip(result["ids"], result["embeddings"])}
+
+def chunk_id(text: str, id_namespace: Optional[str] = None) -> str:
+    """Deterministic chunk ID; a namespace (e.g. the document hash) keeps equal text in different documents apart."""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{id_namespace}:{text}" if id_namespace else text))
+
+def create_vectorstore(chunks, embedding_function, vectorstore_path, workers: int = EMBED_WORKERS,
+                       on_batch_committed: Optional[Callable] = None, id_namespace: Optional[str] = None,
+                       vectorstore=None):
+    """
+    Create the vector store from processed document chunks.
+
+    Batches are embedded by concurrent workers with an adaptive batch size and
+    written with deterministic IDs. `on_batch_committed(batch_no, ids, chunks)`
+    is called after each batch is written. An already open `vectorstore` for
+    vectorstore_path is written to instead of opening another instance.
+    Returns (vectorstore, throughput report).
+    """
+    started = time.time()
+    ids = [chunk_id(doc.page_content, id_namespace) for doc in chunks]
+
+    unique_ids = []
     unique_chunks = []
-    BATCH_SIZE = 100
+    seen = set()
 
     for chunk, id in zip(chunks, ids):
-        if id not in unique_ids:
-            unique_ids.add(id)
+        if id not in seen:
+            seen.add(id)
+            unique_ids.append(id)
             unique_chunks.append(chunk)
 
-    print(f"🔧 Creating vector store with {len(unique_chunks)} unique chunks...")
-    
-    vectorstore = Chroma(
-        embedding_function=embedding_function,
-        persist_directory=vectorstore_path
-    )
+    if vectorstore is None:
+        vectorstore = make_vectorstore(vectorstore_path, embedding_function)
+
+    sizer = AdaptiveBatchSizer()
+    throttle = RateLimitThrottle()
+    cursor_lock = threading.Lock()
+    write_lock = threading.Lock()
+    state = {"cursor": 0, "batches": 0, "embed_seconds": 0.0, "upsert_seconds": 0.0, "rate_limit_retries": 0}
+
+    def take_batch():
+        with cursor_lock:
+            start = state["cursor"]
+            end = min(start + sizer.next_size(), len(unique_chunks))
+            state["cursor"] = end
+            return start, end
+
+    def worker():
+        while True:
+            start, end = take_batch()
+            if start >= end:
+                return
+            batch = unique_chunks[start:end]
+            texts = [c.page_content for c in batch]
+
+            t0 = time.time()
+            vectors, retries = embed_with_retry(embedding_function, texts, throttle, sizer)
+            embed_seconds = time.time() - t0
+            if not retries:
+                # Only tune on clean calls; throttled calls do not reflect throughput
+                sizer.record(len(batch), embed_seconds)
+
+            t1 = time.time()
+            with write_lock:
+                upsert_embeddings(vectorstore, unique_ids[start:end], texts, vectors, [c.metadata for c in batch])
+                if on_batch_committed:
+                    on_batch_committed(state["batches"], unique_ids[start:end], batch)
+                state["batches"] += 1
+                state["embed_seconds"] += embed_seconds
+                state["upsert_seconds"] += time.time() - t1
+                state["rate_limit_retries"] += retries
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(worker) for _ in range(max(1, workers))]
+        for future in futures:
+            future.result()
+
+    total_seconds = time.time() - started
+    report = {
+        "chunks": len(chunks),
+        "unique_chunks": len(unique_chunks),
+        "batches": state["batches"],
+        "workers": workers,
+        "final_batch_size": sizer.next_size(),
+        "total_seconds": round(total_seconds, 3),
+        "embed_seconds": round(state["embed_seconds"], 3),
+        "upsert_seconds": round(state["upsert_seconds"], 3),
+        "throttled_seconds": round(throttle.throttled_seconds, 3),
+        "rate_limit_retries": state["rate_limit_retries"],
+        "chunks_per_sec": round(len(unique_chunks) / total_seconds, 2) if total_seconds else 0.0,
+    }
+    return vectorstore, report
 
-    for i in range(0, len(unique_chunks), BATCH_SIZE):
-        batch = unique_chunks[i: i + BATCH_SIZE]
-        current_batch = (i // BATCH_SIZE) + 1
-        try: 
-            vectorstore.add_documents(batch)
-            time.sleep(5)
-            print(f"Completed batch {current_batch}: Total {i + BATCH_SIZE} chunks processed.")
-        except Exception as e:
-            print(f"   ❌ Error on batch {current_batch}: {e}")
-            raise e
+# =========================
+# INCREMENTAL INGESTION
+# =========================
+
+# Each backend keeps its own root (and manifest), so switching backends re-ingests instead of reading the wrong format
+VECTORSTORE_ROOT = os.getenv("MEDCHAT_VECTORSTORE_DIR", os.path.join(
+    tempfile.gettempdir(), "medical_vector_index" if VECTORSTORE_BACKEND == "local" else "medical_chroma_db"
+))
+
+def get_manifest(store_root: str = VECTORSTORE_ROOT) -> IngestionManifest:
+    """Open the ingestion manifest shared by all stores under store_root."""
+    return IngestionManifest(os.path.join(store_root, "manifest.sqlite3"))
+
+def get_vectorstore_path(document_id: str, store_root: str = VECTORSTORE_ROOT) -> str:
+    """Each document gets its own store directory, named by a hash of its identity so new versions reuse it."""
+    return os.path.join(store_root, text_sha256(document_id)[:16])
+
+def open_vectorstore(document_id: str, embedding_function, store_root: str = VECTORSTORE_ROOT):
+    """Open the vector store of an ingested document."""
+    return make_vectorstore(get_vectorstore_path(document_id, store_root), embedding_function)
+
+def ingest_document(file_path, embedding_function, manifest: IngestionManifest,
+                    store_root: str = VECTORSTORE_ROOT, source_name: Optional[str] = None,
+                    vectorstore_path: Optional[str] = None, vectorstore=None, document_id: Optional[str] = None):
+    """
+    Incrementally ingest a document into its vector store.
+
+    An unchanged file that was fully ingested before is reopened without OCR or
+    embedding. Otherwise only chunks missing from the manifest are embedded,
+    chunks that no longer exist are deleted, and each committed batch is
+    recorded so an interrupted run resumes where it stopped.
+    Documents are identified by `document_id` (default: the source name). A new
+    version of a document is diffed against the previous one: its unchanged
+    chunks are copied from the stored vectors, and the previous version's rows
+    and manifest entry are deleted.
+    Chunks carry the file hash as `doc_hash` metadata. With `vectorstore_path`
+    the document goes into that shared store (e.g. a workspace index) and its
+    chunk IDs are namespaced by the file hash; pass the store's open instance
+    as `vectorstore` so every write goes through it.
+    Returns (vectorstore, report); vectorstore is None when no text was extracted.
+    """
+    started = time.time()
+    file_sha = file_sha256(file_path)
+    source_name = source_name or os.path.basename(file_path)
+    document_id = document_id or source_name
+    shared = vectorstore_path is not None
+
+    if manifest.is_complete(file_sha):
+        record = manifest.get_file(file_sha)
+        print(f"♻️ {source_name} unchanged. Reusing {record['chunk_count']} chunks.")
+        if vectorstore is None:
+            vectorstore = make_vectorstore(
+                vectorstore_path or get_vectorstore_path(record["document_id"] or document_id, store_root),
+                embedding_function,
+            )
+        return vectorstore, {
+            "file_sha256": file_sha,
+            "skipped": True,
+            "chunks": record["chunk_count"],
+            "added": 0,
+            "deleted": 0,
+            "total_seconds": round(time.time() - started, 3),
+            "chunks_per_sec": 0.0,
+        }
+
+    chunks = process_medical_document(file_path)
+    if not chunks:
+        return None, {"file_sha256": file_sha, "skipped": False, "chunks": 0}
+
+    vectorstore_path = vectorstore_path or get_vectorstore_path(document_id, store_root)
+    if vectorstore is None:
+        vectorstore = make_vectorstore(vectorstore_path, embedding_function)
+
+    previous = manifest.other_versions(document_id, file_sha)
+    manifest.start_file(file_sha, source_name, document_id)
+    hashes = {}
+    for chunk in chunks:
+        chunk.metadata["doc_hash"] = file_sha
+        hashes.setdefault(text_sha256(chunk.page_content), chunk)
+    id_namespace = file_sha if shared else None
+
+    carried = removed = 0
+    if previous:
+        # Chunks unchanged since the previous version keep their vectors under this version's IDs and metadata
+        old_chunks = {}
+        for old_sha in previous:
+            old_chunks.update(manifest.committed_chunks(old_sha))
+        to_add, _ = manifest.plan(file_sha, hashes.keys())
+        reusable = {h: old_chunks[h] for h in to_add if h in old_chunks}
+        vectors = stored_embeddings(vectorstore, list(reusable.values()))
+        reused = [h for h, old_id in reusable.items() if old_id in vectors]
+        new_ids = [chunk_id(hashes[h].page_content, id_namespace) for h in reused]
+        if reused:
+            upsert_embeddings(
+                vectorstore, new_ids, [hashes[h].page_content for h in reused],
+                [vectors[reusable[h]] for h in reused], [hashes[h].metadata for h in reused],
+            )
+            manifest.commit_batch(file_sha, list(zip(reused, new_ids)), manifest.last_batch(file_sha) + 1)
+        carried = len(reused)
+
+        kept = set(manifest.committed_chunks(file_sha).values())
+        old_ids = [cid for cid in old_chunks.values() if cid not in kept]
+        if old_ids:
+            vectorstore.delete(ids=old_ids)
+        for old_sha in previous:
+            manifest.remove_file(old_sha)
+        removed = sum(1 for h in old_chunks if h not in hashes)
+        print(f"🔁 Replacing the previous version: {carried} chunks reused, {removed} removed")
+
+    to_add, stale = manifest.plan(file_sha, hashes.keys())
+    if stale:
+        vectorstore.delete(ids=list(stale.values()))
+        manifest.remove_chunks(file_sha, stale.keys())
+        print(f"🧹 Removed {len(stale)} stale chunks")
+
+    new_chunks = [chunk for h, chunk in hashes.items() if h in to_add]
+    print(f"📦 {len(hashes) - len(to_add)} chunks already stored, {len(new_chunks)} to embed")
+
+    first_batch = manifest.last_batch(file_sha) + 1
+
+    def record_batch(batch_no, ids, batch):
+        manifest.commit_batch(
+            file_sha,
+            [(text_sha256(c.page_content), cid) for c, cid in zip(batch, ids)],
+            first_batch + batch_no,
+        )
 
-    print("✅ Vector store created successfully")
-    return vectorstore
+    report = {}
+    if new_chunks:
+        vectorstore, report = create_vectorstore(
+            new_chunks, embedding_function, vectorstore_path, on_batch_committed=record_batch,
+            id_namespace=id_namespace, vectorstore=vectorstore
+        )
+    manifest.complete_file(file_sha)
+
+    total_seconds = time.time() - started
+    report.update({
+        "file_sha256": file_sha,
+        "skipped": False,
+        "chunks": len(hashes),
+        "added": len(new_chunks),
+        "deleted": len(stale) + removed,
+        "reused": carried,
+        "replaced": previous,
+        "total_seconds": round(total_seconds, 3),
+        "chunks_per_sec": round(len(new_chunks) / total_seconds, 2) if total_seconds else 0.0,
+    })
+    return vectorstore, report
 
 # =========================
 # RAG RESPONSE GENERATION
 # =========================
 
-def generate_response(query: str, vectorstore):  
-    """Generate answer using RAG pipeline."""
-    llm = get_gemini_llm()
-    if not llm:
+class RAGChain:
+    """Retriever, prompt and LLM for one vector store, built once and reused for every question."""
+
+    def __init__(self, vectorstore, llm, k: int = 5):
+        self.retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": k})
+        self.answer_chain = ChatPromptTemplate.from_template(PROMPT_TEMPLATE) | llm
+        self.text_chain = self.answer_chain | StrOutputParser()
+        self.rag_chain = (
+            {"context": self.retriever | format_docs, "query": RunnablePassthrough()}
+            | self.answer_chain
+        )
+
+    def invoke(self, query: str):
+        return self.rag_chain.invoke(query)
+
+    def retrieve(self, query: str, filter: Optional[dict] = None) -> List[Document]:
+        """Top-k chunks, optionally restricted by a metadata filter (e.g. selected documents)."""
+        return self.retriever.invoke(query, filter=filter) if filter else self.retriever.invoke(query)
+
+    def invoke_with_sources(self, query: str, filter: Optional[dict] = None):
+        docs = self.retrieve(query, filter)
+        return self.answer_chain.invoke({"context": format_docs(docs), "query": query}), docs
+
+    def stream_with_sources(self, query: str, filter: Optional[dict] = None) -> Tuple[List[Document], Iterator[str]]:
+        """Retrieve first, then return the sources with a lazy token stream of the answer."""
+        docs = self.retrieve(query, filter)
+        return docs, self.text_chain.stream({"context": format_docs(docs), "query": query})
+
+@lru_cache(maxsize=MAX_CACHED_CHAINS)
+def _load_rag_chain(vectorstore, api_key: str, k: int) -> RAGChain:
+    return RAGChain(vectorstore, _load_gemini_llm(api_key), k)
+
+def get_rag_chain(vectorstore, k: int = 5) -> RAGChain:
+    """RAGChain for this vector store and the current GEMINI_API_KEY, built once and cached."""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
         raise ValueError("Gemini LLM not initialized")
-    
-    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)  
-    retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-    
-    rag_chain = (
-        {"context": retriever | format_docs, "query": RunnablePassthrough()}
-        | prompt_template
-        | llm
-    )
+    return _load_rag_chain(vectorstore, api_key, k)
 
-    return rag_chain.invoke(query)
+def generate_response(query: str, vectorstore):
+    """Generate answer using RAG pipeline."""
+    return get_rag_chain(vectorstore).invoke(query)
+
+def generate_response_with_sources(query: str, vectorstore, k: int = 5, filter: Optional[dict] = None):
+    """Generate answer and return it with the retrieved chunks, for citations."""
+    return get_rag_chain(vectorstore, k).invoke_with_sources(query, filter)
+
+def stream_response_with_sources(query: str, vectorstore, k: int = 5,
+                                 filter: Optional[dict] = None) -> Tuple[List[Document], Iterator[str]]:
+    """
+    Retrieved chunks and a generator of answer tokens, e.g. for st.write_stream.
+    Nothing is sent to the LLM until the generator is consumed.
+    """
+    return get_rag_chain(vectorstore, k).stream_with_sources(query, filter)
+
+def chunk_page_number(doc: Document) -> Optional[int]:
+    """1-based page of a chunk (OCR chunks carry page_number, PyPDF chunks a 0-based page)."""
+    if doc.metadata.get("page_number") is not None:
+        return int(doc.metadata["page_number"])
+    if doc.metadata.get("page") is not None:
+        return int(doc.metadata["page"]) + 1
+    return None
 
 # =========================
 # ENTRY POINT
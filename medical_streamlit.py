@@ -5,16 +5,41 @@
 import streamlit as st
 import os
 import tempfile
-import base64
-import shutil
+import hashlib
+import threading
+import fitz  # PyMuPDF
 
 # --- Import core RAG functions from medical_rag.py ---
 from medical_rag import (
-    process_medical_document, 
-    create_vectorstore, 
     get_embedding_function,
-    generate_response
+    stream_response_with_sources,
+    chunk_page_number
 )
+from workspaces import Workspace, list_workspaces, document_filter, workspace_slug, DEFAULT_WORKSPACE
+
+MAX_CACHED_DOCUMENTS = 16         # Distinct preview PDFs kept open in memory
+MAX_CACHED_WORKSPACES = 8         # Workspaces (index + manifest) kept open in memory
+PREVIEW_DIR = os.path.join(tempfile.gettempdir(), "medical_pdf_preview")
+THUMBNAIL_WIDTH = 600             # Rendered thumbnail width in pixels
+PREVIEW_PAGE_BATCH = 4            # Pages rendered initially and per "Load more"
+
+# =========================
+# SHARED RESOURCES (PER PROCESS)
+# =========================
+
+@st.cache_resource(show_spinner="Loading embedding model...")
+def load_embedding_function():
+    """Embedding model loaded once and shared by every session."""
+    return get_embedding_function()
+
+@st.cache_resource(max_entries=MAX_CACHED_WORKSPACES)
+def _open_workspace(slug: str, _name: str):
+    # Keyed by slug only (Streamlit does not hash _name): names that share a directory share one Workspace
+    return Workspace(_name, load_embedding_function())
+
+def load_workspace(name: str) -> Workspace:
+    """One Workspace (index + manifest) per workspace directory, shared by every session that opens it."""
+    return _open_workspace(workspace_slug(name), name)
 
 # =========================
 # SESSION STATE INITIALIZATION
@@ -22,41 +47,153 @@ from medical_rag import (
 
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
-    if 'processing_complete' not in st.session_state:
-        st.session_state.processing_complete = False
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
-    if 'vectorstore' not in st.session_state:
-        st.session_state.vectorstore = None
+    if 'workspace' not in st.session_state:
+        st.session_state.workspace = DEFAULT_WORKSPACE
+    if 'selected_docs' not in st.session_state:
+        st.session_state.selected_docs = None   # None: search all documents of the workspace
+    if 'workspace_select' not in st.session_state:
+        st.session_state.workspace_select = st.session_state.workspace
+    if 'preview_hash' not in st.session_state:
+        st.session_state.preview_hash = None
+    if 'preview_start' not in st.session_state:
+        st.session_state.preview_start = 0
+    if 'preview_count' not in st.session_state:
+        st.session_state.preview_count = PREVIEW_PAGE_BATCH
+    if 'preview_jump' not in st.session_state:
+        st.session_state.preview_jump = 1
 
 # =========================
-# PDF PREVIEW FUNCTION
+# PDF PREVIEW (LAZY THUMBNAILS)
 # =========================
 
-def display_pdf(uploaded_file):
-    """
-    Display an uploaded PDF file inside the Streamlit interface.
+def save_preview_pdf(pdf_bytes: bytes) -> str:
+    """Keep one copy of the PDF on disk per content hash and return the hash."""
+    doc_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    path = os.path.join(PREVIEW_DIR, f"{doc_hash}.pdf")
+    if not os.path.exists(path):
+        os.makedirs(PREVIEW_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(pdf_bytes)
+    return doc_hash
+
+@st.cache_resource(max_entries=MAX_CACHED_DOCUMENTS)
+def open_preview_pdf(doc_hash: str):
+    """Open the PDF once per process; PyMuPDF documents are not thread-safe, so pair it with a lock."""
+    return fitz.open(os.path.join(PREVIEW_DIR, f"{doc_hash}.pdf")), threading.Lock()
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def render_thumbnail(doc_hash: str, page_index: int, width: int = THUMBNAIL_WIDTH) -> bytes:
+    """Render one page as a downscaled PNG (cached across sessions)."""
+    doc, lock = open_preview_pdf(doc_hash)
+    with lock:
+        page = doc[page_index]
+        zoom = width / page.rect.width
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+
+def jump_to_page(page_number: int):
+    """Show the preview starting at a given 1-based page (e.g. a cited chunk)."""
+    st.session_state.preview_start = max(0, page_number - 1)
+    st.session_state.preview_count = PREVIEW_PAGE_BATCH
+    st.session_state.preview_jump = max(1, page_number)
+
+def load_more_pages():
+    st.session_state.preview_count += PREVIEW_PAGE_BATCH
+
+def has_preview(doc_hash: str) -> bool:
+    return os.path.exists(os.path.join(PREVIEW_DIR, f"{doc_hash}.pdf"))
+
+def show_source(doc_hash: str, page_number: int):
+    """Open a cited document in the preview at the cited page."""
+    st.session_state.preview_hash = doc_hash
+    jump_to_page(page_number)
+
+# =========================
+# WORKSPACES
+# =========================
+
+def switch_workspace(name: str):
+    st.session_state.workspace = name
+    st.session_state.workspace_select = name
+    st.session_state.selected_docs = None
+    st.session_state.chat_history = []
+    st.session_state.preview_hash = None
+
+def create_workspace():
+    name = st.session_state.new_workspace_name.strip()
+    if not name:
+        return
+    try:
+        workspace_slug(name)
+    except ValueError as e:
+        st.session_state.workspace_error = str(e)
+        return
+    switch_workspace(name)
+    st.session_state.new_workspace_name = ""
+
+def remove_document(doc_hash: str):
+    """Delete only this document's chunks from the workspace index."""
+    load_workspace(st.session_state.workspace).remove_document(doc_hash)
+    if st.session_state.selected_docs:
+        st.session_state.selected_docs = [h for h in st.session_state.selected_docs if h != doc_hash]
+    if st.session_state.preview_hash == doc_hash:
+        st.session_state.preview_hash = None
+
+def display_workspace(workspace: Workspace):
+    """Workspace picker and the list of indexed documents."""
+    names = list_workspaces()
+    if workspace.name not in names:
+        names.append(workspace.name)
+    st.selectbox(
+        "Workspace:",
+        names,
+        key="workspace_select",
+        on_change=lambda: switch_workspace(st.session_state.workspace_select)
+    )
+    with st.expander("➕ New workspace"):
+        st.text_input("Name:", key="new_workspace_name", placeholder="e.g. Cardiology semester 2")
+        st.button("Create", on_click=create_workspace, key="create_workspace_btn")
+        if st.session_state.get("workspace_error"):
+            st.error(st.session_state.pop("workspace_error"))
+
+    documents = workspace.documents()
+    if not documents:
+        st.caption("No documents in this workspace yet.")
+    for doc in documents:
+        name_col, preview_col, remove_col = st.columns([6, 1, 1])
+        name_col.markdown(f"📘 **{doc['source_name']}** · {doc['chunk_count']} chunks")
+        if has_preview(doc["file_sha256"]):
+            preview_col.button("👁️", key=f"preview_{doc['file_sha256']}", help="Preview",
+                               on_click=show_source, args=(doc["file_sha256"], 1))
+        remove_col.button("🗑️", key=f"remove_{doc['file_sha256']}", help="Remove from workspace",
+                          on_click=remove_document, args=(doc["file_sha256"],))
+    return documents
+
+def display_pdf_preview(doc_hash: str):
     """
-    # Read binary content of the PDF
-    pdf_bytes = uploaded_file.getvalue()
-    
-    # Convert PDF to Base64 format
-    base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
-    
-    # Create HTML iframe for displaying the PDF
-    pdf_display = f"""
-    <iframe 
-        src="data:application/pdf;base64,{base64_pdf}" 
-        width="700" 
-        height="1000" 
-        type="application/pdf"
-        style="border: 1px solid #ddd; border-radius: 5px;"
-    >
-    </iframe>
+    Display page thumbnails of the document, rendering only the pages shown.
     """
-    
-    # Render the PDF in Streamlit
-    st.markdown(pdf_display, unsafe_allow_html=True)
+    doc, lock = open_preview_pdf(doc_hash)
+    with lock:
+        total_pages = len(doc)
+
+    st.session_state.preview_jump = min(st.session_state.preview_jump, total_pages)
+    st.number_input(
+        f"Jump to page (1-{total_pages}):",
+        min_value=1,
+        max_value=total_pages,
+        key="preview_jump",
+        on_change=lambda: jump_to_page(st.session_state.preview_jump)
+    )
+
+    start = min(st.session_state.preview_start, total_pages - 1)
+    end = min(start + st.session_state.preview_count, total_pages)
+    for page_index in range(start, end):
+        st.image(render_thumbnail(doc_hash, page_index), caption=f"Page {page_index + 1}", use_container_width=True)
+
+    if end < total_pages:
+        st.button("⬇️ Load more pages", on_click=load_more_pages, key="preview_more")
 
 # =========================
 # MAIN STREAMLIT APPLICATION
@@ -116,6 +253,10 @@ def main():
         if gemini_key: os.environ['GEMINI_API_KEY'] = gemini_key
         if mistral_key: os.environ['MISTRAL_API_KEY'] = mistral_key
         
+        st.header("🗂️ Workspace")
+        workspace = load_workspace(st.session_state.workspace)
+        workspace_box = st.container()
+
         st.header("📁 Document Upload")
         
         # File uploader for medical PDF documents
@@ -134,14 +275,12 @@ def main():
             )
         
         # Execute document processing pipeline
-        if uploaded_file and process_clicked:
-            if not gemini_key or not mistral_key:
-                st.error("Please enter both API keys.")
-                return
-
-            # Display document preview
-            st.header("📄 Document Preview")
-            display_pdf(uploaded_file)
+        if uploaded_file and process_clicked and (not gemini_key or not mistral_key):
+            st.error("Please enter both API keys.")
+        elif uploaded_file and process_clicked:
+            # Keep the PDF on disk for the preview instead of inlining it into the page
+            st.session_state.preview_hash = save_preview_pdf(uploaded_file.getvalue())
+            jump_to_page(1)
 
             with st.spinner("Processing..."):
                 # 1. Save uploaded file as a temporary PDF
@@ -149,27 +288,24 @@ def main():
                     tmp_file.write(uploaded_file.getvalue())
                     tmp_path = tmp_file.name
                 
-                # 2. Run OCR + text extraction + chunking pipeline
+                # 2. Run OCR + chunking + embedding into the workspace, skipping work already in its manifest
                 try:
-                    chunks = process_medical_document(tmp_path)
-                    
-                    if chunks:
-                        # Create embedding function
-                        emb_fn = get_embedding_function()
-                        
-                        # Use temporary storage for Chroma vector database
-                        db_path = os.path.join(tempfile.gettempdir(), "medical_chroma_db")
+                    report = workspace.add_document(tmp_path, source_name=uploaded_file.name)
 
-                        # Remove old database to avoid conflicts
-                        if os.path.exists(db_path):
-                            shutil.rmtree(db_path)
-                            print(f"🧹 Cleared old database at {db_path}")
-                        
-                        # Create vector store from chunks
-                        vectorstore = create_vectorstore(chunks, emb_fn, db_path)
-                        st.session_state.vectorstore = vectorstore
-                        st.session_state.processing_complete = True
-                        st.success(f"Processed {len(chunks)} chunks!")
+                    if report["chunks"]:
+                        if st.session_state.selected_docs is not None:
+                            # A new version of a document takes the previous version's place in the selection
+                            replaced = set(report.get("replaced", []))
+                            st.session_state.selected_docs = [
+                                h for h in st.session_state.selected_docs if h not in replaced
+                            ] + [report["file_sha256"]]
+                        if report["skipped"]:
+                            st.success(f"Document unchanged. Reused {report['chunks']} stored chunks!")
+                        else:
+                            st.success(
+                                f"Processed {report['chunks']} chunks ({report['added']} new, "
+                                f"{report['deleted']} removed) in {report['total_seconds']:.1f}s!"
+                            )
                     else:
                         st.error("No text could be extracted.")
                         
@@ -180,6 +316,15 @@ def main():
                     if os.path.exists(tmp_path):
                         os.remove(tmp_path)
 
+        # Filled after processing so a newly added document is listed right away
+        with workspace_box:
+            display_workspace(workspace)
+
+        # Display document preview (kept across reruns so "Load more" and source jumps work)
+        if st.session_state.preview_hash:
+            st.header("📄 Document Preview")
+            display_pdf_preview(st.session_state.preview_hash)
+
     # =========================
     # RIGHT PANEL: MEDICAL Q&A INTERFACE
     # =========================
@@ -189,32 +334,64 @@ def main():
         st.markdown("### 📚 Guidelines")
         st.markdown("""
         1. Enter Gemini API and Mistral OCR API.
-        2. Upload your document and click "Process Document".
-        3. Wait for the green **"Ready!"** message.
-        4. Type your question on the right side.
+        2. Pick or create a workspace, upload your documents and click "Process Document".
+        3. Wait for the green success message; documents stay in the workspace for next time.
+        4. Choose which documents to search and type your question on the right side.
         5. Read the answer and check the **"Sources"** to see the original text.
         """)
 
-        # Only enable chat after document is processed
-        if st.session_state.processing_complete:
+        # Only enable chat once the workspace has documents
+        documents = workspace.documents()
+        if documents:
+            names = {d["file_sha256"]: d["source_name"] for d in documents}
+            selected = st.multiselect(
+                "Search in:",
+                list(names),
+                default=[h for h in (st.session_state.selected_docs or names) if h in names],
+                format_func=lambda h: names[h],
+            )
+            st.session_state.selected_docs = None if len(selected) == len(names) else selected
             query = st.text_input("Ask a question:")
             
             if query and st.button("Ask"):
-                with st.spinner("Thinking..."):
+                if not selected:
+                    st.warning("Select at least one document to search.")
+                else:
                     try:
-                        # Generate RAG-based response
-                        response = generate_response(query, st.session_state.vectorstore)
-                        st.markdown(f"**Answer:** {response.content}")
-                        
-                        # Store conversation history
-                        st.session_state.chat_history.append((query, response.content))
+                        # Retrieve the source chunks, then stream the answer as it is generated
+                        with st.spinner("Searching documents..."):
+                            docs, tokens = stream_response_with_sources(
+                                query, workspace.vectorstore,
+                                filter=document_filter(st.session_state.selected_docs)
+                            )
+                        st.markdown("**Answer:**")
+                        answer = st.write_stream(tokens)
+
+                        # Store conversation history with the cited (document, page) pairs
+                        sources = sorted({
+                            (d.metadata.get("doc_hash"), p) for d in docs if (p := chunk_page_number(d))
+                        })
+                        st.session_state.chat_history.append((query, answer, sources))
                     except Exception as e:
                         st.error(f"Generation Error: {e}")
             
             # Display chat history in expandable format
-            for q, a in reversed(st.session_state.chat_history):
+            for i, (q, a, sources) in enumerate(reversed(st.session_state.chat_history)):
                 with st.expander(f"Q: {q}"):
                     st.write(a)
+                    if sources:
+                        # Open the cited document in the preview at the cited page
+                        st.caption("Sources:")
+                        cols = st.columns(min(len(sources), 5))
+                        for j, (doc_hash, page_number) in enumerate(sources):
+                            label = f"📄 {names.get(doc_hash, 'Removed document')} p.{page_number}"
+                            cols[j % len(cols)].button(
+                                label,
+                                key=f"source_{i}_{doc_hash}_{page_number}",
+                                on_click=show_source,
+                                args=(doc_hash, page_number),
+                                disabled=not (doc_hash and has_preview(doc_hash))
+                            )
         else:
             st.info("Upload and process a document to start chatting.")
 
@@ -0,0 +1,371 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+import os
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+from mistralai import DocumentURLChunk
+
+from ingestion_manifest import file_sha256
+from medical_rag import (
+    MAX_REQUESTS_PER_MINUTE,
+    MISTRAL_FILE_LIMIT_MB,
+    OCR_PAGE_WINDOW,
+    OCRCache,
+    get_mistral_client,
+    is_rate_limit_error,
+    replace_images_in_markdown,
+)
+
+# =========================
+# CONFIGURATION SETTINGS
+# =========================
+
+OCR_JOBS_DB = os.getenv("MEDCHAT_OCR_JOBS_DB", "ocr_jobs.sqlite3")
+OCR_WORKERS = 4                   # Concurrent OCR jobs
+MAX_JOB_ATTEMPTS = 5              # Attempts before a job is marked failed
+MAX_BACKOFF_SECONDS = 300
+
+# =========================
+# TOKEN BUCKET LIMITER
+# =========================
+
+class TokenBucket:
+    """
+    Async token bucket shared by all workers.
+
+    Only the waiting coroutine sleeps, unlike RateLimitTracker which blocks the
+    whole process. A rate-limit response pauses the bucket for everyone.
+    """
+
+    def __init__(self, rate_per_minute: int = MAX_REQUESTS_PER_MINUTE, capacity: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 4)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+# =========================
+# PERSISTENT JOB QUEUE
+# =========================
+
+class OCRJobQueue:
+    """SQLite job table: one job per split part (a PDF, or a page range of one for virtual splits)."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            file_sha256 TEXT NOT NULL,
+            page_start INTEGER NOT NULL,  -- 1-based, inclusive; 0/0 = whole file
+            page_end INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            not_before REAL NOT NULL DEFAULT 0,
+            pages INTEGER,
+            last_error TEXT,
+            updated_at TEXT NOT NULL,
+            UNIQUE (file_sha256, page_start, page_end)
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, not_before);
+    """
+
+    def __init__(self, db_path: str = OCR_JOBS_DB):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self._SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def enqueue(self, path: str, page_range: Optional[tuple] = None) -> bool:
+        """Add a job; returns False if the same file (and range) is already queued."""
+        start, end = page_range or (0, 0)
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (path, file_sha256, page_start, page_end, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (path, file_sha256(path), start, end, self._now()),
+            )
+        return cursor.rowcount > 0
+
+    def enqueue_folder(self, folder: str) -> int:
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith(".pdf"))
+        return sum(self.enqueue(os.path.join(folder, f)) for f in files)
+
+    def enqueue_metadata(self, metadata_path: str, source_folder: str) -> int:
+        """Queue the parts listed in a splitting_books metadata.json (virtual parts become page ranges)."""
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        added = 0
+        for entry in entries:
+            if entry.get("virtual"):
+                path = os.path.join(source_folder, entry["source_file"])
+                added += self.enqueue(path, (entry["page_start"], entry["page_end"]))
+            else:
+                added += self.enqueue(os.path.join(os.path.dirname(metadata_path), entry["file_id"]))
+        return added
+
+    def recover(self) -> int:
+        """Return jobs left running by a crashed run to the queue."""
+        with self.conn:
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'running'", (self._now(),)
+            ).rowcount
+
+    def claim(self) -> Optional[Dict]:
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND not_before <= ? ORDER BY id LIMIT 1", (time.time(),)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (self._now(), row["id"]),
+            )
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def has_waiting(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM jobs WHERE status = 'pending' LIMIT 1").fetchone() is not None
+
+    def complete(self, job_id: int, pages: int):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', pages = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (pages, self._now(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str, retry_in: Optional[float]):
+        """Requeue after retry_in seconds, or mark failed when retry_in is None."""
+        with self.conn:
+            if retry_in is None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', last_error = ?, updated_at = ? WHERE id = ?",
+                    (error, self._now(), job_id),
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'pending', last_error = ?, not_before = ?, updated_at = ? WHERE id = ?",
+                    (error, time.time() + retry_in, self._now(), job_id),
+                )
+
+    def retry_failed(self) -> int:
+        with self.conn:
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, not_before = 0, updated_at = ? WHERE status = 'failed'",
+                (self._now(),),
+            ).rowcount
+
+    def status(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def failed_jobs(self) -> List[Dict]:
+        return [dict(r) for r in self.conn.execute(
+            "SELECT id, path, page_start, page_end, attempts, last_error FROM jobs WHERE status = 'failed' ORDER BY id"
+        )]
+
+    def close(self):
+        self.conn.close()
+
+# =========================
+# ASYNC OCR WORKERS
+# =========================
+
+class OCRFileTooLarge(ValueError):
+    """The PDF to upload exceeds MISTRAL_FILE_LIMIT_MB; retrying cannot help."""
+
+def read_job_pdf(job: Dict) -> Tuple[bytes, List[int]]:
+    """
+    PDF bytes to upload for a job and the original 0-based index of each of its pages.
+
+    Virtual parts are cut out of the book locally, so only their own pages are uploaded.
+    """
+    if not job["page_start"]:
+        with open(job["path"], "rb") as f:
+            content = f.read()
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            return content, list(range(doc.page_count))
+
+    with fitz.open(job["path"]) as book, fitz.open() as part:
+        part.insert_pdf(book, from_page=job["page_start"] - 1, to_page=job["page_end"] - 1)
+        return part.tobytes(garbage=3, deflate=True), list(range(job["page_start"] - 1, job["page_end"]))
+
+async def ocr_job(job: Dict, client, bucket: TokenBucket, cache: OCRCache) -> int:
+    """
+    OCR one job into the cache and return its page count; cached jobs cost no API calls.
+
+    Each page window is cached as soon as it is OCR'd, so a retry after a
+    failure resumes at the first window that is not cached yet.
+    """
+    page_range = (job["page_start"], job["page_end"]) if job["page_start"] else None
+    key = cache.key(job["file_sha256"], page_range)
+    cached = cache.get(key)
+    if cached is not None:
+        return len(cached)
+
+    content, page_indexes = await asyncio.to_thread(read_job_pdf, job)
+    size_mb = len(content) / (1024 * 1024)
+    if size_mb > MISTRAL_FILE_LIMIT_MB:
+        raise OCRFileTooLarge(f"{size_mb:.1f}MB exceeds the {MISTRAL_FILE_LIMIT_MB}MB OCR upload limit")
+
+    signed_url = None
+    pages = []
+    window_keys = []
+    for i in range(0, len(page_indexes), OCR_PAGE_WINDOW):
+        window_key = f"{key}~{i}"
+        window_keys.append(window_key)
+        window_pages = await asyncio.to_thread(cache.get, window_key)
+        if window_pages is None:
+            if signed_url is None:
+                # Upload only once some window actually needs OCR
+                await bucket.acquire()
+                uploaded = await asyncio.to_thread(
+                    client.files.upload,
+                    file={"file_name": os.path.basename(job["path"]), "content": content},
+                    purpose="ocr",
+                )
+                await bucket.acquire()
+                signed_url = (await asyncio.to_thread(client.files.get_signed_url, file_id=uploaded.id)).url
+
+            await bucket.acquire()
+            response = await asyncio.to_thread(
+                client.ocr.process,
+                document=DocumentURLChunk(document_url=signed_url),
+                model="mistral-ocr-latest",
+                pages=list(range(i, min(i + OCR_PAGE_WINDOW, len(page_indexes)))),
+                include_image_base64=True,
+            )
+            window_pages = []
+            for page in response.pages:
+                image_data = {img.id: img.image_base64 for img in page.images}
+                window_pages.append({
+                    # Page indexes refer to the uploaded part; cache them as pages of the original file
+                    "index": page_indexes[page.index],
+                    "markdown": replace_images_in_markdown(page.markdown, image_data),
+                })
+            await asyncio.to_thread(cache.put, window_key, window_pages)
+        pages.extend(window_pages)
+
+    await asyncio.to_thread(cache.put, key, pages)
+    for window_key in window_keys:
+        cache.delete(window_key)
+    return len(pages)
+
+async def worker(name: str, queue: OCRJobQueue, client, bucket: TokenBucket, cache: OCRCache):
+    while True:
+        job = queue.claim()
+        if job is None:
+            if not queue.has_waiting():
+                return
+            # Remaining jobs are backing off; check again shortly
+            await asyncio.sleep(1)
+            continue
+
+        label = os.path.basename(job["path"])
+        if job["page_start"]:
+            label += f" [{job['page_start']}-{job['page_end']}]"
+        try:
+            pages = await ocr_job(job, client, bucket, cache)
+            queue.complete(job["id"], pages)
+            print(f"✅ [{name}] {label}: {pages} pages")
+        except Exception as e:
+            if isinstance(e, OCRFileTooLarge) or job["attempts"] >= MAX_JOB_ATTEMPTS:
+                queue.fail(job["id"], str(e), None)
+                print(f"❌ [{name}] {label} failed after {job['attempts']} attempts: {e}")
+                continue
+            delay = min(MAX_BACKOFF_SECONDS, 2 ** job["attempts"]) + random.uniform(0, 1)
+            if is_rate_limit_error(e):
+                bucket.pause(delay)
+            queue.fail(job["id"], str(e), delay)
+            print(f"⏳ [{name}] {label} attempt {job['attempts']} failed: {e}. Retrying in {delay:.1f}s")
+
+async def run_queue(queue: OCRJobQueue, workers: int = OCR_WORKERS, rate_per_minute: int = MAX_REQUESTS_PER_MINUTE):
+    client = get_mistral_client()
+    if not client:
+        raise RuntimeError("MISTRAL_API_KEY is not set")
+
+    recovered = queue.recover()
+    if recovered:
+        print(f"♻️ Requeued {recovered} interrupted jobs")
+
+    bucket = TokenBucket(rate_per_minute)
+    cache = OCRCache()
+    await asyncio.gather(*(worker(f"w{i}", queue, client, bucket, cache) for i in range(workers)))
+    print(f"📊 Job status: {queue.status()}")
+
+# =========================
+# ENTRY POINT
+# =========================
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable OCR job queue for the split book library.")
+    parser.add_argument("--db", default=OCR_JOBS_DB, help="Job queue SQLite file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Queue split parts for OCR")
+    p_enqueue.add_argument("path", help="Folder of PDFs, or a splitting_books metadata.json")
+    p_enqueue.add_argument("--source-folder", help="Original books folder (for virtual splits)")
+
+    p_run = sub.add_parser("run", help="Process queued jobs")
+    p_run.add_argument("--workers", type=int, default=OCR_WORKERS)
+    p_run.add_argument("--rpm", type=int, default=MAX_REQUESTS_PER_MINUTE, help="Shared API requests per minute")
+
+    sub.add_parser("status", help="Show job counts and failures")
+    sub.add_parser("retry-failed", help="Requeue failed jobs")
+
+    args = parser.parse_args()
+    queue = OCRJobQueue(args.db)
+    try:
+        if args.command == "enqueue":
+            if args.path.endswith(".json"):
+                added = queue.enqueue_metadata(args.path, args.source_folder or os.path.dirname(args.path))
+            else:
+                added = queue.enqueue_folder(args.path)
+            print(f"📥 Queued {added} new jobs")
+        elif args.command == "run":
+            asyncio.run(run_queue(queue, args.workers, args.rpm))
+        elif args.command == "status":
+            print(f"📊 Job status: {queue.status()}")
+            for job in queue.failed_jobs():
+                print(f"   ❌ #{job['id']} {job['path']} (attempts {job['attempts']}): {job['last_error']}")
+        elif args.command == "retry-failed":
+            print(f"♻️ Requeued {queue.retry_failed()} failed jobs")
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    main()
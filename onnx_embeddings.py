@@ -0,0 +1,218 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+from langchain_core.embeddings import Embeddings
+
+import os
+import re
+import json
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+# =========================
+# CONFIGURATION SETTINGS
+# =========================
+
+ONNX_MODEL_DIR = os.getenv("MEDCHAT_ONNX_MODEL_DIR", os.path.join(tempfile.gettempdir(), "medical_onnx_models"))
+ONNX_BATCH_SIZE = 32              # Texts per ONNX Runtime call
+ONNX_INTRA_OP_THREADS = os.cpu_count() or 1
+MAX_SEQ_LENGTH = 384              # Same truncation as the sentence-transformers model
+MIN_COSINE_SIMILARITY = 0.99      # Quantized vectors must stay this close to the PyTorch model
+
+COMPATIBILITY_SAMPLES = [
+    "Hypertension is a major risk factor for stroke and myocardial infarction.",
+    "Metformin is the first-line treatment for type 2 diabetes mellitus.",
+    "Tăng huyết áp là yếu tố nguy cơ chính của đột quỵ.",
+    "Acute kidney injury presents with a rapid rise in serum creatinine and reduced urine output, "
+    "often following sepsis, hypovolaemia or nephrotoxic drugs.",
+]
+
+# =========================
+# HELPERS
+# =========================
+
+def model_dir_for(model_name: str, root: str = ONNX_MODEL_DIR) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+    return os.path.join(root, slug)
+
+def mean_pool(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Mean of token vectors over the attention mask (sentence-transformers pooling)."""
+    mask = mask[..., None].astype(hidden.dtype)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def cosine_similarities(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b = b / np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    return (a * b).sum(axis=1)
+
+def check_compatibility(candidate: Embeddings, reference: Embeddings, texts: Optional[List[str]] = None,
+                        min_cosine: float = MIN_COSINE_SIMILARITY) -> dict:
+    """Compare two embedding backends on the same texts."""
+    texts = texts or COMPATIBILITY_SAMPLES
+    a = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    b = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    cosines = cosine_similarities(a, b)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_abs_diff": float(np.abs(a - b).max()),
+        "compatible": bool(cosines.min() >= min_cosine),
+    }
+
+# =========================
+# EXPORT & QUANTIZATION
+# =========================
+
+def export_onnx_model(model_name: str, output_dir: str, max_length: int = MAX_SEQ_LENGTH,
+                      min_cosine: float = MIN_COSINE_SIMILARITY) -> str:
+    """
+    Export a HuggingFace encoder to ONNX, quantize its weights to int8 and save the tokenizer.
+
+    The quantized model is checked against the PyTorch model before it is used;
+    export fails if any sample drops below min_cosine.
+    """
+    # Heavy dependencies are only needed once, when the model is exported
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    int8_path = os.path.join(output_dir, "model.int8.onnx")
+
+    print(f"📦 Exporting {model_name} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    class Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    sample = tokenizer(COMPATIBILITY_SAMPLES, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+    torch.onnx.export(
+        Encoder(model),
+        (sample["input_ids"], sample["attention_mask"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=17,
+        dynamo=False,
+    )
+
+    print("🔧 Quantizing weights to int8...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    # Verify the quantized graph against PyTorch before anything is indexed with it
+    with torch.no_grad():
+        expected = Encoder(model)(sample["input_ids"], sample["attention_mask"]).numpy()
+    expected = mean_pool(expected, sample["attention_mask"].numpy())
+    session = ort.InferenceSession(int8_path, providers=["CPUExecutionProvider"])
+    actual = session.run(None, {
+        "input_ids": sample["input_ids"].numpy().astype(np.int64),
+        "attention_mask": sample["attention_mask"].numpy().astype(np.int64),
+    })[0]
+    cosines = cosine_similarities(mean_pool(actual, sample["attention_mask"].numpy()), expected)
+    if cosines.min() < min_cosine:
+        raise ValueError(f"Quantized model diverges from {model_name}: min cosine {cosines.min():.4f} < {min_cosine}")
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, "onnx_config.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "max_length": max_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+            "min_cosine": float(cosines.min()),
+        }, f, indent=2)
+    print(f"✅ ONNX model ready in {output_dir} (min cosine vs PyTorch {cosines.min():.4f})")
+    return output_dir
+
+# =========================
+# ONNX EMBEDDINGS
+# =========================
+
+class OnnxEmbeddings(Embeddings):
+    """
+    CPU embeddings from an int8-quantized ONNX export of a sentence-transformers model.
+
+    Texts are tokenized once, sorted by token length and batched so each batch
+    pads to a similar length; vectors are returned in the original order.
+    Pooling matches the PyTorch model (mean pooling, no normalization).
+    """
+
+    def __init__(self, model_name: str, model_dir: Optional[str] = None, batch_size: int = ONNX_BATCH_SIZE,
+                 intra_op_threads: int = ONNX_INTRA_OP_THREADS, quantized: bool = True,
+                 normalize: bool = False):
+        self.base_model_name = model_name
+        self.model_dir = model_dir or model_dir_for(model_name)
+        self.batch_size = batch_size
+        self.normalize = normalize
+        # Distinct name so the embedding cache keeps these vectors apart from PyTorch ones
+        self.model_name = f"{model_name}@onnx-{'int8' if quantized else 'fp32'}"
+
+        model_file = "model.int8.onnx" if quantized else "model.onnx"
+        config_path = os.path.join(self.model_dir, "onnx_config.json")
+        if not os.path.exists(config_path) or not os.path.exists(os.path.join(self.model_dir, model_file)):
+            export_onnx_model(model_name, self.model_dir)
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=config["max_length"])
+        self.pad_token_id = config["pad_token_id"] or 0
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(self.model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def _run(self, encodings) -> np.ndarray:
+        length = max(len(e.ids) for e in encodings)
+        input_ids = np.full((len(encodings), length), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for i, e in enumerate(encodings):
+            input_ids[i, :len(e.ids)] = e.ids
+            attention_mask[i, :len(e.ids)] = e.attention_mask
+        hidden = self.session.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+        vectors = mean_pool(hidden, attention_mask)
+        if self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # HuggingFaceEmbeddings replaces newlines too, so both backends see the same input
+        encodings = self.tokenizer.encode_batch([t.replace("\n", " ") for t in texts])
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+
+        result = None
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            vectors = self._run([encodings[i] for i in batch])
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[batch] = vectors
+        return result.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -1,8 +1,14 @@
-import json
-from pathlib import Path
+import os
+import sys
 
-p = Path('/Users/VinUni Data Science/IntroToDataScience/Output_VN_Book_splitting/metadata.json')
-obj = json.loads(p.read_text())
+from metadata_store import OUTPUT_FOLDER, MetadataStore, get_qdrant_client, push_to_qdrant
+
+metadata_json = os.path.join(OUTPUT_FOLDER, 'metadata.json')
+store = MetadataStore()
+
+# Lần đầu: nạp metadata.json vào SQLite
+if not store.count() and os.path.exists(metadata_json):
+    store.import_file(metadata_json)
 
 source = "Bệnh học nội khoa tập 1 YHN - Testyhoc.vn .pdf"
 
@@ -18,14 +24,16 @@ update = {
     "specialty": "Internal Medicine",
     "document_type": "textbook"
 }
-count = 0
-for item in obj:
-    if item.get('source_file') == source or (isinstance(item.get('file_id'), str) and 'Harrisons Principles of Internal Medicine' in item.get('file_id')):
-        # apply updates
-        item.update(update)
-        # ensure authors is exactly the list
-        item['authors'] = update['authors']
-        count += 1
-
-p.write_text(json.dumps(obj, ensure_ascii=False, indent=4))
-print(f'Updated {count} entries')
+
+# Cập nhật qua index source_file thay vì quét và ghi lại toàn bộ file
+changed = store.update(update, source_file=source)
+print(f'Updated {len(changed)} entries')
+
+# Giữ metadata.json đồng bộ cho các script cũ
+store.export_file(metadata_json)
+
+# python fast_metadata_update.py --push : cập nhật payload MedChat-RAG trên Qdrant
+if '--push' in sys.argv:
+    push_to_qdrant(store, get_qdrant_client())
+
+store.close()
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+
+# --- CẤU HÌNH ---
+OUTPUT_FOLDER = "/Users/VinUni Data Science/IntroToDataScience/Output_VN_Book_splitting"   # Thư mục chứa sách đã cắt
+DB_PATH = os.path.join(OUTPUT_FOLDER, "metadata.sqlite3")
+COLLECTION_NAME = "MedChat-RAG"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+# Các trường thông tin sách được phép cập nhật
+BOOK_FIELDS = ["book_title", "edition", "publish_year", "authors", "language", "specialty", "document_type"]
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS parts (
+        file_id TEXT PRIMARY KEY,
+        source_file TEXT NOT NULL,
+        part_number INTEGER,
+        page_start INTEGER,
+        page_end INTEGER,
+        virtual INTEGER NOT NULL DEFAULT 0,
+        book_title TEXT,
+        edition TEXT,
+        publish_year TEXT,
+        authors TEXT,               -- JSON list
+        language TEXT,
+        specialty TEXT,
+        document_type TEXT,
+        updated_at TEXT NOT NULL,
+        synced_at TEXT              -- Lần cuối đẩy payload lên Qdrant
+    );
+    CREATE INDEX IF NOT EXISTS idx_parts_source_file ON parts (source_file, part_number);
+    CREATE INDEX IF NOT EXISTS idx_parts_book_title ON parts (book_title);
+    CREATE INDEX IF NOT EXISTS idx_parts_unsynced ON parts (updated_at, synced_at);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def to_qdrant_payload(entry):
+    """
+    Các trường payload MedChat-RAG suy ra từ metadata của một phần sách.
+    Dùng chung build_payload của backend (bỏ text, page_number, pdf_id) để hai bên không lệch nhau.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from src.data.qdrant_pipeline import build_payload
+
+    payload = build_payload("", entry)
+    for key in ("text", "page_number", "pdf_id"):
+        payload.pop(key)
+    return payload
+
+
+class MetadataStore:
+    """Metadata các phần sách trong SQLite, tra cứu theo file_id / source_file có index."""
+
+    def __init__(self, db_path=DB_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def _row_to_entry(row):
+        entry = dict(row)
+        entry["authors"] = json.loads(entry["authors"] or "[]")
+        entry["virtual"] = bool(entry["virtual"])
+        return entry
+
+    # --- Nhập / xuất ---
+
+    def import_entries(self, entries):
+        """
+        Thêm các phần sách (từ metadata.json / metadata.jsonl).
+        Phần đã có chỉ được cập nhật các cột cấu trúc; thông tin sách đã sửa (BOOK_FIELDS) được giữ nguyên.
+        """
+        now = _now()
+        rows = []
+        for e in entries:
+            rows.append((
+                e["file_id"], e["source_file"], e.get("part_number"), e.get("page_start"), e.get("page_end"),
+                int(bool(e.get("virtual"))), e.get("book_title"), e.get("edition"),
+                str(e.get("publish_year") or ""), json.dumps(e.get("authors") or [], ensure_ascii=False),
+                e.get("language"), e.get("specialty"), e.get("document_type"), now,
+            ))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO parts (file_id, source_file, part_number, page_start, page_end, virtual, "
+                "book_title, edition, publish_year, authors, language, specialty, document_type, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(file_id) DO UPDATE SET source_file = excluded.source_file, "
+                "part_number = excluded.part_number, page_start = excluded.page_start, "
+                "page_end = excluded.page_end, virtual = excluded.virtual",
+                rows,
+            )
+        return len(rows)
+
+    def import_file(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                entries = [json.loads(line) for line in f if line.strip()]
+            else:
+                entries = json.load(f)
+        return self.import_entries(entries)
+
+    def export_file(self, path):
+        """Ghi lại metadata.json cho các script cũ."""
+        entries = [self._row_to_entry(r) for r in self.conn.execute("SELECT * FROM parts ORDER BY source_file, part_number")]
+        for e in entries:
+            e.pop("updated_at", None)
+            e.pop("synced_at", None)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=4)
+        return len(entries)
+
+    # --- Tra cứu / cập nhật ---
+
+    @staticmethod
+    def _where(source_file=None, file_id=None):
+        clauses, params = [], []
+        if source_file:
+            clauses.append("source_file = ?")
+            params.append(source_file)
+        if file_id:
+            clauses.append("file_id = ?")
+            params.append(file_id)
+        if not clauses:
+            raise ValueError("Cần ít nhất một điều kiện: source_file hoặc file_id")
+        # Phần sách phải khớp mọi điều kiện
+        return " AND ".join(clauses), params
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM parts").fetchone()[0]
+
+    def find(self, **match):
+        where, params = self._where(**match)
+        return [self._row_to_entry(r) for r in self.conn.execute(f"SELECT * FROM parts WHERE {where}", params)]
+
+    def update(self, fields, **match):
+        """Cập nhật thông tin sách cho các phần khớp điều kiện; trả về danh sách file_id đã đổi."""
+        unknown = set(fields) - set(BOOK_FIELDS)
+        if unknown:
+            raise ValueError(f"Trường không hợp lệ: {', '.join(sorted(unknown))}")
+        values = dict(fields)
+        if "authors" in values:
+            values["authors"] = json.dumps(values["authors"] or [], ensure_ascii=False)
+        if "publish_year" in values:
+            values["publish_year"] = str(values["publish_year"] or "")
+
+        where, params = self._where(**match)
+        assignments = ", ".join(f"{k} = ?" for k in values)
+        with self.conn:
+            file_ids = [r["file_id"] for r in self.conn.execute(f"SELECT file_id FROM parts WHERE {where}", params)]
+            self.conn.execute(
+                f"UPDATE parts SET {assignments}, updated_at = ? WHERE {where}",
+                [*values.values(), _now(), *params],
+            )
+        return file_ids
+
+    def bulk_update(self, updates):
+        """updates: [{"match": {"source_file": ...}, "set": {...}}, ...]"""
+        changed = []
+        for item in updates:
+            changed.extend(self.update(item["set"], **item["match"]))
+        return changed
+
+    def unsynced(self):
+        return [self._row_to_entry(r) for r in self.conn.execute(
+            "SELECT * FROM parts WHERE synced_at IS NULL OR synced_at < updated_at"
+        )]
+
+    def mark_synced(self, versions):
+        """
+        versions: [(file_id, updated_at), ...] đúng như lúc đọc để đẩy lên Qdrant.
+        Chỉ đánh dấu các phần có updated_at không đổi; phần bị sửa trong lúc đẩy vẫn chưa đồng bộ.
+        """
+        now = _now()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE parts SET synced_at = ? WHERE file_id = ? AND updated_at = ?",
+                [(now, file_id, updated_at) for file_id, updated_at in versions],
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+# --- Đẩy thay đổi lên Qdrant ---
+
+def get_qdrant_client():
+    from qdrant_client import QdrantClient
+    return QdrantClient(
+        url=os.getenv("SERVICE_URL_QDRANT"),
+        api_key=os.getenv("SERVICE_PASSWORD_QDRANTAPIKEY"),
+        port=443,
+        prefer_grpc=False,
+        timeout=60,
+    )
+
+
+def push_to_qdrant(store, client, collection_name=COLLECTION_NAME, entries=None):
+    """
+    Cập nhật payload trên Qdrant bằng set_payload lọc theo pdf_id, không embed lại.
+    Các phần có cùng payload (thường là cả cuốn sách) được gộp vào một request MatchAny.
+    """
+    from qdrant_client import models
+
+    entries = store.unsynced() if entries is None else entries
+    groups = {}
+    for entry in entries:
+        payload = to_qdrant_payload(entry)
+        key = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        # Giữ updated_at đã đọc để không đánh dấu nhầm bản sửa đến sau
+        groups.setdefault(key, (payload, []))[1].append((entry["file_id"], entry["updated_at"]))
+
+    for payload, versions in groups.values():
+        file_ids = [file_id for file_id, _ in versions]
+        client.set_payload(
+            collection_name=collection_name,
+            payload=payload,
+            points=models.Filter(must=[
+                models.FieldCondition(key="pdf_id", match=models.MatchAny(any=file_ids))
+            ]),
+            wait=True,
+        )
+        store.mark_synced(versions)
+        print(f"Đã cập nhật payload Qdrant cho {len(file_ids)} phần: {payload['book_name']}")
+    return sum(len(versions) for _, versions in groups.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quản lý metadata sách (SQLite) và đồng bộ payload lên Qdrant.")
+    parser.add_argument("--db", default=DB_PATH, help="Đường dẫn file SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Nhập metadata.json / metadata.jsonl")
+    p_import.add_argument("path")
+
+    p_export = sub.add_parser("export", help="Xuất metadata.json")
+    p_export.add_argument("path")
+
+    p_update = sub.add_parser("update", help="Cập nhật hàng loạt từ file JSON [{match, set}, ...]")
+    p_update.add_argument("updates", help='VD: [{"match": {"source_file": "x.pdf"}, "set": {"book_title": "..."}}]')
+    p_update.add_argument("--push", action="store_true", help="Đẩy thay đổi lên Qdrant ngay")
+
+    p_push = sub.add_parser("push", help="Đẩy các phần chưa đồng bộ lên Qdrant")
+    p_push.add_argument("--collection", default=COLLECTION_NAME)
+
+    args = parser.parse_args()
+    store = MetadataStore(args.db)
+    try:
+        if args.command == "import":
+            print(f"Đã nhập {store.import_file(args.path)} phần sách")
+        elif args.command == "export":
+            print(f"Đã xuất {store.export_file(args.path)} phần sách")
+        elif args.command == "update":
+            with open(args.updates, "r", encoding="utf-8") as f:
+                changed = store.bulk_update(json.load(f))
+            print(f"Đã cập nhật {len(changed)} phần sách")
+            if args.push:
+                push_to_qdrant(store, get_qdrant_client())
+        elif args.command == "push":
+            count = push_to_qdrant(store, get_qdrant_client(), args.collection)
+            print(f"Đã đồng bộ {count} phần sách")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
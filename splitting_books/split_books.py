@@ -1,81 +1,145 @@
 import os
 import fitz  # Đây là thư viện PyMuPDF
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # --- CẤU HÌNH ---
 INPUT_FOLDER = "/Users/VinUni Data Science/IntroToDataScience/VNMedBooks"      # Thư mục chứa sách gốc
 OUTPUT_FOLDER = "/Users/VinUni Data Science/IntroToDataScience/Output_VN_Book_splitting"   # Thư mục chứa sách đã cắt
 PAGES_PER_FILE = 50             # Số trang mỗi file con
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)   # Số tiến trình xử lý sách song song
+VIRTUAL_SPLIT = False           # True: chỉ ghi khoảng trang, không tạo file PDF con
 
-def split_pdfs():
-    # Tạo thư mục output nếu chưa có
-    if not os.path.exists(OUTPUT_FOLDER):
-        os.makedirs(OUTPUT_FOLDER)
+METADATA_JSONL = "metadata.jsonl"   # Ghi dần từng sách, an toàn khi bị dừng giữa chừng
+METADATA_JSON = "metadata.json"     # File tổng, tạo lại ở cuối từ metadata.jsonl
 
-    metadata_list = [] # Danh sách để lưu metadata tổng
 
-    # Quét tất cả file PDF trong thư mục input
-    files = [f for f in os.listdir(INPUT_FOLDER) if f.lower().endswith('.pdf')]
-    
-    print(f"Tìm thấy {len(files)} file sách. Bắt đầu xử lý...")
-
-    for filename in files:
-        file_path = os.path.join(INPUT_FOLDER, filename)
-        doc = fitz.open(file_path) # Mở file sách
-        total_pages = len(doc)
-        book_name_clean = os.path.splitext(filename)[0] # Tên file không đuôi .pdf
-
-        print(f"--> Đang cắt sách: {filename} ({total_pages} trang)")
-
-        # Vòng lặp cắt file
-        part_number = 1
-        for start_page in range(0, total_pages, PAGES_PER_FILE):
-            end_page = min(start_page + PAGES_PER_FILE, total_pages)
-            
+def make_meta_entry(filename, new_filename, part_number, start_page, end_page, virtual):
+    """Tự động tạo khung Metadata cho một phần sách."""
+    return {
+        # --- Định danh File (Tự động) ---
+        "file_id": new_filename,          # Ví dụ: harrison_p01.pdf
+        "source_file": filename,          # File gốc
+        "part_number": part_number,
+        "page_start": start_page + 1,
+        "page_end": end_page,
+        "virtual": virtual,               # True: không có file con, đọc trang page_start..page_end từ file gốc
+
+        # --- Thông tin Sách (Điền 1 lần rồi copy cho các file cùng sách) ---
+        "book_title": "",                 # VD: Harrison's Principles of Internal Medicine
+        "edition": "",                    # VD: 21st Edition
+        "publish_year": "",             # VD: 2022 (Dạng số nguyên để lọc > <)
+        "authors": [],                    # VD: ["Loscalzo", "Fauci"] (Dạng List)
+        "language": "Vietnamese",
+
+        # --- Thông tin Ngữ cảnh (Quan trọng cho Hybrid Search) ---
+        "specialty": "",                  # VD: Cardiology (Thay cho Subject/Category - dùng từ chuyên môn hơn)
+        "document_type": "textbook",      # Để sau này mở rộng thêm "clinical_guideline", "paper"...
+    }
+
+
+def split_one_book(filename, input_folder, output_folder, pages_per_file, virtual):
+    """Cắt một cuốn sách (chạy trong tiến trình con) và trả về metadata các phần."""
+    file_path = os.path.join(input_folder, filename)
+    doc = fitz.open(file_path) # Mở file sách
+    total_pages = len(doc)
+    book_name_clean = os.path.splitext(filename)[0] # Tên file không đuôi .pdf
+
+    entries = []
+    part_number = 1
+    for start_page in range(0, total_pages, pages_per_file):
+        end_page = min(start_page + pages_per_file, total_pages)
+
+        # Đặt tên file con: vidu_part_01.pdf (giữ nguyên tên kể cả khi cắt ảo để file_id ổn định)
+        new_filename = f"{book_name_clean}_part_{part_number:03d}.pdf"
+
+        if not virtual:
             # Tạo file PDF mới
             new_doc = fitz.open()
             new_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
-            
-            # Đặt tên file con: vidu_part_01.pdf
-            new_filename = f"{book_name_clean}_part_{part_number:03d}.pdf"
-            output_path = os.path.join(OUTPUT_FOLDER, new_filename)
-            
-            new_doc.save(output_path)
+            new_doc.save(os.path.join(output_folder, new_filename))
             new_doc.close()
 
-            # Tự động tạo khung Metadata cho file này
-            meta_entry = {
-                # --- Định danh File (Tự động) ---
-                "file_id": new_filename,          # Ví dụ: harrison_p01.pdf
-                "source_file": filename,          # File gốc
-                "part_number": part_number,
-                "page_start": start_page + 1,
-                "page_end": end_page,
-
-                # --- Thông tin Sách (Điền 1 lần rồi copy cho các file cùng sách) ---
-                "book_title": "",                 # VD: Harrison's Principles of Internal Medicine
-                "edition": "",                    # VD: 21st Edition
-                "publish_year": "",             # VD: 2022 (Dạng số nguyên để lọc > <)
-                "authors": [],                    # VD: ["Loscalzo", "Fauci"] (Dạng List)
-                "language": "Vietnamese",
-                
-                # --- Thông tin Ngữ cảnh (Quan trọng cho Hybrid Search) ---
-                "specialty": "",                  # VD: Cardiology (Thay cho Subject/Category - dùng từ chuyên môn hơn)
-                "document_type": "textbook",      # Để sau này mở rộng thêm "clinical_guideline", "paper"...
-            }
-            metadata_list.append(meta_entry)
-            
-            part_number += 1
-
-        doc.close()
-
-    # Lưu file metadata.json tổng vào cùng thư mục output
-    metadata_path = os.path.join(OUTPUT_FOLDER, "metadata.json")
+        entries.append(make_meta_entry(filename, new_filename, part_number, start_page, end_page, virtual))
+        part_number += 1
+
+    doc.close()
+    return filename, total_pages, entries
+
+
+def load_metadata_jsonl(path):
+    """Đọc metadata đã ghi; bỏ qua dòng cuối bị ghi dở nếu chương trình dừng đột ngột."""
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+def split_pdfs(input_folder=INPUT_FOLDER, output_folder=OUTPUT_FOLDER, pages_per_file=PAGES_PER_FILE,
+               workers=MAX_WORKERS, virtual=VIRTUAL_SPLIT):
+    # Tạo thư mục output nếu chưa có
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    jsonl_path = os.path.join(output_folder, METADATA_JSONL)
+
+    # Sách đã có trong metadata.jsonl là đã cắt xong -> bỏ qua khi chạy lại
+    metadata_list = load_metadata_jsonl(jsonl_path)
+    done = {entry["source_file"] for entry in metadata_list}
+
+    # Quét tất cả file PDF trong thư mục input
+    files = sorted(f for f in os.listdir(input_folder) if f.lower().endswith('.pdf'))
+    pending = [f for f in files if f not in done]
+
+    mode = "cắt ảo (chỉ ghi khoảng trang)" if virtual else "cắt file"
+    print(f"Tìm thấy {len(files)} file sách, {len(done)} đã xong. "
+          f"Xử lý {len(pending)} sách với {workers} tiến trình ({mode})...")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(jsonl_path, "a", encoding="utf-8") as out:
+        futures = {
+            executor.submit(split_one_book, filename, input_folder, output_folder, pages_per_file, virtual): filename
+            for filename in pending
+        }
+        for future in as_completed(futures):
+            try:
+                filename, total_pages, entries = future.result()
+            except Exception as e:
+                print(f"--> Lỗi khi cắt sách {futures[future]}: {e}")
+                continue
+
+            # Ghi metadata của cả cuốn sách ngay khi xong, rồi flush xuống đĩa
+            for entry in entries:
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            metadata_list.extend(entries)
+            print(f"--> Đã cắt sách: {filename} ({total_pages} trang, {len(entries)} phần)")
+
+    # Lưu file metadata.json tổng vào cùng thư mục output (giữ tương thích với các script cũ)
+    metadata_list.sort(key=lambda e: (e["source_file"], e["part_number"]))
+    metadata_path = os.path.join(output_folder, METADATA_JSON)
     with open(metadata_path, "w", encoding="utf-8") as f:
         json.dump(metadata_list, f, ensure_ascii=False, indent=4)
 
-    print(f"\nĐã xong! Kiểm tra folder '{OUTPUT_FOLDER}'.")
+    print(f"\nĐã xong! Kiểm tra folder '{output_folder}'.")
     print(f"Đã tạo file danh sách '{metadata_path}'.")
 
+
 if __name__ == "__main__":
-    split_pdfs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Cắt sách PDF thành các phần nhỏ và tạo metadata.")
+    parser.add_argument("--input", default=INPUT_FOLDER, help="Thư mục chứa sách gốc")
+    parser.add_argument("--output", default=OUTPUT_FOLDER, help="Thư mục chứa sách đã cắt")
+    parser.add_argument("--pages", type=int, default=PAGES_PER_FILE, help="Số trang mỗi phần")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Số tiến trình song song")
+    parser.add_argument("--virtual", action="store_true", default=VIRTUAL_SPLIT,
+                        help="Chỉ ghi khoảng trang vào metadata, không tạo file PDF con")
+    args = parser.parse_args()
+
+    split_pdfs(args.input, args.output, args.pages, args.workers, args.virtual)
@@ -0,0 +1,122 @@
+# =========================
+# IMPORT DEPENDENCIES
+# =========================
+
+import os
+import re
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from ingestion_manifest import IngestionManifest
+from medical_rag import ingest_document, make_vectorstore
+
+# =========================
+# CONFIGURATION SETTINGS
+# =========================
+
+# Workspaces are meant to be indexed once and reopened later, so they live in the user's data directory, not /tmp
+WORKSPACE_ROOT = os.getenv("MEDCHAT_WORKSPACE_DIR", os.path.join(os.path.expanduser("~"), ".medchat", "workspaces"))
+DEFAULT_WORKSPACE = "Default"
+
+# =========================
+# HELPERS
+# =========================
+
+def workspace_slug(name: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", name.strip()).strip("-").lower()
+    if not slug:
+        raise ValueError("Workspace name must contain letters or digits")
+    return slug
+
+def list_workspaces(root: str = WORKSPACE_ROOT) -> List[str]:
+    """Names of all workspaces under root."""
+    if not os.path.isdir(root):
+        return []
+    names = []
+    for entry in sorted(os.listdir(root)):
+        info_path = os.path.join(root, entry, "workspace.json")
+        if os.path.exists(info_path):
+            with open(info_path, "r", encoding="utf-8") as f:
+                names.append(json.load(f)["name"])
+    return names
+
+_write_locks: Dict[str, threading.Lock] = {}
+_write_locks_guard = threading.Lock()
+
+def _write_lock(path: str) -> threading.Lock:
+    """One lock per workspace directory, shared by every Workspace opened on it."""
+    with _write_locks_guard:
+        return _write_locks.setdefault(os.path.realpath(path), threading.Lock())
+
+def document_filter(doc_hashes: Optional[List[str]]) -> Optional[dict]:
+    """Metadata filter restricting retrieval to the given documents (None means all)."""
+    if doc_hashes is None:
+        return None
+    return {"doc_hash": {"$in": list(doc_hashes)}}
+
+# =========================
+# WORKSPACE
+# =========================
+
+class Workspace:
+    """
+    A named, persistent collection of documents sharing one vector index.
+
+    The workspace manifest records which documents and chunks are indexed, so
+    adding a document embeds only its new chunks and removing one deletes only
+    its chunks. Every chunk carries its document hash for query-time filters.
+    """
+
+    def __init__(self, name: str, embedding_function, root: str = WORKSPACE_ROOT):
+        self.name = name.strip()
+        self.path = os.path.join(root, workspace_slug(name))
+        self.index_path = os.path.join(self.path, "index")
+        self.embedding_function = embedding_function
+        os.makedirs(self.path, exist_ok=True)
+
+        info_path = os.path.join(self.path, "workspace.json")
+        if not os.path.exists(info_path):
+            with open(info_path, "w", encoding="utf-8") as f:
+                json.dump({"name": self.name, "created_at": datetime.now(timezone.utc).isoformat()}, f, indent=2)
+
+        self.manifest = IngestionManifest(os.path.join(self.path, "manifest.sqlite3"))
+        self.vectorstore = make_vectorstore(self.index_path, embedding_function)
+        # Shared per directory, so a Workspace reopened after a cache eviction still waits for the old one
+        self.write_lock = _write_lock(self.path)
+
+    def documents(self) -> List[Dict]:
+        """Fully indexed documents (file_sha256, source_name, chunk_count, updated_at)."""
+        return [f for f in self.manifest.list_files() if f["status"] == "complete"]
+
+    def add_document(self, file_path: str, source_name: Optional[str] = None) -> Dict:
+        """
+        Index a document into the workspace; unchanged documents are skipped, and a new
+        version of a document with the same source name replaces the previous one.
+        Returns the ingestion report.
+        """
+        # Every write goes through self.vectorstore (cached chains are keyed by it), one document at a time
+        with self.write_lock:
+            _, report = ingest_document(
+                file_path, self.embedding_function, self.manifest,
+                source_name=source_name, vectorstore_path=self.index_path, vectorstore=self.vectorstore,
+            )
+        return report
+
+    def remove_document(self, file_sha: str) -> int:
+        """Delete a document's chunks from the index, then forget it. Returns the number of chunks removed."""
+        with self.write_lock:
+            ids = list(self.manifest.committed_chunks(file_sha).values())
+            if ids:
+                self.vectorstore.delete(ids=ids)
+            self.manifest.remove_file(file_sha)
+        return len(ids)
+
+    def similarity_search(self, query: str, k: int = 5, doc_hashes: Optional[List[str]] = None):
+        filter = document_filter(doc_hashes)
+        return self.vectorstore.similarity_search(query, k=k, filter=filter) if filter else \
+            self.vectorstore.similarity_search(query, k=k)
+
+    def close(self):
+        self.manifest.close()